@@ -3,8 +3,10 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from functools import wraps
 import logging
+import math
 import os
 import json
+import time
 from threading import Thread
 from queue import Queue, Empty
 from langchain_core.callbacks import BaseCallbackHandler
@@ -20,12 +22,17 @@ from utils.crud import (
 )
 from rag.graph import build_graph
 from app.extensions import csrf
+from database.ingestion_jobs import IngestionJobRunner, JobAlreadyRunning
 
 logger = logging.getLogger(__name__)
 
 app_routes = Blueprint('app_routes', __name__)
 PROD_OR_DEV = os.getenv("CURRENT_STATE", "development")
 rag_graph = build_graph()
+ingestion_jobs = IngestionJobRunner()
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+# A progress stream holds a server worker for as long as it's open, so it ends after this and clients reconnect
+INGEST_STREAM_MAX_SECONDS = float(os.getenv("INGEST_STREAM_MAX_SECONDS", "60"))
 
 # Check if React frontend is available
 REACT_FRONTEND_EXISTS = os.path.exists(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend', 'dist'))
@@ -60,6 +67,17 @@ def login_required(f):
     return decorated_function
 
 
+def admin_required(f):
+    """Decorator to require a logged-in user listed in ADMIN_EMAILS."""
+    @wraps(f)
+    @login_required
+    def decorated_function(*args, **kwargs):
+        if session.get('user_email', '').lower() not in ADMIN_EMAILS:
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 # ============== API ROUTES FOR REACT FRONTEND ==============
 # API routes are exempt from CSRF as they use session-based auth with SameSite cookies
 
@@ -259,6 +277,73 @@ def api_chat():
     return Response(stream_with_context(generator()), mimetype='application/x-ndjson')
 
 
+@app_routes.route('/api/admin/ingest', methods=['POST'])
+@csrf.exempt
+@admin_required
+def api_start_ingestion():
+    """API endpoint to start ingesting the documents directory in the background."""
+    data = request.get_json(silent=True) or {}
+    try:
+        job = ingestion_jobs.start(
+            incremental=bool(data.get('incremental', True)),
+            resume=bool(data.get('resume', False)),
+            dedupe=bool(data.get('dedupe', False)),
+        )
+    except JobAlreadyRunning as e:
+        return jsonify({'error': str(e), 'job': e.job.to_dict()}), 409
+    logger.info(f"Ingestion job {job.id} started by {session.get('user_email')}")
+    return jsonify(job.to_dict()), 202
+
+
+@app_routes.route('/api/admin/ingest', methods=['GET'])
+@csrf.exempt
+@admin_required
+@limiter.exempt
+def api_list_ingestion_jobs():
+    """API endpoint to list recent ingestion jobs, newest first."""
+    return jsonify([job.to_dict() for job in ingestion_jobs.jobs()])
+
+
+@app_routes.route('/api/admin/ingest/<job_id>', methods=['GET'])
+@csrf.exempt
+@admin_required
+@limiter.exempt
+def api_ingestion_job(job_id):
+    """API endpoint to poll an ingestion job's status and progress."""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown ingestion job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app_routes.route('/api/admin/ingest/<job_id>/stream', methods=['GET'])
+@csrf.exempt
+@admin_required
+@limiter.exempt
+def api_stream_ingestion_job(job_id):
+    """API endpoint streaming an ingestion job's status as NDJSON until it finishes.
+
+    The stream stops after INGEST_STREAM_MAX_SECONDS even if the job hasn't finished, so a
+    long ingest doesn't pin a server worker; the last line's status tells the client to reconnect.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown ingestion job'}), 404
+    interval = request.args.get('interval', 1.0, type=float)
+    if not math.isfinite(interval):
+        interval = 1.0
+    interval = max(interval, 0.2)
+
+    def generator():
+        deadline = time.monotonic() + INGEST_STREAM_MAX_SECONDS
+        while not job.finished and time.monotonic() < deadline:
+            yield json.dumps(job.to_dict()) + "\n"
+            time.sleep(interval)
+        yield json.dumps(job.to_dict()) + "\n"
+
+    return Response(stream_with_context(generator()), mimetype='application/x-ndjson')
+
+
 # ============== LEGACY TEMPLATE ROUTES ==============
 # Only register these if React frontend is NOT available
 
@@ -0,0 +1,88 @@
+"""
+Compares LangChain's MMR search with our NumPy MMR stage, at several fetch_k.
+
+Builds a throwaway collection of random vectors (no embedding calls), then for each fetch_k
+times the full search both ways from the same query vector, plus the diversity selection
+alone on the same candidates, and checks both pick the same chunks. Reports the median of
+--repeat runs in milliseconds.
+
+Usage:
+    uv run python -m benchmarks.mmr
+    uv run python -m benchmarks.mmr --chunks 50000 --dim 1536 --fetch-k 20 100 200
+"""
+import sys
+from pathlib import Path
+import argparse
+import statistics
+import tempfile
+import time
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_chroma.vectorstores import maximal_marginal_relevance as langchain_mmr
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from database.mmr import maximal_marginal_relevance
+from database.vector_store import VectorStore
+
+
+def median_ms(function, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def build_store(db_path: str, chunks: int, dim: int, rng: np.random.Generator) -> VectorStore:
+    store = VectorStore(name="mmr_benchmark", db_path=db_path, documents_directory=db_path)
+    store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=dim), backend="chroma")
+    collection = store.chroma_collection()
+    for start in range(0, chunks, 5000):
+        count = min(5000, chunks - start)
+        collection.add(
+            ids=[f"chunk-{i}" for i in range(start, start + count)],
+            embeddings=rng.standard_normal((count, dim)).astype(np.float32),
+            documents=[f"chunk {i}" for i in range(start, start + count)],
+            metadatas=[{"n": i} for i in range(start, start + count)],
+        )
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MMR search.")
+    parser.add_argument("--chunks", type=int, default=20000, help="Chunks in the throwaway collection")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding size")
+    parser.add_argument("--k", type=int, default=10, help="Chunks to return")
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[20, 100, 200], help="Candidate counts to try")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement; the median is reported")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as db_path:
+        print(f"Building a collection of {args.chunks:,} random {args.dim}-d vectors...")
+        store = build_store(db_path, args.chunks, args.dim, rng)
+        query = rng.standard_normal(args.dim).astype(np.float32).tolist()
+
+        print(f"{'fetch_k':>7} {'search before':>14} {'search after':>13} {'select before':>14} {'select after':>13} {'same picks':>11}")
+        for fetch_k in args.fetch_k:
+            before_ms, before = median_ms(lambda: store.vector_store.max_marginal_relevance_search_by_vector(
+                query, k=args.k, fetch_k=fetch_k, lambda_mult=0.5), args.repeat)
+            after_ms, after = median_ms(lambda: store.mmr_search(query, k=args.k, fetch_k=fetch_k, lambda_mult=0.5), args.repeat)
+
+            candidates = store.chroma_collection().query(
+                query_embeddings=[query], n_results=fetch_k, include=["embeddings"])["embeddings"][0]
+            select_before_ms, _ = median_ms(lambda: langchain_mmr(np.array(query, dtype=np.float32), candidates, k=args.k, lambda_mult=0.5), args.repeat)
+            select_after_ms, _ = median_ms(lambda: maximal_marginal_relevance(np.array(query), candidates, k=args.k, lambda_mult=0.5), args.repeat)
+
+            same = sorted(doc.id for doc in before) == sorted(doc.id for doc in after)
+            print(f"{fetch_k:>7} {before_ms:>12.2f}ms {after_ms:>11.2f}ms {select_before_ms:>12.2f}ms {select_after_ms:>11.2f}ms {str(same):>11}")
+
+
+if __name__ == "__main__":
+    main()
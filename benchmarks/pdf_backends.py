@@ -0,0 +1,112 @@
+"""
+Compares PDF extraction backends on a folder of sample PDFs.
+
+Each backend runs in a fresh subprocess so its peak RSS isn't polluted by the others.
+Reports pages/sec, MB/sec and peak RSS per backend.
+
+Usage:
+    uv run python -m benchmarks.pdf_backends book_collection/
+    uv run python -m benchmarks.pdf_backends book_collection/ --backends pypdf pymupdf --workers 4
+"""
+import sys
+from pathlib import Path
+import argparse
+import json
+import os
+import resource
+import subprocess
+import time
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.document_loader import DocumentLoader
+from database.pdf_backends import available_backends
+
+
+def run_backend(directory: str, backend: str, workers: int) -> dict:
+    """Extracts every PDF in the directory with one backend. Runs in the child process."""
+    loader = DocumentLoader(directory, max_workers=workers, backend=backend)
+    files = loader.list_files()
+    total_bytes = sum(os.path.getsize(path) for path in files)
+
+    # What the interpreter and imports cost before any PDF is opened
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    pages = characters = 0
+    for document in loader.iter_documents(files=files):
+        pages += 1
+        characters += len(document.page_content)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is in KB on Linux; worker processes count separately under RUSAGE_CHILDREN
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "backend": backend,
+        "files": len(files),
+        "pages": pages,
+        "characters": characters,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "mb_per_second": total_bytes / 1_000_000 / elapsed if elapsed else 0.0,
+        "peak_rss_mb": max(peak_kb, peak_children_kb) / 1024,
+        "baseline_rss_mb": baseline_kb / 1024,
+    }
+
+
+def benchmark(directory: str, backends: list[str], workers: int) -> list[dict]:
+    results = []
+    for backend in backends:
+        print(f"Benchmarking {backend}...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pdf_backends", directory, "--child", backend, "--workers", str(workers)],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            # The text cache would turn the second backend into a disk read
+            env={**os.environ, "TEXT_CACHE_DIR": ""},
+        )
+        if completed.returncode != 0:
+            print(f"{backend} failed:\n{completed.stderr}", file=sys.stderr)
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    print(f"{'backend':<10} {'pages':>7} {'seconds':>8} {'pages/s':>9} {'MB/s':>7} {'peak RSS MB':>12} {'baseline MB':>12} {'chars':>10}")
+    for r in results:
+        print(
+            f"{r['backend']:<10} {r['pages']:>7} {r['seconds']:>8.2f} {r['pages_per_second']:>9.1f} "
+            f"{r['mb_per_second']:>7.2f} {r['peak_rss_mb']:>12.1f} {r['baseline_rss_mb']:>12.1f} {r['characters']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction backends.")
+    parser.add_argument("directory", help="Folder of sample PDFs")
+    parser.add_argument("--backends", nargs="+", default=None, help="Backends to compare (default: all installed)")
+    parser.add_argument("--workers", type=int, default=1, help="Parser processes per backend")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Keep stdout clean apart from the result line
+        sys.stdout, real_stdout = sys.stderr, sys.stdout
+        result = run_backend(args.directory, args.child, args.workers)
+        print(json.dumps(result), file=real_stdout)
+        return
+
+    results = benchmark(args.directory, args.backends or available_backends(), args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares recall, latency and memory of compact vector indexes against full float32.
+
+Exports the collection once per variant (float32, float16, int8, int8 with fewer
+dimensions), then runs the evaluation questions through each one, with and without
+full-precision rescoring. Recall@k is measured against an exact float32 scan. "Scanned MB"
+is what every search reads, and so what stays in the page cache; the float32 copy used for
+rescoring sits on disk and only the rescored rows are read.
+
+Queries are the evaluation questions (embedded with the configured model), or with
+--sample-chunks N, N stored chunk vectors, which needs no API calls.
+
+Usage:
+    uv run python -m benchmarks.quantization
+    uv run python -m benchmarks.quantization --sample-chunks 200 --dimensions 512 256
+"""
+import sys
+from pathlib import Path
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from database.mmap_index import FULL_VECTORS_FILENAME, VECTORS_FILENAME, MmapVectorIndex, export_index
+from database.vector_store import VectorStore
+
+load_dotenv()
+
+
+def load_queries(vector_store: VectorStore, questions_path: str, sample_chunks: int | None) -> np.ndarray:
+    if sample_chunks:
+        collection = vector_store.chroma_collection()
+        offsets = np.random.default_rng(0).choice(collection.count(), sample_chunks, replace=False)
+        return np.asarray([collection.get(include=["embeddings"], limit=1, offset=int(o))["embeddings"][0] for o in offsets])
+    questions = pd.read_csv(questions_path)["Prompt"].dropna().tolist()
+    return np.asarray([vector_store.embeddings.embed_query(question) for question in questions])
+
+
+def run(index: MmapVectorIndex, queries: np.ndarray, k: int) -> tuple[list[set[int]], list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        rows, _ = index.search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(set(index._rows(rows.tolist(), [])["ids"]))
+    return results, latencies
+
+
+def megabytes(path: str) -> float:
+    return os.path.getsize(path) / 1e6 if os.path.exists(path) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector indexes.")
+    parser.add_argument("--questions", default="evaluation/data/ragas_data.csv", help="CSV with a Prompt column")
+    parser.add_argument("--sample-chunks", type=int, default=None, help="Use this many stored chunk vectors as queries instead")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, nargs="*", default=[512, 256], help="Reduced sizes to try with int8")
+    parser.add_argument("--rescore", type=int, default=4, help="Candidates rescored per result")
+    parser.add_argument("--nlist", type=int, default=1, help="IVF clusters; 1 scans everything so only quantization differs")
+    args = parser.parse_args()
+
+    vector_store = VectorStore(
+        name=os.getenv("VECTOR_STORE_NAME", "rag_database"),
+        db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
+        documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
+    )
+    vector_store.initialise_vector_store(backend="chroma")
+    queries = load_queries(vector_store, args.questions, args.sample_chunks)
+    collection = vector_store.chroma_collection()
+    print(f"{len(queries)} queries against {collection.count():,} chunks, k={args.k}")
+
+    variants = [("float32", None), ("float16", None), ("int8", None)] + [("int8", d) for d in args.dimensions]
+    with tempfile.TemporaryDirectory() as scratch:
+        # Ground truth is an exact float32 scan, whatever --nlist the variants are built with
+        truth_path = os.path.join(scratch, "truth")
+        export_index(collection, truth_path, dtype="float32", nlist=1)
+        truth, _ = run(MmapVectorIndex(truth_path, exact=True, rescore=0), queries, args.k)
+        print(f"{'variant':<14} {'rescore':>7} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'scanned MB':>11} {'on disk MB':>11}")
+        for dtype, dimensions in variants:
+            name = dtype if dimensions is None else f"{dtype}@{dimensions}"
+            path = os.path.join(scratch, name)
+            export_index(collection, path, dtype=dtype, nlist=args.nlist, dimensions=dimensions)
+            scanned = megabytes(os.path.join(path, VECTORS_FILENAME))
+            on_disk = scanned + megabytes(os.path.join(path, FULL_VECTORS_FILENAME))
+            for rescore in ([0, args.rescore] if dtype != "float32" or dimensions else [0]):
+                index = MmapVectorIndex(path, rescore=rescore)
+                results, latencies = run(index, queries, args.k)
+                recall = statistics.mean(len(got & want) / len(want) for got, want in zip(results, truth) if want)
+                p95 = float(np.percentile(latencies, 95))
+                print(f"{name:<14} {rescore or '-':>7} {recall:>9.3f} {statistics.median(latencies):>8.2f} {p95:>8.2f} {scanned:>11.1f} {on_disk:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
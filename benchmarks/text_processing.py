@@ -0,0 +1,94 @@
+"""
+Compares the old clean_text + RecursiveCharacterTextSplitter path with the single-pass
+cleaner and offset-based splitter, on the pages of a real book.
+
+Both paths run over the same extracted pages (extraction isn't timed) and their chunks are
+checked to be identical. Reports chars/sec for each.
+
+Usage:
+    uv run python -m benchmarks.text_processing book_collection/some_book.pdf
+    uv run python -m benchmarks.text_processing book_collection/some_book.pdf --repeat 5
+"""
+import sys
+from pathlib import Path
+import argparse
+import re
+import time
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from database.pdf_backends import get_backend
+from database.text_processing import OffsetTextSplitter, clean_text
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def legacy_clean_text(text: str) -> str:
+    """clean_text as it was before the single-pass version."""
+    text = text.encode('utf-8', 'ignore').decode('utf-8')
+    text = text.replace('\x00', '')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    return text.strip()
+
+
+def legacy_chunks(pages: list[Document]) -> list[Document]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, separators=SEPARATORS, length_function=len, add_start_index=True
+    )
+    chunks = []
+    for page in pages:
+        cleaned = Document(page_content=legacy_clean_text(page.page_content), metadata=dict(page.metadata))
+        chunks.extend(splitter.split_documents([cleaned]))
+    return chunks
+
+
+def fused_chunks(pages: list[Document]) -> list[Document]:
+    splitter = OffsetTextSplitter(chunk_size=1000, chunk_overlap=200, separators=SEPARATORS)
+    chunks = []
+    for page in pages:
+        cleaned = Document(page_content=clean_text(page.page_content), metadata=dict(page.metadata))
+        chunks.extend(splitter.split_documents([cleaned]))
+    return chunks
+
+
+def best_of(function, pages: list[Document], repeat: int) -> tuple[float, list[Document]]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(pages)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text cleaning and splitting.")
+    parser.add_argument("pdf", help="A book to extract pages from")
+    parser.add_argument("--backend", default=None, help="PDF backend used for extraction (default: PDF_BACKEND)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the fastest is reported")
+    args = parser.parse_args()
+
+    pages = list(get_backend(args.backend).iter_pages(args.pdf))
+    characters = sum(len(page.page_content) for page in pages)
+    print(f"{len(pages)} pages, {characters:,} characters")
+
+    legacy_seconds, legacy = best_of(legacy_chunks, pages, args.repeat)
+    fused_seconds, fused = best_of(fused_chunks, pages, args.repeat)
+
+    identical = [(c.page_content, c.metadata) for c in legacy] == [(c.page_content, c.metadata) for c in fused]
+    print(f"{'path':<8} {'seconds':>8} {'chars/s':>14} {'chunks':>8}")
+    print(f"{'before':<8} {legacy_seconds:>8.3f} {characters / legacy_seconds:>14,.0f} {len(legacy):>8}")
+    print(f"{'after':<8} {fused_seconds:>8.3f} {characters / fused_seconds:>14,.0f} {len(fused):>8}")
+    print(f"Speedup: {legacy_seconds / fused_seconds:.1f}x, chunks identical: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+import json
+import os
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+CHECKPOINT_FILENAME = "ingest_checkpoint.json"
+
+
+class IngestionCheckpoint:
+    """
+    Durable progress for the ingestion run that's currently going (or died part way).
+
+    Written after every committed batch. For each book that's in progress it records the
+    file hash, the IDs of the chunks already in Chroma and, once splitting has finished, how
+    many chunks the book has. A book moves into the manifest as soon as all its chunks are
+    committed, so the checkpoint only ever holds the handful of books in flight.
+    """
+
+    def __init__(self, path: str, files: dict | None = None, batches_committed: int = 0):
+        self.path = path
+        self.files: dict[str, dict] = files or {}
+        self.batches_committed = batches_committed
+        self._committed = {source: set(entry["chunk_ids"]) for source, entry in self.files.items()}
+
+    @classmethod
+    def load(cls, db_path: str) -> "IngestionCheckpoint":
+        """Loads the checkpoint from the persist directory, or starts an empty one.
+
+        Args:
+            db_path: The Chroma persist directory.
+        Returns:
+            The checkpoint.
+        """
+        path = os.path.join(db_path, CHECKPOINT_FILENAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, files=data.get("files", {}), batches_committed=data.get("batches_committed", 0))
+
+    def save(self) -> None:
+        """Writes the checkpoint atomically (fsync'd, so it survives a container restart)."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"batches_committed": self.batches_committed, "files": self.files}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Forgets everything and removes the file (the run finished)."""
+        self.files = {}
+        self._committed = {}
+        self.batches_committed = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def start_file(self, source: str, sha256: str) -> None:
+        """Starts tracking a book, keeping any progress already recorded for the same contents."""
+        entry = self.files.get(source)
+        if entry is None or entry["sha256"] != sha256:
+            self.files[source] = {"sha256": sha256, "chunk_ids": [], "total_chunks": None}
+            self._committed[source] = set()
+
+    def commit(self, source: str, chunk_ids: list[str]) -> None:
+        """Records chunks of a book that are now safely in Chroma."""
+        committed = self._committed[source]
+        for chunk_id in chunk_ids:
+            if chunk_id not in committed:
+                committed.add(chunk_id)
+                self.files[source]["chunk_ids"].append(chunk_id)
+
+    def set_total(self, source: str, total_chunks: int) -> None:
+        """Records how many chunks a book has, once splitting has got to the end of it."""
+        self.files[source]["total_chunks"] = total_chunks
+
+    def is_committed(self, source: str, chunk_id: str) -> bool:
+        return chunk_id in self._committed.get(source, ())
+
+    def is_complete(self, source: str) -> bool:
+        entry = self.files.get(source)
+        return bool(entry) and entry["total_chunks"] is not None and len(entry["chunk_ids"]) >= entry["total_chunks"]
+
+    def chunk_ids(self, source: str) -> list[str]:
+        entry = self.files.get(source)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def finish_file(self, source: str) -> None:
+        self.files.pop(source, None)
+        self._committed.pop(source, None)
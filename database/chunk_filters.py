@@ -0,0 +1,205 @@
+import sys
+from pathlib import Path
+import re
+import zlib
+from collections import Counter, deque
+from typing import Iterable, Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+
+_DIGITS = re.compile(r"\d+")
+_WORD = re.compile(r"\w+")
+_SHINGLE_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+class BoilerplateFilter:
+    """
+    Strips running headers and footers (book titles, chapter names, page numbers) from pages.
+
+    Looks at the first and last few lines of every page. A line that shows up, with digits
+    ignored, at the same end of enough of the surrounding pages of the same book is treated
+    as boilerplate and removed. Pages are judged against a sliding window of their neighbours
+    rather than the whole book, so this works on a stream of pages and only holds a few of
+    them back at a time.
+    """
+
+    def __init__(self, window: int = 15, min_repeats: int = 4, edge_lines: int = 2, max_line_length: int = 120):
+        """
+        Args:
+            window: How many neighbouring pages (including the page itself) a line is compared against.
+            min_repeats: How many of those pages the line has to appear on to count as boilerplate.
+            edge_lines: How many lines at the top and bottom of each page are candidates.
+            max_line_length: Longer lines are never treated as headers or footers.
+        """
+        self.window = window
+        self.min_repeats = min_repeats
+        self.edge_lines = edge_lines
+        self.max_line_length = max_line_length
+        self.lines_dropped = 0
+        self.bytes_dropped = 0
+
+    def filter(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Removes boilerplate lines from each page, in place.
+
+        Args:
+            pages: Cleaned pages, book by book and in page order.
+        Yields:
+            The same pages, in the same order, a few pages behind the input.
+        """
+        half = self.window // 2
+        recent, pending = deque(), deque()
+        counts = Counter()
+        source = None
+        for page in pages:
+            if page.metadata.get("source") != source:
+                # Headers don't carry over between books
+                while pending:
+                    yield self._strip(*pending.popleft(), counts)
+                recent.clear()
+                counts.clear()
+                source = page.metadata.get("source")
+
+            keys = self._edge_keys(page.page_content)
+            recent.append(keys)
+            counts.update(keys)
+            pending.append((page, keys))
+            if len(recent) > self.window:
+                counts.subtract(recent.popleft())
+            # A page is judged once it has `half` pages after it in the window
+            while len(pending) > half:
+                yield self._strip(*pending.popleft(), counts)
+        while pending:
+            yield self._strip(*pending.popleft(), counts)
+
+    def _edge_keys(self, text: str) -> set[tuple[str, str]]:
+        lines = [line for line in text.split("\n") if line.strip()]
+        keys = set()
+        for line in lines[:self.edge_lines]:
+            keys.add(("top", self._normalise(line)))
+        for line in lines[-self.edge_lines:] if self.edge_lines else ():
+            keys.add(("bottom", self._normalise(line)))
+        return keys
+
+    def _normalise(self, line: str) -> str:
+        if len(line) > self.max_line_length:
+            return ""  # Never repeated enough to matter, see _strip
+        return _DIGITS.sub("#", line.strip().lower())
+
+    def _strip(self, page: Document, keys: set, counts: Counter) -> Document:
+        repeated = {key for key in keys if key[1] and counts[key] >= self.min_repeats}
+        if not repeated:
+            return page
+
+        lines = page.page_content.split("\n")
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        if len(content) <= 2 * self.edge_lines:
+            return page  # All edges, no body: can't tell a header from the text itself
+        edges = [("top", i) for i in content[:self.edge_lines]] + [("bottom", i) for i in content[-self.edge_lines:]]
+        drop = {i for end, i in edges if (end, self._normalise(lines[i])) in repeated}
+        if drop:
+            self.lines_dropped += len(drop)
+            self.bytes_dropped += sum(len(lines[i].encode("utf-8")) + 1 for i in drop)
+            page.page_content = "\n".join(line for i, line in enumerate(lines) if i not in drop).strip()
+        return page
+
+
+class NearDuplicateFilter:
+    """
+    Drops chunks that are near-copies of one already seen in the same book (MinHash + LSH).
+
+    Each chunk is reduced to a MinHash signature over its word shingles. Signatures are
+    bucketed by band, so only chunks that share a band are compared, and a chunk is a
+    duplicate if its estimated Jaccard similarity to one of those is above the threshold.
+    Catches repeated notices, tables of contents and pages that were extracted twice. Call
+    reset() between books: a chunk dropped for matching another book would only live on
+    under that book's chunk IDs, and vanish with them if that book were removed or changed.
+    Hashing is stable, so the same book always gives the same decisions, and memory only
+    grows with the size of one book.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity at or above which a chunk is a duplicate.
+            num_perm: Length of the MinHash signature. Must be divisible by bands.
+            bands: LSH bands. More bands find more candidates (and cost more comparisons).
+            shingle_size: Words per shingle.
+            seed: Seed for the hash permutations.
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Odd multipliers, as multiply-shift hashing needs
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.chunks_dropped = 0
+        self.bytes_dropped = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets every chunk seen so far (but keeps the counts of what was dropped)."""
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.bands)]
+        self._signatures = np.empty((1024, self.num_perm), dtype=np.uint32)
+        self._count = 0
+
+    def is_duplicate(self, chunk: Document) -> bool:
+        """Checks a chunk against everything seen since the last reset(), remembering it if it's new.
+
+        Args:
+            chunk: The chunk.
+        Returns:
+            True if the chunk should be dropped.
+        """
+        signature = self.signature(chunk.page_content)
+        if signature is None:
+            return False
+
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+        if candidates:
+            stored = self._signatures[list(candidates)]
+            if (stored == signature).mean(axis=1).max() >= self.threshold:
+                self.chunks_dropped += 1
+                self.bytes_dropped += len(chunk.page_content.encode("utf-8"))
+                return True
+
+        self._remember(signature, band_keys)
+        return False
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """MinHash signature of a text's word shingles, or None if it has no words."""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return None
+        word_hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+        # Hash each run of shingle_size words by mixing the word hashes, all shingles at once.
+        # Arithmetic wraps around at 2^64, which is what we want here.
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for k in range(size):
+            shingles = shingles * _SHINGLE_MULTIPLIER + word_hashes[k:k + count]
+        # Multiply-shift hashing, one permutation per column; min over shingles is the signature
+        permuted = (np.outer(shingles, self._a) + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _remember(self, signature: np.ndarray, band_keys: list[bytes]) -> None:
+        if self._count == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[self._count] = signature
+        for bucket, key in zip(self._buckets, band_keys):
+            bucket.setdefault(key, []).append(self._count)
+        self._count += 1
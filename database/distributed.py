@@ -0,0 +1,248 @@
+import sys
+from pathlib import Path
+import argparse
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.document_loader import DocumentLoader
+from database.manifest import IngestionManifest, file_sha256
+from database.sharding import ShardedVectorStore, open_vector_store
+from database.vector_store import VectorStore
+from database.work_queue import WorkItem, WorkQueue, open_work_queue
+from dotenv import load_dotenv
+load_dotenv()
+
+
+@dataclass
+class DistributedStats:
+    """Totals across all workers for one distributed ingestion run."""
+    books: int = 0
+    books_failed: int = 0
+    pages: int = 0
+    chunks: int = 0
+    chunks_written: int = 0
+    elapsed_seconds: float = 0.0
+    workers: set[str] = field(default_factory=set)
+    unfinished: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        elapsed = self.elapsed_seconds or 1e-9
+        return (
+            f"{self.books} books ({self.books_failed} failed, {len(self.unfinished)} unfinished), {self.pages} pages, "
+            f"{self.chunks_written} chunks written by {len(self.workers)} workers in {self.elapsed_seconds:.1f}s: "
+            f"{self.pages / elapsed:.1f} pages/s, {self.chunks_written / elapsed:.1f} chunks/s"
+        )
+
+
+class IngestionCoordinator:
+    """
+    Hands the books that need ingesting to workers through a work queue.
+
+    The coordinator owns the manifest and the keyword index: it diffs the documents directory,
+    deletes chunks of removed or changed books and queues the rest. As workers finish books it
+    indexes their chunks, records them in the manifest (so a serving app reloads) and adds up
+    their stats.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        queue: WorkQueue,
+        poll_interval: float = 2.0,
+        stall_timeout: float | None = 600.0,
+    ):
+        """
+        Args:
+            vector_store: The initialised vector store the workers write into.
+            queue: The queue the workers take books from.
+            poll_interval: Seconds between progress reports.
+            stall_timeout: Give up once no worker has held a book or reported one for this long
+                (e.g. none are running). None waits forever.
+        Raises:
+            ValueError: If the store is sharded, which distributed ingestion doesn't support.
+        """
+        _reject_sharded(vector_store)
+        self.vector_store = vector_store
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+
+    def run(self, incremental: bool = True, batch_size: int = 5000) -> DistributedStats:
+        """Queues the books and waits until the workers have been through all of them.
+
+        Args:
+            incremental: Set to False to re-ingest every book, even unchanged ones.
+            batch_size: Chunks per delete of stale chunks.
+        Returns:
+            The aggregate stats. Books left over when the workers stalled are listed in
+            `unfinished` and stay out of the manifest, so the next run queues them again.
+        """
+        directory = self.vector_store.directory
+        manifest = IngestionManifest.load(self.vector_store.db_path)
+        diff = manifest.diff(DocumentLoader(directory).list_files(), directory)
+        to_ingest = self.vector_store.plan_ingest(manifest, diff, incremental, batch_size)
+
+        self.queue.clear()
+        paths = {manifest.key(path, directory): path for path in to_ingest}
+        for key, path in paths.items():
+            self.queue.put(WorkItem(key, diff.hashes[path]))
+        print(f"Queued {len(paths)} books for the workers.")
+
+        stats = DistributedStats()
+        started = time.perf_counter()
+        finished: set[str] = set()
+        active_at = time.monotonic()
+        while len(finished) < len(paths):
+            time.sleep(self.poll_interval)
+            results = self.queue.take_results()
+            for result in results:
+                # At-least-once: the same book may come back twice, only count it once
+                if result["key"] in finished or result["key"] not in paths:
+                    continue
+                finished.add(result["key"])
+                if "error" in result:
+                    stats.books_failed += 1
+                    print(f"Giving up on {result['key']}: {result['error']}")
+                    continue
+                # Workers may be on other machines, so the keyword index is filled from Chroma here
+                self.vector_store.index_keywords(result["chunk_ids"])
+                # A book with unreadable pages is kept, but retried on the next few runs
+                failed = bool(result["stats"].get("files_failed"))
+                manifest.record(paths[result["key"]], directory, result["sha256"], result["chunk_ids"], failed=failed)
+                manifest.save()
+                stats.books += 1
+                stats.pages += result["stats"]["pages"]
+                stats.chunks += result["stats"]["chunks"]
+                stats.chunks_written += result["stats"]["chunks_written"]
+                stats.workers.add(result["worker"])
+            stats.elapsed_seconds = time.perf_counter() - started
+            counts = self.queue.counts()
+            print(f"[{len(finished)}/{len(paths)} books, {counts['claimed']} in progress] {stats.summary()}")
+            # A dead worker's lease runs out, so nothing claimed and nothing reported means no one is working
+            if results or counts["claimed"]:
+                active_at = time.monotonic()
+            elif self.stall_timeout is not None and time.monotonic() - active_at >= self.stall_timeout:
+                stats.unfinished = sorted(set(paths) - finished)
+                print(f"No worker has taken a book for {self.stall_timeout:.0f}s, giving up on: {', '.join(stats.unfinished)}")
+                break
+        self.vector_store.refresh_section_index(batch_size)
+        self.vector_store.refresh_mmap_index()
+        print(f"Distributed ingestion finished: {stats.summary()}")
+        return stats
+
+
+class IngestionWorker:
+    """
+    Takes books off a work queue and runs them through the ingestion pipeline.
+
+    Any number of these can run, on any machine that can see the books and the collection
+    (set CHROMA_HOST so they all write to one Chroma server). A book is checked against the
+    hash it was queued with, so a worker never writes chunks for a different version of it.
+    """
+
+    def __init__(self, vector_store: VectorStore, queue: WorkQueue, worker_id: str | None = None, batch_size: int = 5000):
+        """
+        Args:
+            vector_store: The initialised vector store to write into.
+            queue: The queue to take books from.
+            worker_id: Name shown in the coordinator's stats. Defaults to host:pid.
+            batch_size: Chunks per write.
+        Raises:
+            ValueError: If the store is sharded, which distributed ingestion doesn't support.
+        """
+        _reject_sharded(vector_store)
+        self.vector_store = vector_store
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.books = 0
+
+    def run(self, idle_timeout: float | None = None, poll_interval: float = 1.0) -> int:
+        """Works through the queue.
+
+        Args:
+            idle_timeout: Stop after the queue has been empty this long. None waits forever.
+            poll_interval: Seconds to wait between looks at an empty queue.
+        Returns:
+            How many books this worker ingested.
+        """
+        idle_since = time.monotonic()
+        while idle_timeout is None or time.monotonic() - idle_since < idle_timeout:
+            item = self.queue.claim()
+            if item is None:
+                time.sleep(poll_interval)
+                continue
+            self.process(item)
+            idle_since = time.monotonic()
+        return self.books
+
+    def process(self, item: WorkItem) -> None:
+        """Ingests one book and reports back, keeping its lease alive while it works."""
+        path = os.path.join(self.vector_store.directory, item.key)
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(item, done), name="ingest-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            if file_sha256(path) != item.sha256:
+                raise ValueError("the file changed after it was queued")
+            started = time.perf_counter()
+            stats, chunk_ids = self.vector_store.ingest_files([path], {path: item.sha256}, self.batch_size)
+        except Exception as e:
+            print(f"Worker {self.worker_id} failed on {item.key}: {e}")
+            self.queue.fail(item, str(e))
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        completed = self.queue.complete(item, {
+            "key": item.key,
+            "sha256": item.sha256,
+            "worker": self.worker_id,
+            "chunk_ids": chunk_ids[path],
+            "stats": asdict(stats),
+            "elapsed_seconds": time.perf_counter() - started,
+        })
+        if not completed:
+            # Its chunks are written (and upserts, so harmless); the new holder reports the book
+            print(f"Worker {self.worker_id} lost its lease on {item.key} to another worker")
+            return
+        self.books += 1
+
+    def _heartbeat(self, item: WorkItem, done: threading.Event) -> None:
+        while not done.wait(self.queue.lease_seconds / 3):
+            self.queue.heartbeat(item)
+
+
+def _reject_sharded(vector_store: VectorStore | ShardedVectorStore) -> None:
+    # Workers would have to agree on the shard map and each shard has its own manifest, so for
+    # now a sharded library is ingested in one process (process_documents or the app's jobs)
+    if isinstance(vector_store, ShardedVectorStore):
+        raise ValueError("Distributed ingestion doesn't support VECTOR_STORE_SHARDING=domain, use process_documents instead")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest PDFs with a coordinator and any number of workers.")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("--queue", default=os.getenv("INGEST_QUEUE_URL", "redis://localhost:6379/0"),
+                        help="redis://... URL or a directory shared by all workers.")
+    parser.add_argument("--lease", type=float, default=300.0, help="Seconds before a silent worker's book is handed to another.")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Workers stop after the queue has been empty this long.")
+    parser.add_argument("--stall-timeout", type=float, default=600.0,
+                        help="The coordinator gives up after no worker has held or finished a book for this long.")
+    parser.add_argument("--full", action="store_true", help="Re-ingest every book, not just new or changed ones.")
+    args = parser.parse_args()
+
+    vector_store = open_vector_store(backend="chroma")
+    queue = open_work_queue(args.queue, lease_seconds=args.lease)
+    if args.role == "coordinator":
+        IngestionCoordinator(vector_store, queue, stall_timeout=args.stall_timeout).run(incremental=not args.full)
+    else:
+        IngestionWorker(vector_store, queue).run(idle_timeout=args.idle_timeout)
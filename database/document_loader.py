@@ -1,8 +1,10 @@
 import sys
 from pathlib import Path
 import logging
-import re
+import os
 import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
 # Add project root to Python path when running directly
 project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
@@ -10,22 +12,118 @@ if str(project_root) not in sys.path:
 
 from langchain_community.document_loaders import PyPDFDirectoryLoader
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from database.manifest import file_sha256
+from database.pdf_backends import DEFAULT_BACKEND, PdfBackend, get_backend
+from database.text_cache import PageTextCache
+from database.text_processing import OffsetTextSplitter, clean_text
 
 logging.getLogger("pypdf").setLevel(logging.ERROR) 
 
+
+def _pdf_page_count(path: str, backend: str = DEFAULT_BACKEND) -> int | None:
+    """Counts the pages in a PDF. Runs inside a worker process.
+    
+    Args:
+        path: The path to the PDF.
+        backend: Name of the PDF backend to use.
+    Returns:
+        The number of pages, or None if the file can't be read.
+    """
+    try:
+        return get_backend(backend).page_count(path)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+
+def _load_page_range(path: str, start: int, end: int, backend: str = DEFAULT_BACKEND) -> list[Document]:
+    """Extracts pages [start, end) of one PDF. Runs inside a worker process.
+    
+    The metadata matches what PyPDFDirectoryLoader produces, so downstream code
+    can keep relying on `source` and `page`.
+    
+    Args:
+        path: The path to the PDF.
+        start: The first page to extract (0-based).
+        end: The page to stop at (exclusive).
+        backend: Name of the PDF backend to use.
+    Returns:
+        A list of documents, one per page.
+    """
+    if start < 0:
+        raise ValueError(f"{path} could not be read")
+    return get_backend(backend).load_pages(path, start, end)
+
+
 class DocumentLoader:
-    def __init__(self, directory: str):
+    def __init__(
+        self,
+        directory: str,
+        max_workers: int | None = None,
+        pages_per_task: int = 200,
+        text_cache: PageTextCache | None = None,
+        backend: str | PdfBackend | None = None,
+        stream_pages: bool | None = None,
+    ):
+        """
+        Args:
+            directory: The folder to look for PDFs in.
+            max_workers: Size of the process pool used for parsing. 1 keeps the old single-process
+                loader. Defaults to the DOCUMENT_LOADER_WORKERS env var (or 1).
+            pages_per_task: Big books are split into page ranges of this size so one textbook
+                doesn't end up as the slowest task in the pool.
+            text_cache: Where extracted page text is kept between runs. Defaults to TEXT_CACHE_DIR
+                if that env var is set, otherwise no cache.
+            backend: The PDF text extractor, by name or instance. Defaults to the PDF_BACKEND
+                env var (or pypdf).
+            stream_pages: Read every book page by page in this process instead of handing page
+                ranges to the pool, so memory stays flat however big the book is (at the cost of
+                parallel parsing). Always the case with one worker. Defaults to the
+                DOCUMENT_LOADER_STREAM_PAGES env var (or False).
+        """
         self.directory = directory
+        if max_workers is None:
+            max_workers = int(os.getenv("DOCUMENT_LOADER_WORKERS", "1"))
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = pages_per_task
+        self.backend = backend if isinstance(backend, PdfBackend) else get_backend(backend)
+        if stream_pages is None:
+            stream_pages = os.getenv("DOCUMENT_LOADER_STREAM_PAGES", "false").lower() == "true"
+        self.stream_pages = stream_pages
+        if text_cache is None and os.getenv("TEXT_CACHE_DIR"):
+            text_cache = PageTextCache(os.getenv("TEXT_CACHE_DIR"), extractor=self.backend.name)
+        self.text_cache = text_cache
+        self._text_splitter = None
+        # Books with pages that couldn't be read, by any iter_documents call on this loader
+        self.failed_files: set[str] = set()
+
+    def list_files(self) -> list[str]:
+        """Finds every PDF under the directory, in a stable order.
         
+        Args:
+            None
+        Returns:
+            A sorted list of file paths.
+        """
+        root = Path(self.directory)
+        return sorted(
+            str(path) for path in root.glob("**/*.pdf")
+            if path.is_file() and not any(part.startswith(".") for part in path.relative_to(root).parts)
+        )
+
     def load_documents(self) -> list[Document]:
         """Loads PDFs from the directory with error handling.
         
+        Uses a process pool when max_workers > 1 or a backend other than pypdf is configured,
+        otherwise a single PyPDFDirectoryLoader.
+        
         Args:
             None
         Returns:
             A list of documents.
         """
+        if self.max_workers > 1 or self.backend.name != DEFAULT_BACKEND:
+            return self.load_documents_parallel()
         try:
             loader = PyPDFDirectoryLoader(self.directory, glob="**/*.pdf")
             documents = loader.load()
@@ -35,6 +133,132 @@ class DocumentLoader:
             print(f"Error loading documents: {e}")
             return []
 
+    def load_documents_parallel(self) -> list[Document]:
+        """Loads PDFs by fanning files (and page ranges of big files) out across a process pool.
+        
+        Pages come back in the same order as the sequential loader: file by file, page by page.
+        A file that fails to parse is skipped rather than failing the whole run.
+        
+        Args:
+            None
+        Returns:
+            A list of documents.
+        """
+        documents = list(self.iter_documents())
+        print(f"Loaded {len(documents)} pages from {self.directory} using {self.max_workers} {self.backend.name} workers")
+        return documents
+
+    def iter_documents(
+        self,
+        max_in_flight: int | None = None,
+        files: list[str] | None = None,
+        file_hashes: dict[str, str] | None = None,
+    ) -> Iterator[Document]:
+        """Yields pages one parse task at a time instead of building the whole list.
+        
+        Books already in the text cache are read straight from it; everything else is parsed
+        and then added to the cache.
+        
+        Args:
+            max_in_flight: Caps how many page-range tasks can be parsed ahead of the consumer,
+                which bounds memory. None submits everything up front (biggest files first).
+            files: Only load these PDFs. Defaults to everything in the directory.
+            file_hashes: Known SHA-256s of the files, to save hashing them again for the cache.
+        Yields:
+            Documents, file by file and page by page.
+        """
+        if files is None:
+            files = self.list_files()
+        if not files:
+            print(f"No PDFs found in {self.directory}")
+            return
+
+        hashes = {}
+        if self.text_cache is not None:
+            hashes = {path: (file_hashes or {}).get(path) or file_sha256(path) for path in files}
+        cached = {path for path in files if self.text_cache is not None and self.text_cache.has(hashes[path])}
+        parsed = self._iter_parsed([path for path in files if path not in cached], max_in_flight)
+
+        for path in tqdm.tqdm(files, desc="Loading PDFs"):
+            if path in cached:
+                yield from self.text_cache.load(hashes[path], path)
+                continue
+
+            # Pages go into the cache as they're parsed, before downstream stages clean them in place
+            cache_writer = self.text_cache.writer(hashes[path]) if self.text_cache is not None else None
+            complete, last_task = True, False
+            try:
+                for _, pages, last_task in parsed:
+                    if pages is None:
+                        complete = False
+                    else:
+                        for page in pages:
+                            if cache_writer is not None:
+                                cache_writer.add(page)
+                            yield page
+                    if last_task:
+                        break
+            finally:
+                if not complete:
+                    self.failed_files.add(path)
+                # Only a book that was read to the end without errors is worth caching
+                if cache_writer is not None and complete and last_task:
+                    cache_writer.commit()
+                elif cache_writer is not None:
+                    cache_writer.discard()
+
+    def _iter_parsed(self, files: list[str], max_in_flight: int | None) -> Iterator[tuple[str, list[Document] | None, bool]]:
+        """Parses files, yielding (path, pages or None on error, is last task of the file) in file order."""
+        if not files:
+            return
+
+        if self.max_workers == 1 or self.stream_pages:
+            for path in files:
+                try:
+                    for page in self.backend.iter_pages(path):
+                        yield path, [page], False
+                except Exception as e:
+                    print(f"Error loading {path}: {e}")
+                    yield path, None, True
+                else:
+                    yield path, [], True
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            page_counts = list(executor.map(_pdf_page_count, files, [self.backend.name] * len(files)))
+
+            tasks = []
+            for path, page_count in zip(files, page_counts):
+                if page_count is None:
+                    tasks.append((path, -1, -1))  # Unreadable, reported as a failed task
+                    continue
+                # Every file gets at least one task, so empty PDFs still show up
+                for start in range(0, max(page_count, 1), self.pages_per_task):
+                    tasks.append((path, start, min(start + self.pages_per_task, page_count)))
+
+            futures = {}
+            if max_in_flight is None:
+                # Submit the biggest files first so they don't hold up the tail of the run
+                sizes = {path: os.path.getsize(path) for path in files}
+                for task in sorted(tasks, key=lambda t: sizes[t[0]], reverse=True):
+                    futures[task] = executor.submit(_load_page_range, *task, self.backend.name)
+                max_in_flight = len(tasks)
+
+            next_task = 0
+            for i, task in enumerate(tasks):
+                # Keep a sliding window of tasks running ahead of the one we're waiting on
+                while next_task < len(tasks) and next_task < i + max_in_flight:
+                    ahead = tasks[next_task]
+                    if ahead not in futures:
+                        futures[ahead] = executor.submit(_load_page_range, *ahead, self.backend.name)
+                    next_task += 1
+                last_task = i + 1 == len(tasks) or tasks[i + 1][0] != task[0]
+                try:
+                    yield task[0], futures.pop(task).result(), last_task
+                except Exception as e:
+                    print(f"Error loading pages {task[1]}-{task[2]} of {task[0]}: {e}")
+                    yield task[0], None, last_task
+
     def clean_text(self, text: str) -> str:
         """Cleans common PDF artifacts such as multiple newlines and excessive whitespace.
         
@@ -43,20 +267,7 @@ class DocumentLoader:
         Returns:
             The cleaned text.
         """
-        # Fix surrogate pairs (UnicodeEncodeError)
-        text = text.encode('utf-8', 'ignore').decode('utf-8')
-        
-        # Remove NUL bytes which also cause issues
-        text = text.replace('\x00', '')
-
-        # Normalize newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # Normalize whitespace but preserve newlines
-        # Replace multiple spaces/tabs with a single space
-        text = re.sub(r'[ \t]+', ' ', text)
-        
-        return text.strip()
+        return clean_text(text)
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
         """Splits documents into overlapping chunks.
@@ -66,13 +277,30 @@ class DocumentLoader:
         Returns:
             The split documents.
         """
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, 
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len,
-        )
-        return text_splitter.split_documents(documents)
+        return self.text_splitter.split_documents(documents)
+
+    @property
+    def text_splitter(self) -> OffsetTextSplitter:
+        # Produces exactly the chunks RecursiveCharacterTextSplitter gives with these settings
+        if self._text_splitter is None:
+            self._text_splitter = OffsetTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                separators=["\n\n", "\n", ". ", " ", ""],
+            )
+        return self._text_splitter
+
+    def clean_document(self, document: Document) -> Document:
+        """Cleans a single page in place and tags it with its file name.
+        
+        Args:
+            document: The page to clean.
+        Returns:
+            The same document, cleaned.
+        """
+        document.page_content = self.clean_text(document.page_content)
+        document.metadata["source_file"] = Path(document.metadata.get("source", "")).name
+        return document
 
     def preprocess_documents(self) -> list[Document]:
         """Loads, cleans, and splits documents.
@@ -85,8 +313,7 @@ class DocumentLoader:
         documents = self.load_documents()
         
         for doc in tqdm.tqdm(documents, desc="Cleaning documents"):
-            doc.page_content = self.clean_text(doc.page_content)
-            doc.metadata["source_file"] = Path(doc.metadata.get("source", "")).name
+            self.clean_document(doc)
 
         split_documents = self.split_documents(documents)
         return split_documents
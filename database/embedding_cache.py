@@ -0,0 +1,130 @@
+import sys
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+from array import array
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with a persistent, content-addressed cache on disk.
+
+    Vectors are stored in SQLite keyed by (model, dimensions, SHA-256 of the text), so
+    re-chunking, re-indexing after a crash or building a second collection reuses anything
+    that's been embedded before instead of paying for it again. Queries aren't cached here;
+    they go straight to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache_path: str, model: str | None = None, dimensions: int | None = None):
+        """
+        Args:
+            embeddings: The model to call on a cache miss.
+            cache_path: Where the SQLite file lives.
+            model: Name of the model, part of the cache key. Defaults to `embeddings.model`.
+            dimensions: Output size, part of the cache key. Defaults to `embeddings.dimensions`.
+        """
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions = dimensions if dimensions is not None else (getattr(embeddings, "dimensions", None) or 0)
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_sha TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, dimensions, text_sha)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts, only calling the wrapped model for ones that aren't cached.
+
+        Args:
+            texts: The texts to embed.
+        Returns:
+            One vector per text, in order.
+        """
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self._store(found, zip(missing, vectors))
+        return [found[key] for key in keys]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Async version of embed_documents."""
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            self._store(found, zip(missing, vectors))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.embeddings.aembed_query(text)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def _lookup(self, texts: list[str]) -> tuple[list[str], dict[str, list[float]], dict[str, str]]:
+        keys = [text_sha256(text) for text in texts]
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique_keys), _LOOKUP_BATCH):
+                batch = unique_keys[i:i + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_sha, vector FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND text_sha IN ({','.join('?' * len(batch))})",
+                    (self.model, self.dimensions, *batch),
+                )
+                for text_sha, blob in rows:
+                    found[text_sha] = array("f", blob).tolist()
+
+        # Identical texts in one call only get embedded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        missed = sum(1 for key in keys if key in missing)
+        with self._lock:
+            self.hits += len(texts) - missed
+            self.misses += missed
+        return keys, found, missing
+
+    def _store(self, found: dict[str, list[float]], vectors) -> None:
+        rows = []
+        for key, vector in vectors:
+            packed = array("f", vector)
+            # Hand back the float32 copy so a hit and a miss give identical vectors
+            found[key] = packed.tolist()
+            rows.append((self.model, self.dimensions, key, packed.tobytes()))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
@@ -0,0 +1,294 @@
+import sys
+from pathlib import Path
+import asyncio
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+_DONE = object()
+
+
+def estimate_tokens(texts: list[str]) -> int:
+    """Rough token count for budgeting (about four characters per token for English)."""
+    return sum(len(text) for text in texts) // 4 + len(texts)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for a 429 from the embeddings API (or anything that looks like one)."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class SchedulerStats:
+    """What the scheduler did during one run."""
+    requests: int = 0
+    chunks: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    tokens: int = 0
+    peak_concurrency: int = 0
+    final_concurrency: int = 0
+    embed_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} embedding requests ({self.rate_limited} rate limited, {self.retries} retries), "
+            f"~{self.tokens} tokens, concurrency peaked at {self.peak_concurrency}"
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps the number of requests in flight and moves the cap with feedback (AIMD).
+
+    Every successful request nudges the limit up by 1/limit, so it grows by about one per
+    round trip. A 429 halves it. A response much slower than the fastest one seen so far
+    means the endpoint is queueing us, so the limit drops by one.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_factor: float = 3.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.peak = 0
+        self._best_latency: float | None = None
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        if latency > self._best_latency * self.latency_factor:
+            self.limit = max(self.minimum, self.limit - 1)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_rate_limited(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class TokenBudget:
+    """Token bucket that refills at tokens_per_minute, so we stay under the API's TPM limit."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self, tokens: int) -> None:
+        # A request bigger than the whole bucket waits for a full bucket instead of forever
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds batches of chunks with several requests in flight and hands the results to a
+    separate writer thread, so Chroma writes overlap with the next round of embedding.
+
+    Each batch is split into requests of `request_size` texts. Requests go out under an
+    adaptive concurrency limit and a tokens-per-minute budget, and 429s are retried with
+    backoff (honouring Retry-After when the API sends it).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        initial_concurrency: int | None = None,
+        tokens_per_minute: int = 1_000_000,
+        request_size: int = 500,
+        max_retries: int = 8,
+        backoff_seconds: float = 1.0,
+        max_batches_in_flight: int = 3,
+        max_pending_writes: int = 2,
+    ):
+        """
+        Args:
+            embeddings: The model to call (its aembed_documents is used).
+            max_concurrency: Upper bound on requests in flight.
+            min_concurrency: The limit never drops below this, even after a string of 429s.
+            initial_concurrency: Where the limit starts. Defaults to half of max_concurrency.
+            tokens_per_minute: The API's TPM budget.
+            request_size: Texts per embedding request.
+            max_retries: How many times a rate-limited request is retried before giving up.
+            backoff_seconds: Base delay for exponential backoff after a 429.
+            max_batches_in_flight: How many batches can be embedding at once.
+            max_pending_writes: How many embedded batches can queue up in front of the writer.
+        """
+        self.embeddings = embeddings
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.initial_concurrency = initial_concurrency or max(min_concurrency, max_concurrency // 2)
+        self.tokens_per_minute = tokens_per_minute
+        self.request_size = request_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_batches_in_flight = max_batches_in_flight
+        self.max_pending_writes = max_pending_writes
+        self.stats = SchedulerStats()
+        self.telemetry = None  # IngestionTelemetry, set by the pipeline to time the "embed" stage
+        self._errors: list[BaseException] = []
+        self._failed = threading.Event()
+
+    def run(self, batches: Iterable[list[Document]], write: Callable[[list[Document], list[list[float]]], None]) -> SchedulerStats:
+        """Embeds every batch and writes it.
+
+        Args:
+            batches: Batches of chunks. Pulled lazily, so this can be a blocking queue.
+            write: Called on the writer thread with each batch and its vectors.
+        Returns:
+            The stats for the run.
+        Raises:
+            The first error from an embedding request or the writer.
+        """
+        started = time.perf_counter()
+        writes = queue.Queue(maxsize=self.max_pending_writes)
+        writer = threading.Thread(target=self._write_loop, args=(writes, write), name="embed-writer", daemon=True)
+        writer.start()
+        try:
+            asyncio.run(self._embed_all(iter(batches), writes))
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(writes, _DONE, force=True)
+            writer.join()
+            self.stats.embed_seconds = time.perf_counter() - started
+
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    async def _embed_all(self, batches, writes: queue.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        self._limiter = AdaptiveConcurrencyLimiter(self.initial_concurrency, self.min_concurrency, self.max_concurrency)
+        self._budget = TokenBudget(self.tokens_per_minute)
+        batch_slots = asyncio.Semaphore(self.max_batches_in_flight)
+        tasks = []
+
+        while not self._failed.is_set():
+            await batch_slots.acquire()
+            batch = await loop.run_in_executor(None, next, batches, None)
+            if batch is None:
+                break
+            tasks.append(asyncio.create_task(self._embed_batch(batch, writes, batch_slots)))
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.stats.peak_concurrency = self._limiter.peak
+        self.stats.final_concurrency = int(self._limiter.limit)
+
+    async def _embed_batch(self, batch: list[Document], writes: queue.Queue, batch_slots: asyncio.Semaphore) -> None:
+        try:
+            started = time.perf_counter()
+            texts = [chunk.page_content for chunk in batch]
+            requests = [texts[i:i + self.request_size] for i in range(0, len(texts), self.request_size)]
+            results = await asyncio.gather(*(self._embed_request(request) for request in requests))
+            vectors = [vector for result in results for vector in result]
+            self.stats.chunks += len(batch)
+            if self.telemetry is not None:
+                self.telemetry.add("embed", time.perf_counter() - started, len(batch), sum(map(len, texts)))
+            await asyncio.get_running_loop().run_in_executor(None, self._put, writes, (batch, vectors))
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            batch_slots.release()
+
+    async def _embed_request(self, texts: list[str]) -> list[list[float]]:
+        tokens = estimate_tokens(texts)
+        for attempt in range(self.max_retries + 1):
+            if self._failed.is_set():
+                raise _Cancelled()
+            await self._budget.take(tokens)
+            await self._limiter.acquire()
+            started = time.perf_counter()
+            try:
+                vectors = await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                self._limiter.on_rate_limited()
+                self.stats.rate_limited += 1
+                self.stats.retries += 1
+                delay = _retry_after(e) or self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+            else:
+                self._limiter.on_success(time.perf_counter() - started)
+                self.stats.requests += 1
+                self.stats.tokens += tokens
+                return vectors
+            finally:
+                await self._limiter.release()
+            await asyncio.sleep(delay)
+
+    def _write_loop(self, writes: queue.Queue, write: Callable) -> None:
+        while True:
+            item = writes.get()
+            if item is _DONE:
+                return
+            if self._failed.is_set():
+                continue  # Drain without writing so producers don't block
+            try:
+                write(*item)
+            except BaseException as e:
+                self._fail(e)
+
+    def _put(self, writes: queue.Queue, item, force: bool = False) -> None:
+        while True:
+            if self._failed.is_set() and not force:
+                return
+            try:
+                writes.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        if not isinstance(error, _Cancelled):
+            self._errors.append(error)
+        self._failed.set()
+
+
+class _Cancelled(Exception):
+    """Raised inside a request when another one has already failed."""
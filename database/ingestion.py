@@ -0,0 +1,344 @@
+import sys
+from pathlib import Path
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Iterable, Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from database.chunk_filters import BoilerplateFilter, NearDuplicateFilter
+from database.document_loader import DocumentLoader
+from database.embedding_scheduler import EmbeddingScheduler
+from database.telemetry import IngestionTelemetry
+
+# Marks the end of a stream on a queue
+_DONE = object()
+
+
+@dataclass
+class IngestionStats:
+    """Running totals for one ingestion run."""
+    pages: int = 0
+    files_parsed: int = 0
+    chunks: int = 0
+    chunks_skipped: int = 0
+    batches: int = 0
+    chunks_written: int = 0
+    elapsed_seconds: float = 0.0
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    boilerplate_lines_dropped: int = 0
+    boilerplate_bytes_dropped: int = 0
+    duplicate_chunks_dropped: int = 0
+    duplicate_bytes_dropped: int = 0
+    files_failed: int = 0
+
+    @classmethod
+    def total(cls, runs: Iterable["IngestionStats"]) -> "IngestionStats":
+        """Adds up the stats of several runs, e.g. one per shard."""
+        total = cls()
+        for run in runs:
+            for f in fields(cls):
+                setattr(total, f.name, getattr(total, f.name) + getattr(run, f.name))
+        return total
+
+    def summary(self) -> str:
+        return (
+            f"{self.pages} pages -> {self.chunks} chunks ({self.chunks_skipped} already stored) "
+            f"in {self.batches} batches "
+            f"({self.elapsed_seconds:.1f}s), embedding cache: {self.embedding_cache_hits} hits / "
+            f"{self.embedding_cache_misses} misses, dropped {self.duplicate_chunks_dropped} near-duplicate "
+            f"chunks ({self.duplicate_bytes_dropped} bytes) and {self.boilerplate_lines_dropped} "
+            f"header/footer lines ({self.boilerplate_bytes_dropped} bytes)"
+            + (f", {self.files_failed} books had unreadable pages" if self.files_failed else "")
+        )
+
+
+class IngestionPipeline:
+    """
+    Streams documents through load → clean and split → batch → write.
+
+    Each stage runs in its own thread and hands work to the next one over a bounded queue,
+    so the writer can be embedding batch N while batch N+1 is still being parsed. Peak memory
+    depends on the batch size and queue sizes, not on how big the library is.
+    """
+
+    def __init__(
+        self,
+        loader: DocumentLoader,
+        write_batch: Callable[[list[Document]], None],
+        batch_size: int = 5000,
+        page_queue_size: int = 256,
+        max_pending_batches: int = 2,
+        files: list[str] | None = None,
+        file_hashes: dict[str, str] | None = None,
+        embed_scheduler: EmbeddingScheduler | None = None,
+        skip_chunk: Callable[[Document], bool] | None = None,
+        on_file_split: Callable[[str, int], None] | None = None,
+        boilerplate_filter: BoilerplateFilter | None = None,
+        duplicate_filter: NearDuplicateFilter | None = None,
+        telemetry: IngestionTelemetry | None = None,
+    ):
+        """
+        Args:
+            loader: Where the pages come from.
+            write_batch: Called with each batch of chunks (embeds and stores them). With an
+                embed_scheduler it's called with the batch and its vectors instead.
+            batch_size: Number of chunks per write.
+            page_queue_size: How many parsed pages can wait for the chunking stage.
+            max_pending_batches: How many full batches can queue up in front of the writer.
+            files: Only ingest these PDFs. Defaults to everything the loader can find.
+            file_hashes: SHA-256s already computed for the files, reused by the loader's text cache.
+            embed_scheduler: Embeds batches concurrently before they reach write_batch.
+            skip_chunk: Return True for chunks that are already stored (e.g. when resuming).
+            on_file_split: Called with (source, chunk count) once a book has been fully split.
+            boilerplate_filter: Strips running headers and footers from pages before splitting.
+            duplicate_filter: Drops chunks that are near-copies of earlier ones from the same book.
+            telemetry: Collects per-stage timings. One without a metrics sink is made if not given.
+        """
+        self.loader = loader
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.page_queue_size = page_queue_size
+        self.max_pending_batches = max_pending_batches
+        self.files = files
+        self.file_hashes = file_hashes
+        self.embed_scheduler = embed_scheduler
+        self.skip_chunk = skip_chunk
+        self.on_file_split = on_file_split
+        self.boilerplate_filter = boilerplate_filter
+        self.duplicate_filter = duplicate_filter
+        self.stats = IngestionStats()
+        self.telemetry = telemetry or IngestionTelemetry()
+        self._file_sizes: dict[str, int] = {}
+        self._bytes_parsed = 0
+        self._started: float | None = None
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []
+
+    def run(self) -> IngestionStats:
+        """Runs the pipeline to completion.
+
+        Args:
+            None
+        Returns:
+            The stats for the run.
+        Raises:
+            Whatever exception stopped a stage, after all stages have shut down.
+        """
+        if self.files is None:
+            self.files = self.loader.list_files()
+        self._file_sizes = {path: os.path.getsize(path) for path in self.files}
+        started = self._started = time.perf_counter()
+        pages = queue.Queue(maxsize=self.page_queue_size)
+        batches = queue.Queue(maxsize=self.max_pending_batches)
+        self.telemetry.watch_queue("pages", pages)
+        self.telemetry.watch_queue("batches", batches)
+        self.telemetry.start()
+        if self.embed_scheduler is not None:
+            self.embed_scheduler.telemetry = self.telemetry
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._load, None, pages), name="ingest-load", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._chunk, pages, batches), name="ingest-chunk", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            if self.embed_scheduler is not None:
+                self.embed_scheduler.run(self._drain(batches), write=self._write_embedded)
+            else:
+                for batch in self._drain(batches):
+                    # Chroma embeds the batch as part of the write here
+                    with self.telemetry.stage("write", items=len(batch)):
+                        self.write_batch(batch)
+                    self.stats.batches += 1
+                    self.stats.chunks_written += len(batch)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for thread in threads:
+                thread.join()
+            self.telemetry.stop()
+            self.stats.elapsed_seconds = time.perf_counter() - started
+
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    def _write_embedded(self, batch: list[Document], vectors: list[list[float]]) -> None:
+        with self.telemetry.stage("write", items=len(batch)):
+            self.write_batch(batch, vectors)
+        self.stats.batches += 1
+        self.stats.chunks_written += len(batch)
+
+    def progress(self) -> dict:
+        """A snapshot of how far the run has got, safe to call from another thread.
+
+        Returns:
+            Counts per stage, throughput and an ETA (None until the first book is parsed).
+        """
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        total_bytes = sum(self._file_sizes.values())
+        done = self._bytes_parsed / total_bytes if total_bytes else 0.0
+        if self.embed_scheduler is not None:
+            chunks_embedded = self.embed_scheduler.stats.chunks
+        else:
+            chunks_embedded = self.stats.chunks_written  # Embedded and written in one call
+        return {
+            "files_total": len(self._file_sizes),
+            "files_parsed": self.stats.files_parsed,
+            "pages_parsed": self.stats.pages,
+            "chunks_split": self.stats.chunks,
+            "chunks_skipped": self.stats.chunks_skipped,
+            "chunks_embedded": chunks_embedded,
+            "chunks_written": self.stats.chunks_written,
+            "elapsed_seconds": elapsed,
+            "chunks_per_second": self.stats.chunks_written / elapsed if elapsed else 0.0,
+            # By bytes rather than files, so one huge textbook doesn't throw the estimate off
+            "eta_seconds": elapsed * (1 - done) / done if done else None,
+        }
+
+    def report(self) -> dict:
+        """The run's stats and telemetry, for the JSON report written at the end of a run."""
+        return {"stats": asdict(self.stats), **self.telemetry.snapshot()}
+
+    def _load(self, _: Iterable) -> Iterator[Document]:
+        # Only parse a couple of tasks per worker ahead of the cleaner
+        source = None
+        documents = self.loader.iter_documents(
+            max_in_flight=self.loader.max_workers * 2, files=self.files, file_hashes=self.file_hashes
+        )
+        for document in self.telemetry.timed("parse", documents, size=lambda document: len(document.page_content)):
+            if document.metadata.get("source") != source:
+                self._file_parsed(source)
+                source = document.metadata.get("source")
+            self.stats.pages += 1
+            yield document
+        self._file_parsed(source)
+        # Books with no pages at all never show up above
+        self.stats.files_parsed = len(self._file_sizes)
+        self.stats.files_failed = len(self.loader.failed_files & set(self._file_sizes))
+        self._bytes_parsed = sum(self._file_sizes.values())
+
+    def _file_parsed(self, source: str | None) -> None:
+        if source is not None:
+            self.stats.files_parsed += 1
+            self._bytes_parsed += self._file_sizes.get(source, 0)
+
+    def _chunk(self, pages: Iterable[Document]) -> Iterator[list[Document]]:
+        # Cleaning, filtering and splitting share a stage: as separate threads they only added queue hops
+        pages = self._clean(pages)
+        if self.boilerplate_filter is not None:
+            pages = self.telemetry.timed("boilerplate", self.boilerplate_filter.filter(pages))
+
+        batch = []
+        source, source_chunks = None, 0
+        for page in pages:
+            # Pages arrive book by book, so a new source means the previous book is fully split
+            if page.metadata.get("source") != source:
+                self._file_split(source, source_chunks)
+                source, source_chunks = page.metadata.get("source"), 0
+                if self.duplicate_filter is not None:
+                    # Only within a book, see NearDuplicateFilter
+                    self.duplicate_filter.reset()
+            with self.telemetry.stage("split", size=len(page.page_content)) as section:
+                chunks = self.loader.split_documents([page])
+                section.items = len(chunks)
+            for chunk in chunks:
+                # Checked before skip_chunk: a resumed run re-splits unfinished books from
+                # their first page, so it makes the same decisions for them as the first run
+                if self.duplicate_filter is not None:
+                    with self.telemetry.stage("dedupe", size=len(chunk.page_content)):
+                        duplicate = self.duplicate_filter.is_duplicate(chunk)
+                    if duplicate:
+                        continue
+                self.stats.chunks += 1
+                source_chunks += 1
+                if self.skip_chunk and self.skip_chunk(chunk):
+                    self.stats.chunks_skipped += 1
+                    continue
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        self._file_split(source, source_chunks)
+        self._record_filter_stats()
+        if batch:
+            yield batch
+
+    def _clean(self, pages: Iterable[Document]) -> Iterator[Document]:
+        for page in pages:
+            with self.telemetry.stage("clean", size=len(page.page_content)):
+                page = self.loader.clean_document(page)
+            yield page
+
+    def _record_filter_stats(self) -> None:
+        if self.boilerplate_filter is not None:
+            self.stats.boilerplate_lines_dropped = self.boilerplate_filter.lines_dropped
+            self.stats.boilerplate_bytes_dropped = self.boilerplate_filter.bytes_dropped
+        if self.duplicate_filter is not None:
+            self.stats.duplicate_chunks_dropped = self.duplicate_filter.chunks_dropped
+            self.stats.duplicate_bytes_dropped = self.duplicate_filter.bytes_dropped
+
+    def _file_split(self, source: str | None, chunk_count: int) -> None:
+        if source is not None and self.on_file_split:
+            self.on_file_split(source, chunk_count)
+
+    def _run_stage(self, stage: Callable[[Iterable], Iterator], inbox: queue.Queue | None, outbox: queue.Queue) -> None:
+        try:
+            for item in stage(self._drain(inbox) if inbox is not None else ()):
+                self._put(outbox, item)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(outbox, _DONE, force=True)
+
+    def _drain(self, inbox: queue.Queue) -> Iterator:
+        while True:
+            with self.telemetry.waiting(inbox, "consumer"):
+                item = self._get(inbox)
+            if item is _DONE:
+                return
+            yield item
+
+    def _get(self, inbox: queue.Queue):
+        while True:
+            try:
+                return inbox.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _put(self, outbox: queue.Queue, item, force: bool = False) -> None:
+        with self.telemetry.waiting(outbox, "producer"):
+            self._put_blocking(outbox, item, force)
+
+    def _put_blocking(self, outbox: queue.Queue, item, force: bool) -> None:
+        while True:
+            if self._stop.is_set() and not force:
+                raise _Cancelled()
+            try:
+                outbox.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    return
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        if not isinstance(error, _Cancelled):
+            self._errors.append(error)
+        self._stop.set()
+
+
+class _Cancelled(Exception):
+    """Raised inside a stage when another stage has already failed."""
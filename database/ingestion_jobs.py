@@ -0,0 +1,158 @@
+import sys
+from pathlib import Path
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Callable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.ingestion import IngestionPipeline, IngestionStats
+from database.sharding import ShardedVectorStore, open_vector_store
+from database.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class JobAlreadyRunning(RuntimeError):
+    """Raised when an ingestion job is started while another one is still going."""
+
+    def __init__(self, job: "IngestionJob"):
+        super().__init__(f"Ingestion job {job.id} is still {job.status}")
+        self.job = job
+
+
+def default_vector_store() -> VectorStore | ShardedVectorStore:
+    """The vector store configured by the VECTOR_STORE_* env vars (sharded or not), ready to ingest into."""
+    return open_vector_store(backend="chroma")
+
+
+class IngestionJob:
+    """One ingestion run started from the app, and everything we know about how it's going."""
+
+    def __init__(self, incremental: bool = True, resume: bool = False, dedupe: bool = False):
+        self.id = uuid.uuid4().hex
+        self.options = {"incremental": incremental, "resume": resume, "dedupe": dedupe}
+        self.status = "queued"  # queued → running → completed / failed
+        self.phase = "queued"  # What a running job is doing right now
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.error: str | None = None
+        self.stats: IngestionStats | None = None
+        self.pipeline: IngestionPipeline | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        """Everything the status endpoint reports, as plain JSON-friendly values."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "phase": self.phase,
+            "options": self.options,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "progress": self.pipeline.progress() if self.pipeline else None,
+            "result": asdict(self.stats) if self.stats else None,
+        }
+
+
+class IngestionJobRunner:
+    """
+    Runs ingestion jobs on a background thread, one at a time.
+
+    Request threads only ever start a job or read its state, so a long ingest never ties one
+    up. Finished jobs are kept (up to max_history) so their results can still be looked up.
+    """
+
+    def __init__(self, vector_store_factory: Callable[[], VectorStore | ShardedVectorStore] = default_vector_store, max_history: int = 20):
+        """
+        Args:
+            vector_store_factory: Builds the (initialised) vector store each job ingests into.
+            max_history: How many jobs to remember, oldest finished ones are forgotten first.
+        """
+        self.vector_store_factory = vector_store_factory
+        self.max_history = max_history
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, incremental: bool = True, resume: bool = False, dedupe: bool = False) -> IngestionJob:
+        """Starts a job in the background.
+
+        Args:
+            incremental: Only ingest new or changed books.
+            resume: Continue an interrupted run from its checkpoint.
+            dedupe: Remove duplicate chunks left by older runs first.
+        Returns:
+            The new job.
+        Raises:
+            JobAlreadyRunning: If a job is already queued or running.
+        """
+        with self._lock:
+            active = self._active()
+            if active is not None:
+                raise JobAlreadyRunning(active)
+            job = IngestionJob(incremental=incremental, resume=resume, dedupe=dedupe)
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        threading.Thread(target=self._run, args=(job,), name=f"ingest-job-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[IngestionJob]:
+        """All remembered jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _active(self) -> IngestionJob | None:
+        return next((job for job in self._jobs.values() if not job.finished), None)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_history and finished:
+            del self._jobs[finished.pop(0)]
+
+    def _run(self, job: IngestionJob) -> None:
+        job.status, job.started_at = "running", time.time()
+        try:
+            job.phase = "initialising"
+            vector_store = self.vector_store_factory()
+            if job.options["dedupe"] and isinstance(vector_store, ShardedVectorStore):
+                logger.info("Deduplication only applies to the unsharded collection, skipping it.")
+            elif job.options["dedupe"]:
+                job.phase = "deduplicating"
+                vector_store.deduplicate()
+            # Diffing the manifest and deleting stale chunks happen before the pipeline exists
+            job.phase = "preparing"
+            stats = vector_store.upsert_documents(
+                incremental=job.options["incremental"],
+                resume=job.options["resume"],
+                on_pipeline=lambda pipeline: self._attach(job, pipeline),
+            )
+            # A sharded store reports each shard separately
+            job.stats = IngestionStats.total(stats.values()) if isinstance(stats, dict) else stats
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {e}", exc_info=True)
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.phase = job.status
+            job.finished_at = time.time()
+
+    @staticmethod
+    def _attach(job: IngestionJob, pipeline: IngestionPipeline) -> None:
+        job.pipeline = pipeline
+        job.phase = "ingesting"
@@ -0,0 +1,177 @@
+import sys
+from pathlib import Path
+import json
+import re
+import sqlite3
+import threading
+from typing import Iterable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+
+KEYWORD_INDEX_FILENAME = "keyword_index.sqlite"
+
+# SQLite caps the number of bound parameters per statement
+_DELETE_BATCH = 500
+_TERM = re.compile(r"\w+")
+# Words too common to tell chunks apart. Matching them only makes BM25 score half the index
+_STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been before being
+    below between both but by can could did do does doing down during each few for from further
+    had has have having he her here hers herself him himself his how i if in into is it its itself
+    just me more most my myself no nor not now of off on once only or other our ours ourselves out
+    over own same she should so some such than that the their theirs them themselves then there
+    these they this those through to too under until up very was we were what when where which
+    while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+class KeywordIndex:
+    """
+    A BM25 keyword index over the same chunks as the vector store, in SQLite FTS5.
+
+    Chunks live in a plain table keyed by chunk ID (so upserts and deletes are cheap and
+    match Chroma's), with an external-content FTS5 table over their text kept in step by
+    triggers. Underscores count as part of a word, so identifiers like `__slots__` or
+    `EXIT_FAILURE` are indexed whole; everything else is split the usual unicode61 way.
+    """
+
+    def __init__(self, path: str, max_df: float = 0.2):
+        """
+        Args:
+            path: Where the SQLite file lives, normally next to the Chroma files.
+            max_df: Words found in more than this fraction of chunks are left out of searches,
+                unless every word of the query is that common.
+        """
+        self.path = path
+        self.max_df = max_df
+        self._lock = threading.Lock()
+        self._total: tuple[int, int] | None = None  # (PRAGMA data_version, chunk count)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='id', tokenize="unicode61 tokenchars '_'"
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks_fts, 'row');
+            CREATE TRIGGER IF NOT EXISTS chunks_insert AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_delete AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_update AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        """)
+        self._conn.commit()
+
+    def upsert(self, ids: list[str], chunks: list[Document]) -> None:
+        """Adds chunks, replacing any already stored under the same IDs."""
+        rows = [(chunk_id, chunk.page_content, json.dumps(chunk.metadata)) for chunk_id, chunk in zip(ids, chunks)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, content, metadata) VALUES (?, ?, ?) "
+                "ON CONFLICT (chunk_id) DO UPDATE SET content = excluded.content, metadata = excluded.metadata "
+                "WHERE content != excluded.content OR metadata != excluded.metadata",
+                rows,
+            )
+            self._conn.commit()
+            self._total = None
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            for i in range(0, len(ids), _DELETE_BATCH):
+                batch = ids[i:i + _DELETE_BATCH]
+                self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+            self._conn.commit()
+            self._total = None
+
+    def search(self, query: str, k: int = 20) -> list[tuple[str, Document, float]]:
+        """Finds the chunks that best match the words in a query.
+
+        Any of the query's words can match; BM25 ranks chunks with more (and rarer) ones first.
+        Stopwords and words in more than max_df of the chunks are dropped first: they barely
+        move the ranking, but every chunk containing one would have to be scored.
+
+        Args:
+            query: Free text. Punctuation and FTS5 syntax are ignored.
+            k: How many chunks to return.
+        Returns:
+            (chunk ID, chunk, BM25 score) for each hit, best first. Higher scores are better.
+        """
+        terms = self.query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            match = " OR ".join(f'"{term}"' for term in self._selective(terms))
+            rows = self._conn.execute(
+                "SELECT chunks.chunk_id, chunks.content, chunks.metadata, bm25(chunks_fts) AS rank "
+                "FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, k),
+            ).fetchall()
+        # FTS5's bm25() is negated so that ascending order is best first
+        return [
+            (chunk_id, Document(page_content=content, metadata=json.loads(metadata), id=chunk_id), -rank)
+            for chunk_id, content, metadata, rank in rows
+        ]
+
+    @staticmethod
+    def query_terms(query: str) -> list[str]:
+        """A query's words without stopwords, lower case, in order, without repeats."""
+        return [term for term in dict.fromkeys(_TERM.findall(query.lower())) if term not in _STOPWORDS]
+
+    def _selective(self, terms: list[str]) -> list[str]:
+        """The terms in at most max_df of the chunks, or the rarest one if there are none. Call with the lock held."""
+        total = self._chunk_count()
+        df = {}
+        for term in terms:
+            row = self._conn.execute("SELECT doc FROM chunks_vocab WHERE term = ?", (term,)).fetchone()
+            df[term] = row[0] if row else 0
+        return [term for term in terms if df[term] <= self.max_df * total] or [min(terms, key=df.get)]
+
+    def _chunk_count(self) -> int:
+        # COUNT(*) reads the whole table, so it's only redone after a write, by any connection
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._total is None or self._total[0] != data_version:
+            self._total = (data_version, self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0])
+        return self._total[1]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def rebuild(self, batches: Iterable[tuple[list[str], list[Document]]]) -> int:
+        """Replaces the whole index, e.g. from a collection built before the index existed.
+
+        Args:
+            batches: (IDs, chunks) pairs covering every chunk in the collection.
+        Returns:
+            How many chunks were indexed.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+            self._total = None
+        total = 0
+        for ids, chunks in batches:
+            self.upsert(ids, chunks)
+            total += len(ids)
+        return total
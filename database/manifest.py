@@ -0,0 +1,244 @@
+import sys
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+MANIFEST_FILENAME = "ingest_manifest.json"
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Hashes a file in blocks so big PDFs don't have to fit in memory.
+
+    Args:
+        path: The file to hash.
+        block_size: How many bytes to read at a time.
+    Returns:
+        The hex SHA-256 of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_stamp(db_path: str) -> tuple[int, int, int] | None:
+    """Cheap marker that changes every time the manifest is saved, without parsing it.
+
+    The manifest is replaced (not rewritten in place) on every save, so its inode, mtime and
+    size together tell us whether some ingest run, in any process, has committed books since.
+
+    Args:
+        db_path: The Chroma persist directory.
+    Returns:
+        The marker, or None if nothing has been ingested yet.
+    """
+    try:
+        st = os.stat(os.path.join(db_path, MANIFEST_FILENAME))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def make_chunk_id(file_sha256: str, page: int, start_index: int) -> str:
+    """Builds a stable chunk ID, so re-ingesting the same book overwrites instead of duplicating.
+
+    Args:
+        file_sha256: The hash of the PDF the chunk came from.
+        page: The page the chunk came from.
+        start_index: Where the chunk starts in the cleaned page text.
+    Returns:
+        The chunk ID.
+    """
+    return f"{file_sha256[:32]}-p{page}-c{start_index}"
+
+
+@dataclass
+class ManifestDiff:
+    """What changed in the documents directory since the last run."""
+    new: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    hashes: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def to_ingest(self) -> list[str]:
+        return sorted(self.new + self.changed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.new)} new, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {len(self.unchanged)} unchanged"
+        )
+
+
+class IngestionManifest:
+    """
+    Remembers what has already been ingested so re-runs only touch what changed.
+
+    Stored as JSON inside the Chroma persist directory. For every PDF it records the size,
+    mtime and SHA-256 of the file, plus the IDs of the chunks it produced, so a removed or
+    modified book can have its old chunks deleted.
+
+    A book with pages that couldn't be read is tried again on the next runs, up to
+    INGEST_MAX_FAILED_ATTEMPTS times (default 3), after which it counts as ingested.
+    """
+
+    def __init__(self, path: str, files: dict | None = None, version: int = 0):
+        self.path = path
+        self.files: dict[str, dict] = files or {}
+        self.version = version
+        self.max_failed_attempts = int(os.getenv("INGEST_MAX_FAILED_ATTEMPTS", "3"))
+        # (sha256, failed attempts) of books forgotten so they can be re-ingested
+        self._forgotten_failures: dict[str, tuple[str, int]] = {}
+        self._saved = self._serialise()
+
+    @classmethod
+    def load(cls, db_path: str) -> "IngestionManifest":
+        """Loads the manifest from the persist directory, or starts an empty one.
+
+        Args:
+            db_path: The Chroma persist directory.
+        Returns:
+            The manifest.
+        """
+        path = os.path.join(db_path, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, files=data.get("files", {}), version=data.get("version", 0))
+
+    def save(self) -> bool:
+        """Writes the manifest atomically and bumps its version, if anything in it changed.
+
+        Serving processes reload whenever the file changes, so a run that changed nothing
+        leaves it alone.
+
+        Returns:
+            True if it was written.
+        """
+        serialised = self._serialise()
+        if serialised == self._saved:
+            return False
+        self.version += 1
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+        self._saved = serialised
+        return True
+
+    def _serialise(self) -> str:
+        return json.dumps(self.files, sort_keys=True)
+
+    def diff(self, files: list[str], directory: str) -> ManifestDiff:
+        """Compares the files on disk against the manifest.
+
+        Size and mtime are checked first; a file is only hashed when those moved, so an
+        unchanged library costs a stat() per book.
+
+        Args:
+            files: The PDFs currently on disk.
+            directory: The documents directory the files live under.
+        Returns:
+            A ManifestDiff.
+        """
+        result = ManifestDiff()
+        seen = set()
+        for path in files:
+            key = self.key(path, directory)
+            seen.add(key)
+            entry = self.files.get(key)
+            stat = os.stat(path)
+            failed_attempts = entry.get("failed_attempts", 0) if entry else 0
+            if 0 < failed_attempts < self.max_failed_attempts:
+                # Some pages couldn't be read last time, so try the whole book again
+                result.hashes[path] = file_sha256(path)
+                result.changed.append(path)
+                continue
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                if failed_attempts:
+                    logger.warning("Giving up on the unreadable pages of %s after %d attempts", key, failed_attempts)
+                result.unchanged.append(path)
+                result.hashes[path] = entry["sha256"]
+                continue
+
+            sha256 = file_sha256(path)
+            result.hashes[path] = sha256
+            if entry is None:
+                result.new.append(path)
+            elif entry["sha256"] != sha256:
+                result.changed.append(path)
+            else:
+                # Touched but not modified, just refresh the stat info
+                entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+                result.unchanged.append(path)
+
+        result.removed = [key for key in self.files if key not in seen]
+        return result
+
+    def record(self, path: str, directory: str, sha256: str, chunk_ids: list[str], failed: bool = False) -> int:
+        """Stores the fingerprint and chunk IDs of an ingested file.
+
+        A file recorded as failed (some of its pages couldn't be read) keeps its chunk IDs, so
+        they can be cleaned up, but counts as changed in the next diff and is ingested again,
+        until it has failed max_failed_attempts times in a row with the same contents.
+
+        Returns:
+            How many times in a row the file has failed, 0 if it didn't.
+        """
+        stat = os.stat(path)
+        key = self.key(path, directory)
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+            "chunk_ids": chunk_ids,
+        }
+        failed_attempts = 0
+        if failed:
+            previous = self.files.get(key)
+            if previous is not None:
+                previous_failure = (previous["sha256"], previous.get("failed_attempts", 0))
+            else:
+                previous_failure = self._forgotten_failures.get(key, (None, 0))
+            failed_attempts = (previous_failure[1] if previous_failure[0] == sha256 else 0) + 1
+            entry["failed_attempts"] = failed_attempts
+        self.files[key] = entry
+        return failed_attempts
+
+    def chunk_ids(self, key: str) -> list[str]:
+        entry = self.files.get(key)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def referenced_ids(self, excluding: list[str]) -> set[str]:
+        """Chunk IDs still owned by files other than `excluding` (identical copies share IDs)."""
+        excluded = set(excluding)
+        return {
+            chunk_id
+            for key, entry in self.files.items() if key not in excluded
+            for chunk_id in entry["chunk_ids"]
+        }
+
+    def forget(self, key: str) -> None:
+        entry = self.files.pop(key, None)
+        if entry and entry.get("failed_attempts"):
+            self._forgotten_failures[key] = (entry["sha256"], entry["failed_attempts"])
+
+    @staticmethod
+    def key(path: str, directory: str) -> str:
+        """Manifest keys are paths relative to the documents directory."""
+        return Path(path).relative_to(directory).as_posix()
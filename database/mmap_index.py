@@ -0,0 +1,377 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+
+META_FILENAME = "meta.json"
+VECTORS_FILENAME = "vectors.npy"
+FULL_VECTORS_FILENAME = "full.npy"
+SCALES_FILENAME = "scales.npy"
+CENTROIDS_FILENAME = "centroids.npy"
+OFFSETS_FILENAME = "offsets.npy"
+CHUNKS_FILENAME = "chunks.sqlite"
+
+# Rows scored per matrix-vector product, to keep the float32 copy of a float16 block small
+_SCAN_BLOCK = 65536
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def index_stamp(path: str) -> tuple[int, int, int] | None:
+    """Cheap marker that changes every time an index is exported to `path`.
+
+    Exports swap in a whole new directory, so the inode of its meta file changes with each one.
+    """
+    try:
+        st = os.stat(os.path.join(path, META_FILENAME))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def read_index_meta(path: str) -> dict | None:
+    """The metadata of the index exported to `path`, or None if there isn't one."""
+    try:
+        with open(os.path.join(path, META_FILENAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class MmapVectorIndex:
+    """
+    A read-only vector index over files exported from the Chroma collection, memory-mapped.
+
+    Vectors are a unit-normalised float32 or float16 matrix in a .npy file, opened with
+    np.memmap: opening is instant and every process on the host shares one copy in the page
+    cache instead of holding its own HNSW graph. Chunk IDs, text and metadata sit in a SQLite
+    table keyed by row. Rows are grouped by k-means cluster, so an IVF search reads a few
+    contiguous slices (the clusters whose centroids are nearest the query); exact search
+    scans everything. Scores are cosine similarities.
+
+    An index can also be exported compact: int8 or float16 and/or only the first N
+    dimensions (which is what the `dimensions` parameter of text-embedding-3 models does).
+    Searches scan the compact vectors, then rescore the best few times k candidates against a
+    full float32 copy that stays on disk; only the rows being rescored are ever paged in.
+    """
+
+    def __init__(self, path: str, nprobe: int = 8, exact: bool = False, rescore: int = 4):
+        """
+        Args:
+            path: The directory export_index wrote.
+            nprobe: Clusters to scan per IVF search. More is slower but closer to exact.
+            exact: Always scan every row, ignoring the clusters.
+            rescore: For compact indexes, rescore this many times k candidates at full
+                precision. 0 ranks by the compact vectors alone.
+        """
+        self.path = path
+        self.nprobe = nprobe
+        self.exact = exact
+        self.rescore = rescore
+        self.meta = read_index_meta(path)
+        if self.meta is None:
+            raise FileNotFoundError(f"No memory-mapped index at {path}; export one with python -m database.mmap_index")
+        self.vectors = np.load(os.path.join(path, VECTORS_FILENAME), mmap_mode="r")
+        self.full_vectors = None
+        if os.path.exists(os.path.join(path, FULL_VECTORS_FILENAME)):
+            self.full_vectors = np.load(os.path.join(path, FULL_VECTORS_FILENAME), mmap_mode="r")
+        self.scales = None
+        if os.path.exists(os.path.join(path, SCALES_FILENAME)):
+            self.scales = np.load(os.path.join(path, SCALES_FILENAME))
+        self.centroids = np.load(os.path.join(path, CENTROIDS_FILENAME))
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILENAME))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{os.path.join(path, CHUNKS_FILENAME)}?mode=ro", uri=True, check_same_thread=False)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, embedding, k: int = 6, exact: bool = False, nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Finds the rows most similar to a query.
+
+        Args:
+            embedding: The query embedding.
+            k: How many rows to return.
+            exact: Scan every row this time, instead of only the nearest clusters.
+            nprobe: Clusters to scan, instead of the index's default.
+        Returns:
+            (rows, cosine similarities), best first.
+        """
+        full_query = _unit(np.asarray(embedding, dtype=np.float32))
+        query = _unit(full_query[:self.vectors.shape[1]])
+        rescoring = self.full_vectors is not None and self.rescore > 0
+        candidates = k * self.rescore if rescoring else k
+        # int8 rows are x / scale, so scaling the query instead gives the same dot products
+        scan_query = query * self.scales if self.scales is not None else query
+        if exact or self.exact or len(self.centroids) <= 1:
+            ranges = [(0, len(self.vectors))]
+        else:
+            probe = min(nprobe or self.nprobe, len(self.centroids))
+            nearest = np.argpartition(self.centroids @ query, -probe)[-probe:]
+            ranges = [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in sorted(nearest)]
+
+        rows, scores = [], []
+        for start, end in ranges:
+            for block_start in range(start, end, _SCAN_BLOCK):
+                block_end = min(block_start + _SCAN_BLOCK, end)
+                block_scores = np.asarray(self.vectors[block_start:block_end], dtype=np.float32) @ scan_query
+                if len(block_scores) > candidates:
+                    top = np.argpartition(block_scores, -candidates)[-candidates:]
+                else:
+                    top = np.arange(len(block_scores))
+                rows.append(top + block_start)
+                scores.append(block_scores[top])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        best = np.argsort(-scores, kind="stable")[:candidates]
+        rows, scores = rows[best], scores[best]
+        if rescoring:
+            rows = np.sort(rows)  # Read the full rows in file order
+            scores = np.asarray(self.full_vectors[rows], dtype=np.float32) @ full_query
+            best = np.argsort(-scores, kind="stable")[:k]
+            rows, scores = rows[best], scores[best]
+        return rows, scores
+
+    def nearest(self, embedding, n: int, include: list[str]) -> dict:
+        """search(), returned the way Chroma's collection.query returns one query's results."""
+        rows, _ = self.search(embedding, n)
+        return self._rows(rows.tolist(), include)
+
+    def get(self, ids: list[str], include: list[str]) -> dict:
+        """Looks chunks up by ID, returned the way Chroma's collection.get returns them."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), _LOOKUP_BATCH):
+                batch = ids[i:i + _LOOKUP_BATCH]
+                found.update(self._conn.execute(
+                    f"SELECT chunk_id, row FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        return self._rows([found[chunk_id] for chunk_id in ids if chunk_id in found], include)
+
+    def _rows(self, rows: list[int], include: list[str]) -> dict:
+        by_row = {}
+        with self._lock:
+            for i in range(0, len(rows), _LOOKUP_BATCH):
+                batch = rows[i:i + _LOOKUP_BATCH]
+                for row, chunk_id, content, metadata in self._conn.execute(
+                    f"SELECT row, chunk_id, content, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch
+                ):
+                    by_row[row] = (chunk_id, content, json.loads(metadata))
+        result = {"ids": [by_row[row][0] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [by_row[row][1] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [by_row[row][2] for row in rows]
+        if "embeddings" in include:
+            # Callers compare these with full-size query embeddings, so never the compact copy
+            vectors = self.full_vectors if self.full_vectors is not None else self.vectors
+            result["embeddings"] = np.asarray(vectors[rows], dtype=np.float32).reshape(len(rows), vectors.shape[1])
+        return result
+
+
+def export_index(
+    collection,
+    path: str,
+    dtype: str = "float32",
+    nlist: int | None = None,
+    dimensions: int | None = None,
+    batch_size: int = 5000,
+) -> dict:
+    """Writes a Chroma collection out as an MmapVectorIndex.
+
+    The index is built next to `path` and swapped in with a rename, so processes serving the
+    old one never see a half-written index (and keep their mapping of the old files).
+
+    Args:
+        collection: The Chroma collection (VectorStore.chroma_collection()).
+        path: The directory to write.
+        dtype: "float32", "float16" (half the size) or "int8" (a quarter, scaled per dimension).
+        nlist: IVF clusters. Defaults to about sqrt(chunks); 1 means exact search only.
+        dimensions: Keep only the first this many dimensions in the searched copy. Only
+            sensible for models trained for it, like text-embedding-3-small/large.
+        batch_size: Chunks read from Chroma at a time.
+    Returns:
+        The index's metadata.
+    """
+    started = time.perf_counter()
+    count = collection.count()
+    building = f"{path}.building-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    # First pass: every vector, in collection order, into a scratch float32 matrix
+    conn = sqlite3.connect(os.path.join(building, CHUNKS_FILENAME))
+    # Rows start out as -(collection order + 1) and are renumbered once the clusters are known
+    conn.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, content TEXT NOT NULL, metadata TEXT NOT NULL)")
+    scratch_path = os.path.join(building, "scratch.npy")
+    scratch = None
+    offset = 0
+    while offset < count:
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            break
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if scratch is None:
+            scratch = np.lib.format.open_memmap(scratch_path, mode="w+", dtype=np.float32, shape=(count, vectors.shape[1]))
+        scratch[offset:offset + len(vectors)] = _unit_rows(vectors)
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", [
+            (-(offset + i + 1), chunk_id, text or "", json.dumps(metadata or {}))
+            for i, (chunk_id, text, metadata) in enumerate(zip(page["ids"], page["documents"], page["metadatas"]))
+        ])
+        offset += len(page["ids"])
+    count = offset
+    dim = scratch.shape[1] if scratch is not None else 0
+    if scratch is None:
+        scratch = np.zeros((0, 0), dtype=np.float32)
+    compact_dim = min(dimensions or dim, dim)
+    compact = dtype != "float32" or compact_dim < dim
+
+    # Truncated vectors are renormalised, as the embedding API does for a smaller `dimensions`
+    searched = scratch[:count]
+    compact_path = os.path.join(building, "compact.npy")
+    if compact_dim < dim:
+        searched = np.lib.format.open_memmap(compact_path, mode="w+", dtype=np.float32, shape=(count, compact_dim))
+        for start in range(0, count, _SCAN_BLOCK):
+            searched[start:start + _SCAN_BLOCK] = _unit_rows(np.asarray(scratch[start:start + _SCAN_BLOCK, :compact_dim]))
+
+    # Second pass: cluster, then write the vectors grouped by cluster
+    if nlist is None:
+        nlist = max(1, int(np.sqrt(count))) if count >= 1000 else 1
+    nlist = max(1, min(nlist, count))
+    if count:
+        centroids = spherical_kmeans(searched, nlist)
+        labels = _assign(searched, centroids)
+    else:
+        centroids, labels = np.zeros((1, compact_dim), dtype=np.float32), np.empty(0, dtype=np.int64)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+
+    scales = None
+    if dtype == "int8":
+        # Symmetric per-dimension scale, so each dimension uses the whole -127..127 range
+        peak = np.zeros(compact_dim, dtype=np.float32)
+        for start in range(0, count, _SCAN_BLOCK):
+            np.maximum(peak, np.abs(searched[start:start + _SCAN_BLOCK]).max(axis=0), out=peak)
+        scales = np.where(peak > 0, peak / 127, 1.0).astype(np.float32)
+        np.save(os.path.join(building, SCALES_FILENAME), scales)
+    vectors = np.lib.format.open_memmap(os.path.join(building, VECTORS_FILENAME), mode="w+", dtype=np.dtype(dtype), shape=(count, compact_dim))
+    full = None
+    if compact:
+        full = np.lib.format.open_memmap(os.path.join(building, FULL_VECTORS_FILENAME), mode="w+", dtype=np.float32, shape=(count, dim))
+    for start in range(0, count, _SCAN_BLOCK):
+        rows = order[start:start + _SCAN_BLOCK]
+        block = np.asarray(searched[rows])
+        vectors[start:start + len(rows)] = np.round(block / scales) if scales is not None else block
+        if full is not None:
+            full[start:start + len(rows)] = scratch[rows]
+    vectors.flush()
+    if full is not None:
+        full.flush()
+    del vectors, full, searched, scratch
+    for temporary in (scratch_path, compact_path):
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    np.save(os.path.join(building, CENTROIDS_FILENAME), centroids.astype(np.float32))
+    np.save(os.path.join(building, OFFSETS_FILENAME), offsets.astype(np.int64))
+
+    # Rows in the chunk table have to line up with the reordered vectors
+    position = np.empty(count, dtype=np.int64)
+    position[order] = np.arange(count)
+    conn.executemany("UPDATE chunks SET row = ? WHERE row = ?", ((int(position[i]), -(i + 1)) for i in range(count)))
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    meta = {
+        "count": count,
+        "dim": dim,
+        "compact_dim": compact_dim,
+        "dtype": dtype,
+        "nlist": int(len(centroids)),
+        "exported_at": time.time(),
+    }
+    with open(os.path.join(building, META_FILENAME), "w") as f:
+        json.dump(meta, f)
+    retired = f"{path}.retired-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, retired)
+    os.rename(building, path)
+    shutil.rmtree(retired, ignore_errors=True)
+    print(f"Exported {count} chunks ({compact_dim}-d {dtype}, {meta['nlist']} clusters) to {path} in {time.perf_counter() - started:.1f}s")
+    return meta
+
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, sample_per_cluster: int = 256) -> np.ndarray:
+    """Spherical k-means on a sample: centroids are unit vectors, assignment is by dot product."""
+    rng = np.random.default_rng(0)
+    sample_size = min(len(vectors), nlist * sample_per_cluster)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        if empty.any():
+            # Re-seed clusters that lost all their members
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _unit_rows(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _SCAN_BLOCK):
+        labels[start:start + _SCAN_BLOCK] = np.argmax(np.asarray(vectors[start:start + _SCAN_BLOCK]) @ centroids.T, axis=1)
+    return labels
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+if __name__ == "__main__":
+    from database.vector_store import VectorStore
+
+    parser = argparse.ArgumentParser(description="Export the Chroma collection to a memory-mapped index for serving.")
+    parser.add_argument("--path", default=None, help="Where to write it (default: MMAP_INDEX_PATH or <db>/mmap_index)")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default=os.getenv("MMAP_INDEX_DTYPE", "float32"))
+    parser.add_argument("--dimensions", type=int, default=None, help="Search only the first this many dimensions, then rescore")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF clusters (default: about sqrt(chunks))")
+    args = parser.parse_args()
+
+    vector_store = VectorStore(
+        name=os.getenv("VECTOR_STORE_NAME", "rag_database"),
+        db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
+        documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
+    )
+    vector_store.initialise_vector_store(backend="chroma")
+    export_index(
+        vector_store.chroma_collection(),
+        args.path or vector_store.mmap_index_path,
+        dtype=args.dtype,
+        nlist=args.nlist,
+        dimensions=args.dimensions,
+    )
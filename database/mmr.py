@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+
+def cosine_similarity(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Cosine similarity between a query, shape (dim,), and each row of candidates."""
+    candidates = _normalise_rows(np.asarray(candidates, dtype=np.float32))
+    query = _normalise_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+    return candidates @ query
+
+
+def maximal_marginal_relevance(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int = 6,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """Picks k candidates that are relevant to the query but not to each other.
+
+    Each step takes the candidate with the best lambda_mult * sim(query) -
+    (1 - lambda_mult) * max sim(already picked). Similarities to the query are worked out
+    once, and the "most similar picked candidate" for every candidate is kept as a running
+    max, updated with one matrix-vector product per pick, so a step is O(fetch_k * dim)
+    rather than a Python loop over candidate pairs.
+
+    Args:
+        query: The query embedding, shape (dim,).
+        candidates: Candidate embeddings, shape (fetch_k, dim).
+        k: How many to pick.
+        lambda_mult: 1 for pure relevance, 0 for pure diversity.
+    Returns:
+        Indices into candidates, in the order they were picked.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    if candidates.ndim != 2 or not len(candidates) or k <= 0:
+        return []
+    candidates = _normalise_rows(candidates)
+    query = _normalise_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+
+    relevance = candidates @ query
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    picked = [int(np.argmax(relevance))]
+    available[picked[0]] = False
+    while len(picked) < min(k, len(candidates)):
+        np.maximum(redundancy, candidates @ candidates[picked[-1]], out=redundancy)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+    return picked
+
+
+def _normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,196 @@
+import sys
+from pathlib import Path
+import logging
+import mmap
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+
+DEFAULT_BACKEND = "pypdf"
+
+
+class PdfBackend(ABC):
+    """
+    A way of pulling text out of PDFs.
+
+    Every backend returns the same shape: one document per page, stripped text, with
+    `source`, `total_pages`, `page` (0-based) and `page_label` in the metadata. Backends
+    are picked by name, so they can be created inside worker processes.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def page_count(self, path: str) -> int:
+        ...
+
+    @abstractmethod
+    def iter_pages(self, path: str, start: int = 0, end: int = sys.maxsize) -> Iterator[Document]:
+        """Extracts pages [start, end) of one PDF, one page at a time.
+
+        Args:
+            path: The path to the PDF.
+            start: The first page to extract (0-based).
+            end: The page to stop at (exclusive). Clamped to the length of the file.
+        Yields:
+            One document per page.
+        """
+
+    def load_pages(self, path: str, start: int, end: int) -> list[Document]:
+        """Extracts pages [start, end) of one PDF. See iter_pages."""
+        return list(self.iter_pages(path, start, end))
+
+    @staticmethod
+    def _page(path: str, text: str, total_pages: int, page_number: int, page_label: str | None) -> Document:
+        return Document(
+            page_content=text.strip(),
+            metadata={
+                "source": path,
+                "total_pages": total_pages,
+                "page": page_number,
+                "page_label": page_label or str(page_number + 1),
+            },
+        )
+
+
+class PypdfBackend(PdfBackend):
+    """Pure Python, always available. The slowest of the three."""
+
+    name = "pypdf"
+
+    # How many pages to extract before dropping pypdf's cache of parsed objects
+    pages_per_cache_flush = 50
+
+    def page_count(self, path: str) -> int:
+        with _mapped(path) as data:
+            return len(self._reader(data).pages)
+
+    def iter_pages(self, path: str, start: int = 0, end: int = sys.maxsize) -> Iterator[Document]:
+        # Memory-mapped, so only the parts of the file we touch are paged in (and can be
+        # dropped again by the OS) instead of pypdf reading the whole book into a bytes buffer
+        with _mapped(path) as data:
+            reader = self._reader(data)
+            total_pages = len(reader.pages)
+            page_labels = reader.page_labels
+            for i in range(start, min(end, total_pages)):
+                text = reader.pages[i].extract_text()
+                if (i - start + 1) % self.pages_per_cache_flush == 0:
+                    # Parsed content streams pile up in the reader otherwise. The page list
+                    # stays, so this costs nothing beyond re-reading the odd shared font.
+                    reader.resolved_objects = {}
+                yield self._page(path, text, total_pages, i, page_labels[i])
+            del reader
+
+    @staticmethod
+    def _reader(data):
+        from pypdf import PdfReader
+
+        logging.getLogger("pypdf").setLevel(logging.ERROR)
+        return PdfReader(data)
+
+
+class PdfiumBackend(PdfBackend):
+    """PDFium (Chrome's PDF engine) through pypdfium2. Needs `pip install pypdfium2`."""
+
+    name = "pdfium"
+
+    def page_count(self, path: str) -> int:
+        pdfium = _require("pypdfium2", self.name)
+        pdf = pdfium.PdfDocument(path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, path: str, start: int = 0, end: int = sys.maxsize) -> Iterator[Document]:
+        pdfium = _require("pypdfium2", self.name)
+        # PDFium reads the file on demand itself, so it never holds the whole book
+        pdf = pdfium.PdfDocument(path)
+        try:
+            total_pages = len(pdf)
+            for i in range(start, min(end, total_pages)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                # PDFium ends lines with \r\n
+                text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+                yield self._page(path, text, total_pages, i, None)
+        finally:
+            pdf.close()
+
+
+class PymupdfBackend(PdfBackend):
+    """MuPDF through PyMuPDF. Usually the fastest. Needs `pip install pymupdf` (AGPL)."""
+
+    name = "pymupdf"
+
+    def page_count(self, path: str) -> int:
+        pymupdf = _require("pymupdf", self.name)
+        with pymupdf.open(path) as pdf:
+            return pdf.page_count
+
+    def iter_pages(self, path: str, start: int = 0, end: int = sys.maxsize) -> Iterator[Document]:
+        pymupdf = _require("pymupdf", self.name)
+        with pymupdf.open(path) as pdf:
+            total_pages = pdf.page_count
+            for i in range(start, min(end, total_pages)):
+                page = pdf[i]
+                # MuPDF drops text outside the page box by default; the other backends keep it
+                text = page.get_text(clip=pymupdf.INFINITE_RECT())
+                yield self._page(path, text, total_pages, i, page.get_label())
+
+
+BACKENDS: dict[str, type[PdfBackend]] = {
+    backend.name: backend for backend in (PypdfBackend, PdfiumBackend, PymupdfBackend)
+}
+
+
+def get_backend(name: str | None = None) -> PdfBackend:
+    """Looks up a PDF backend by name.
+
+    Args:
+        name: One of BACKENDS. Defaults to the PDF_BACKEND env var (or pypdf).
+    Returns:
+        The backend.
+    Raises:
+        ValueError: If there's no backend with that name.
+    """
+    name = (name or os.getenv("PDF_BACKEND", DEFAULT_BACKEND)).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def available_backends() -> list[str]:
+    """Names of the backends whose libraries are installed."""
+    available = []
+    for name, module in (("pypdf", "pypdf"), ("pdfium", "pypdfium2"), ("pymupdf", "pymupdf")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def _require(module: str, backend: str):
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"The '{backend}' PDF backend needs the {module} package: pip install {module}") from e
+
+
+@contextmanager
+def _mapped(path: str):
+    """Memory-maps a file read-only."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield data
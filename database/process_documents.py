@@ -7,22 +7,39 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from database.vector_store import VectorStore
+from database.sharding import ShardedVectorStore
+import argparse
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-def process_documents() -> None:
-    """Processes the documents and upserts them into the vector store."""
+def process_documents(dedupe: bool = False, resume: bool = False) -> None:
+    """Processes the documents and upserts them into the vector store.
+    
+    With VECTOR_STORE_SHARDING=domain the books are split into one collection per domain
+    (see database/sharding.py).
+    
+    Args:
+        dedupe: Remove duplicate chunks left by older runs before upserting.
+        resume: Continue an interrupted run from its last committed batch.
+    """
     try:
-        vector_store = VectorStore(
+        sharded = os.getenv("VECTOR_STORE_SHARDING", "none").lower() == "domain"
+        vector_store = (ShardedVectorStore if sharded else VectorStore)(
             name=os.getenv("VECTOR_STORE_NAME", "rag_database"),
             db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
             documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
         )
         print("Initialising vector store...")
-        vector_store.initialise_vector_store()
+        vector_store.initialise_vector_store(backend="chroma")
+        if dedupe and sharded:
+            print("Deduplication only applies to the unsharded collection, skipping it.")
+        elif dedupe:
+            print("Removing duplicate chunks...")
+            removed = vector_store.deduplicate()
+            print(f"Removed {removed} duplicate chunks.")
         print("Upserting documents...")
-        vector_store.upsert_documents()
+        vector_store.upsert_documents(resume=resume)
         print("Documents upserted successfully!")
     except Exception as e:
         print(f"Error processing documents: {e}")
@@ -31,4 +48,8 @@ def process_documents() -> None:
         print("Process completed successfully!")
         
 if __name__ == "__main__":
-    process_documents()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingest PDFs into the vector store.")
+    parser.add_argument("--dedupe", action="store_true", help="Remove duplicate chunks left by older runs first.")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint.")
+    args = parser.parse_args()
+    process_documents(dedupe=args.dedupe, resume=args.resume)
@@ -0,0 +1,184 @@
+import sys
+from pathlib import Path
+import hashlib
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """Folds away differences that don't change what a query means: unicode forms and whitespace.
+
+    Case is kept, since embedding models don't treat "Python" and "python" the same.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    Wraps an embeddings model with a bounded LRU + TTL cache of query embeddings.
+
+    Users (and evaluation runs) ask the same questions over and over, and every retrieval
+    embeds its query first, so remembering recent query vectors saves a network round trip
+    per repeat. Entries live in process memory, optionally backed by Redis so every app
+    process shares what any of them has embedded. Documents go straight to the wrapped model;
+    CachedEmbeddings takes care of those.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600.0,
+        redis_url: str | None = None,
+        model: str | None = None,
+        dimensions: int | None = None,
+    ):
+        """
+        Args:
+            embeddings: The model to call on a cache miss.
+            max_size: How many queries to keep in memory; the least recently used go first.
+            ttl_seconds: How long a cached vector is good for, in memory and in Redis.
+            redis_url: A Redis URL for a cache shared between processes, e.g. redis://localhost:6379/0.
+            model: Name of the model, part of the cache key. Defaults to `embeddings.model`.
+            dimensions: Output size, part of the cache key (processes sharing Redis may ask
+                for different sizes). Defaults to `embeddings.dimensions`.
+        """
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        # Also passed through, so CachedEmbeddings keys document vectors the same with or without this
+        self.dimensions = dimensions if dimensions is not None else getattr(embeddings, "dimensions", None)
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+        self._hit_seconds = 0.0
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis = None
+        if redis_url:
+            import redis
+            self.redis = redis.Redis.from_url(redis_url)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query, or hands back the vector from the last time it was asked."""
+        started = time.perf_counter()
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is not None:
+            self._record_hit(started)
+            return vector
+        vector = self._put(key, self.embeddings.embed_query(text))
+        self._record_miss(started)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Async version of embed_query."""
+        started = time.perf_counter()
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is not None:
+            self._record_hit(started)
+            return vector
+        vector = self._put(key, await self.embeddings.aembed_query(text))
+        self._record_miss(started)
+        return vector
+
+    def stats(self) -> dict:
+        """Hit rate and the time the cache has saved, estimated from the average miss."""
+        with self._lock:
+            total = self.hits + self.misses
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            avg_hit = self._hit_seconds / self.hits if self.hits else 0.0
+            return {
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "avg_miss_ms": avg_miss * 1000,
+                "avg_hit_ms": avg_hit * 1000,
+                "saved_ms": max(avg_miss - avg_hit, 0.0) * self.hits * 1000,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{self.dimensions or 0}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> list[float] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if self.redis is None:
+            return None
+        try:
+            blob = self.redis.get(self._redis_key(key))
+        except Exception as e:
+            print(f"Query embedding cache: Redis lookup failed ({e}), embedding instead.")
+            return None
+        if blob is None:
+            return None
+        vector = array("f", blob).tolist()
+        self._remember(key, vector)
+        with self._lock:
+            self.redis_hits += 1
+        return vector
+
+    def _put(self, key: str, vector: list[float]) -> list[float]:
+        # Round to float32 like Redis does, so a miss and any later hit give the same vector
+        packed = array("f", vector)
+        vector = packed.tolist()
+        self._remember(key, vector)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), packed.tobytes(), ex=max(int(self.ttl_seconds), 1))
+            except Exception as e:
+                print(f"Query embedding cache: Redis write failed ({e}).")
+        return vector
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _redis_key(self, key: str) -> str:
+        return f"query-embedding:{key}"
+
+    def _record_hit(self, started: float) -> None:
+        with self._lock:
+            self.hits += 1
+            self._hit_seconds += time.perf_counter() - started
+
+    def _record_miss(self, started: float) -> None:
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += time.perf_counter() - started
@@ -0,0 +1,155 @@
+import sys
+from pathlib import Path
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStoreReloader:
+    """
+    Keeps a serving process's vector store in step with ingest runs happening elsewhere.
+
+    Every ingest run saves the manifest as each book is committed (and re-exports the
+    memory-mapped index, if that's what's served), so a background thread watches
+    VectorStore.version() and, when it changes, opens a fresh handle on the collection and
+    swaps it in. A run that is still committing books keeps changing the version, so the swap
+    waits until it has been quiet for `settle` seconds, or `max_delay` seconds after the
+    first change, whichever comes first: a long ingest costs one reload every few minutes
+    rather than one per book.
+
+    Requests take a handle with acquire() and keep it until they're done, so nothing in
+    flight is dropped. A superseded handle is closed as soon as the last request using it
+    finishes, which frees the index it loaded.
+    """
+
+    def __init__(self, vector_store: VectorStore, interval: float = 5.0, settle: float = 30.0, max_delay: float = 300.0):
+        """
+        Args:
+            vector_store: The initialised vector store being served.
+            interval: Seconds between checks for changes.
+            settle: Seconds the version must stay put before reloading.
+            max_delay: Reload anyway this many seconds after a change was first seen.
+        """
+        self.interval = interval
+        self.settle = settle
+        self.max_delay = max_delay
+        self.reloads = 0
+        self._current = vector_store
+        self._stamp = vector_store.version()
+        self._pending: tuple | None = None  # (stamp, first seen, last changed) of an unloaded change
+        self._listeners: list[Callable[[VectorStore], None]] = []
+        self._lock = threading.Lock()
+        self._users: dict[VectorStore, int] = {}  # Requests using each handle
+        self._retired: list[VectorStore] = []  # Superseded handles still in use
+        self._users_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def current(self) -> VectorStore:
+        """The newest vector store handle. Requests should use acquire(), so it isn't closed under them."""
+        return self._current
+
+    @contextmanager
+    def acquire(self) -> Iterator[VectorStore]:
+        """The newest vector store handle, kept open until the block ends even if a reload replaces it.
+
+        Use it once per request: `with reloader.acquire() as vector_store: ...`
+        """
+        with self._users_lock:
+            store = self._current
+            self._users[store] = self._users.get(store, 0) + 1
+        try:
+            yield store
+        finally:
+            close = False
+            with self._users_lock:
+                self._users[store] -= 1
+                if not self._users[store]:
+                    del self._users[store]
+                    if store in self._retired:
+                        self._retired.remove(store)
+                        close = True
+            if close:
+                self._close(store)
+
+    def add_listener(self, listener: Callable[[VectorStore], None]) -> None:
+        """Registers something to call with the new vector store after every reload.
+
+        For caches and indexes built from the collection, so they can be refreshed or dropped.
+        """
+        self._listeners.append(listener)
+
+    def start(self) -> "VectorStoreReloader":
+        """Starts watching in a daemon thread. Does nothing if it's already watching."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="vector-store-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> bool:
+        """Reloads now if the collection has changed and then settled since the last reload.
+
+        Returns:
+            True if a new vector store was swapped in.
+        """
+        with self._lock:
+            stamp = self._current.version()
+            if stamp == self._stamp:
+                self._pending = None
+                return False
+            now = time.monotonic()
+            if self._pending is None:
+                self._pending = (stamp, now, now)
+            elif self._pending[0] != stamp:
+                self._pending = (stamp, self._pending[1], now)
+            _, first_seen, last_changed = self._pending
+            if now - last_changed < self.settle and now - first_seen < self.max_delay:
+                return False  # Probably still ingesting
+            fresh = self._current.reopen()
+            with self._users_lock:
+                old = self._current
+                self._current, self._stamp, self._pending = fresh, stamp, None
+                in_use = old in self._users
+                if in_use:
+                    self._retired.append(old)
+            self.reloads += 1
+        logger.info(f"Vector store reloaded after ingestion (reload {self.reloads})")
+        if not in_use:
+            self._close(old)
+        for listener in self._listeners:
+            listener(fresh)
+        return True
+
+    @staticmethod
+    def _close(store: VectorStore) -> None:
+        try:
+            store.close()
+        except Exception as e:
+            logger.error(f"Closing a superseded vector store failed: {e}", exc_info=True)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the handle we have; the next check tries again
+                logger.error(f"Vector store reload failed: {e}", exc_info=True)
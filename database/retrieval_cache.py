@@ -0,0 +1,129 @@
+import sys
+from pathlib import Path
+import threading
+from typing import Hashable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+
+class SemanticRetrievalCache:
+    """
+    Remembers which chunks recent queries retrieved, and reuses them for paraphrases.
+
+    Entries are keyed by query embedding: a new query whose cosine similarity to a cached one
+    is at least `threshold` gets that query's chunk IDs back instead of a fresh search. The
+    embeddings sit in one preallocated matrix, so a lookup is a single matrix-vector product;
+    when it's full the least recently used entry is overwritten. Everything is dropped when
+    the collection version changes, so a hit never hides newly ingested books.
+    """
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.92):
+        """
+        Args:
+            max_size: How many queries to remember.
+            threshold: How similar (cosine, -1 to 1) a query must be to a cached one to reuse it.
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        self.version: Hashable = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None
+        self._scopes: list[Hashable] = []
+        self._ids: list[list[str]] = []
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._clock = 0
+
+    def lookup(self, vector: list[float], scope: Hashable = None, version: Hashable = None) -> list[str] | None:
+        """Finds the chunks retrieved for the most similar cached query, if it's similar enough.
+
+        Args:
+            vector: The new query's embedding.
+            scope: Anything else the results depend on (search mode, k); only entries stored
+                with the same scope can match.
+            version: The collection's current version; a change empties the cache.
+        Returns:
+            The cached chunk IDs, best first, or None on a miss.
+        """
+        query = _unit(vector)
+        with self._lock:
+            self._check_version(version)
+            match = self._best_match(query, scope)
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(match)
+            return list(self._ids[match])
+
+    def store(self, vector: list[float], ids: list[str], scope: Hashable = None, version: Hashable = None) -> None:
+        """Remembers the chunks a query retrieved.
+
+        Args:
+            vector: The query's embedding.
+            ids: The chunk IDs it retrieved, best first.
+            scope: As for lookup.
+            version: The collection version the results came from.
+        """
+        if self.max_size <= 0:
+            return
+        query = _unit(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or self._vectors.shape[1] != len(query):
+                self._vectors = np.zeros((self.max_size, len(query)), dtype=np.float32)
+                self._scopes, self._ids = [], []
+            if len(self._ids) < self.max_size:
+                slot = len(self._ids)
+                self._scopes.append(scope)
+                self._ids.append(list(ids))
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._scopes[slot] = scope
+                self._ids[slot] = list(ids)
+            self._vectors[slot] = query
+            self._touch(slot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes, self._ids = [], []
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._ids),
+            }
+
+    def _check_version(self, version: Hashable) -> None:
+        if version != self.version:
+            self._scopes, self._ids = [], []
+            self.version = version
+
+    def _best_match(self, query: np.ndarray, scope: Hashable) -> int | None:
+        size = len(self._ids)
+        if not size or self._vectors.shape[1] != len(query):
+            return None
+        similarities = self._vectors[:size] @ query
+        similarities[[s != scope for s in self._scopes]] = -np.inf
+        best = int(np.argmax(similarities))
+        return best if similarities[best] >= self.threshold else None
+
+    def _touch(self, slot: int) -> None:
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
@@ -0,0 +1,250 @@
+import sys
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+SECTION_INDEX_FILENAME = "section_index.sqlite"
+
+
+def outline_starts(path: str) -> list[tuple[int, str]]:
+    """The (first page, title) of each top-level entry in a PDF's outline, or [] if it has none."""
+    try:
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        starts = []
+        for item in reader.outline:
+            if isinstance(item, list):
+                continue  # The children of the entry before it
+            page = reader.get_destination_page_number(item)
+            if page is not None and page >= 0:
+                starts.append((page, str(item.title)))
+        return starts
+    except Exception:
+        return []
+
+
+def section_ranges(starts: list[tuple[int, str]], page_count: int, pages_per_section: int = 20) -> list[tuple[str, int, int]]:
+    """Splits a book into sections: its outline chapters if it has two or more, else fixed page ranges.
+
+    Args:
+        starts: (first page, title) of each outline entry, 0-based, as outline_starts gives them.
+        page_count: Pages in the book.
+        pages_per_section: Section length when there's no usable outline.
+    Returns:
+        (title, first page, page after the last) for each section, in page order.
+    """
+    first_titles: dict[int, str] = {}
+    for page, title in sorted(starts, key=lambda start: start[0]):
+        if page < page_count:
+            first_titles.setdefault(page, title)
+    if len(first_titles) < 2:
+        return [
+            (f"Pages {start + 1}-{min(start + pages_per_section, page_count)}", start, min(start + pages_per_section, page_count))
+            for start in range(0, page_count, pages_per_section)
+        ]
+    pages = sorted(first_titles)
+    ranges = [("Front matter", 0, pages[0])] if pages[0] > 0 else []
+    for start, end in zip(pages, pages[1:] + [page_count]):
+        ranges.append((first_titles[start], start, end))
+    return ranges
+
+
+def build_sections(path: str, ids: list[str], metadatas: list[dict], vectors: np.ndarray, pages_per_section: int = 20) -> tuple[np.ndarray | None, list[dict]]:
+    """Summarises a book's chunks as one vector per section and one for the whole book.
+
+    A summary vector is the normalised mean of the unit vectors of the chunks it covers, which
+    costs no embedding calls and sits where those chunks are densest.
+
+    Args:
+        path: The PDF, for its outline. Page ranges are used if it can't be read.
+        ids: The book's chunk IDs.
+        metadatas: Their metadata (the 0-based `page` is what matters).
+        vectors: Their embeddings, one row each.
+        pages_per_section: Section length when there's no usable outline.
+    Returns:
+        The book's vector (None if it has no chunks) and its sections, each a dict with
+        title, start_page, end_page, chunk_ids and vector.
+    """
+    if not ids:
+        return None, []
+    pages = np.array([int((metadata or {}).get("page", 0)) for metadata in metadatas])
+    units = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    sections = []
+    for title, start, end in section_ranges(outline_starts(path), int(pages.max()) + 1, pages_per_section):
+        members = np.flatnonzero((pages >= start) & (pages < end))
+        if len(members):
+            sections.append({
+                "title": title,
+                "start_page": start,
+                "end_page": end,
+                "chunk_ids": [ids[i] for i in members],
+                "vector": _unit(units[members].mean(axis=0)),
+            })
+    return _unit(units.mean(axis=0)), sections
+
+
+class SectionIndex:
+    """
+    Summary vectors for every book and every section of a book, for two-stage retrieval.
+
+    Stage one compares the question against the book vectors, then against the sections of the
+    best books; stage two only scores the chunks of the best sections (see
+    VectorStore.hierarchical_search). Sections come from each PDF's outline, or fixed page
+    ranges, and are rebuilt whenever a book's hash changes.
+
+    Kept in SQLite next to the Chroma files, and loaded into memory whole when opened: even a
+    few hundred books are only a few thousand vectors.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Where the SQLite file lives, normally next to the Chroma files.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS books (
+                book TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                vector BLOB
+            );
+            CREATE TABLE IF NOT EXISTS sections (
+                id INTEGER PRIMARY KEY,
+                book TEXT NOT NULL,
+                title TEXT NOT NULL,
+                start_page INTEGER NOT NULL,
+                end_page INTEGER NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                vector BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sections_book ON sections(book);
+        """)
+        self._conn.commit()
+        self.load()
+
+    def load(self) -> None:
+        """Reads every summary vector into memory."""
+        with self._lock:
+            books = [
+                (book, np.frombuffer(vector, dtype=np.float32))
+                for book, vector in self._conn.execute("SELECT book, vector FROM books WHERE vector IS NOT NULL ORDER BY book")
+            ]
+            rows = self._conn.execute(
+                "SELECT book, title, start_page, end_page, chunk_ids, vector FROM sections ORDER BY book, start_page"
+            ).fetchall()
+        self.book_names = [book for book, _ in books]
+        self.book_vectors = np.stack([vector for _, vector in books]) if books else np.empty((0, 0), dtype=np.float32)
+        self.sections = [
+            {"book": book, "title": title, "start_page": start, "end_page": end, "chunk_ids": json.loads(chunk_ids)}
+            for book, title, start, end, chunk_ids, _ in rows
+        ]
+        self.section_vectors = np.stack([np.frombuffer(row[5], dtype=np.float32) for row in rows]) if rows else np.empty((0, 0), dtype=np.float32)
+        self._sections_by_book: dict[str, list[int]] = {}
+        for i, section in enumerate(self.sections):
+            self._sections_by_book.setdefault(section["book"], []).append(i)
+
+    def count(self) -> int:
+        """How many sections are loaded."""
+        return len(self.sections)
+
+    def books(self) -> dict[str, str]:
+        """The SHA-256 each indexed book had when its sections were built, by manifest key."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT book, sha256 FROM books").fetchall())
+
+    def replace_book(self, book: str, sha256: str, vector: np.ndarray | None, sections: list[dict]) -> None:
+        """Stores a book's summary vectors (from build_sections) in place of any it had. Call load() to see them."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sections WHERE book = ?", (book,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO books (book, sha256, vector) VALUES (?, ?, ?)",
+                (book, sha256, None if vector is None else np.asarray(vector, dtype=np.float32).tobytes()),
+            )
+            self._conn.executemany(
+                "INSERT INTO sections (book, title, start_page, end_page, chunk_ids, vector) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (book, section["title"], section["start_page"], section["end_page"], json.dumps(section["chunk_ids"]),
+                     np.asarray(section["vector"], dtype=np.float32).tobytes())
+                    for section in sections
+                ],
+            )
+            self._conn.commit()
+
+    def delete_book(self, book: str) -> None:
+        """Forgets a book. Call load() to stop searching it."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sections WHERE book = ?", (book,))
+            self._conn.execute("DELETE FROM books WHERE book = ?", (book,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stamp(self) -> tuple[int, int] | None:
+        """Changes whenever the index on disk does, by any process."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def search(self, embedding, top_books: int = 5, top_sections: int = 8) -> list[tuple[dict, float]]:
+        """Stage one: the sections most similar to a question, within the books most similar to it.
+
+        Args:
+            embedding: The question's embedding.
+            top_books: How many books to look inside.
+            top_sections: How many of their sections to return.
+        Returns:
+            (section, cosine similarity) pairs, best first.
+        """
+        if not self.sections:
+            return []
+        query = _unit(np.asarray(embedding, dtype=np.float32))
+        book_scores = self.book_vectors @ query
+        best_books = np.argsort(-book_scores, kind="stable")[:top_books]
+        candidates = np.array([i for b in best_books for i in self._sections_by_book.get(self.book_names[b], [])])
+        if not len(candidates):
+            return []
+        section_scores = self.section_vectors[candidates] @ query
+        best = np.argsort(-section_scores, kind="stable")[:top_sections]
+        return [(self.sections[candidates[i]], float(section_scores[i])) for i in best]
+
+
+class HierarchicalRetriever(BaseRetriever):
+    """A LangChain retriever over VectorStore.hierarchical_search, for get_retriever(search_type="hierarchical")."""
+
+    search: Callable[..., list[Document]]
+    k: int = 4
+    lambda_mult: float = 0.5
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return self.search(query, k=self.k, lambda_mult=self.lambda_mult)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
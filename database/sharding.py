@@ -0,0 +1,434 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from database.document_loader import DocumentLoader
+from database.ingestion import IngestionPipeline, IngestionStats
+from database.manifest import IngestionManifest
+from database.mmap_index import read_index_meta, spherical_kmeans
+from database.pdf_backends import get_backend
+from database.query_cache import QueryEmbeddingCache
+from database.vector_store import VectorStore
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# The library's domains, as listed in prompts/retrieval_question.py, with the words that give
+# a book (or a question) away. Single words and two-word phrases, lower case.
+DOMAIN_KEYWORDS = {
+    "programming": [
+        "python", "javascript", "c++", "c#", "ruby", "php", "typescript", "racket", "swift",
+        "programming language", "functions", "classes", "decorators", "generics", "compiler",
+    ],
+    "linux": [
+        "linux", "kernel", "bash", "shell", "sed", "awk", "ubuntu", "red hat", "rhel", "systemd",
+        "devops", "kubernetes", "docker", "ansible", "sysadmin", "system administration", "grep",
+    ],
+    "security": [
+        "security", "penetration", "pentest", "kali", "hacking", "exploit", "forensics", "malware",
+        "vulnerability", "metasploit", "nmap", "wireshark", "encryption", "firewall",
+    ],
+    "ai": [
+        "machine learning", "deep learning", "neural", "pytorch", "tensorflow", "pandas", "numpy",
+        "data science", "data analysis", "visualization", "reinforcement learning", "regression",
+        "classification", "llm", "transformer",
+    ],
+    "web": [
+        "react", "django", "blazor", "css", "html", "front-end", "frontend", "web", "browser",
+        "http", "rest api", "angular", "vue", "flask",
+    ],
+    "engineering": [
+        "design patterns", "clean code", "algorithms", "data structures", "system design",
+        "architecture", "refactoring", "testing", "microservices", "object-oriented",
+    ],
+}
+DEFAULT_SHARD = "general"
+SHARDS_DIRNAME = "shards"
+SHARD_MAP_FILENAME = "shards.json"
+ROUTING_FILENAME = "routing.npy"
+
+# Searches every routed shard at once; separate from the hybrid-search pool the shards use
+_SHARD_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard-search")
+
+
+def domain_scores(text: str) -> Counter:
+    """How many times each domain's keywords appear in some text."""
+    tokens = re.findall(r"[a-z0-9+#]+(?:-[a-z0-9]+)*", text.lower())
+    grams = Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+    return Counter({
+        domain: sum(grams[keyword] for keyword in keywords)
+        for domain, keywords in DOMAIN_KEYWORDS.items()
+        if any(grams[keyword] for keyword in keywords)
+    })
+
+
+def classify(text: str) -> str | None:
+    """The domain whose keywords some text mentions most, or None if it mentions none."""
+    scores = domain_scores(text)
+    return scores.most_common(1)[0][0] if scores else None
+
+
+def classify_book(path: str, directory: str, pages: int = 5) -> str:
+    """Works out which shard a book belongs in.
+
+    A book filed under a folder named after a domain (`security/kali.pdf`) goes there. Otherwise
+    its title and first few pages are matched against DOMAIN_KEYWORDS, the title counting for
+    more, and a book that matches nothing goes to the general shard.
+
+    Args:
+        path: The PDF.
+        directory: The documents directory it lives under.
+        pages: How many pages from the start to read.
+    Returns:
+        The shard's name.
+    """
+    folders = Path(path).relative_to(directory).parts[:-1]
+    for folder in folders:
+        if folder.lower() in DOMAIN_KEYWORDS:
+            return folder.lower()
+    title = re.sub(r"[_.]+", " ", Path(path).stem)
+    scores = Counter({domain: 5 * score for domain, score in domain_scores(title).items()})
+    try:
+        text = " ".join(page.page_content for page in get_backend().load_pages(path, 0, pages))
+        scores.update(domain_scores(text))
+    except Exception as e:
+        print(f"Couldn't read {path} to classify it, going by its title: {e}")
+    return scores.most_common(1)[0][0] if scores else DEFAULT_SHARD
+
+
+class ShardMap:
+    """
+    Which shard every book was put in, kept in <db>/shards/shards.json.
+
+    A book is classified once, the first time it's seen, and stays in that shard from then
+    on (even if it's edited), so its chunks never have to move. Move the file into a domain
+    folder to put it somewhere else.
+    """
+
+    def __init__(self, path: str, books: dict[str, str] | None = None):
+        self.path = path
+        self.books: dict[str, str] = books or {}
+
+    @classmethod
+    def load(cls, shard_root: str) -> "ShardMap":
+        path = os.path.join(shard_root, SHARD_MAP_FILENAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding="utf-8") as f:
+            return cls(path, books=json.load(f).get("books", {}))
+
+    def save(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"books": self.books}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def assign(self, files: list[str], directory: str) -> dict[str, list[str]]:
+        """Classifies any books not seen before and groups all of them by shard.
+
+        Books that are no longer on disk are forgotten.
+
+        Args:
+            files: The PDFs currently on disk.
+            directory: The documents directory they live under.
+        Returns:
+            The books in each shard.
+        """
+        by_shard: dict[str, list[str]] = {}
+        keys = set()
+        for path in files:
+            key = IngestionManifest.key(path, directory)
+            keys.add(key)
+            if key not in self.books:
+                self.books[key] = classify_book(path, directory)
+                print(f"Sharding {key} -> {self.books[key]}")
+            by_shard.setdefault(self.books[key], []).append(path)
+        for key in [key for key in self.books if key not in keys]:
+            del self.books[key]
+        return by_shard
+
+
+class ShardedVectorStore:
+    """
+    The library split into one collection per domain (see DOMAIN_KEYWORDS), each a complete
+    VectorStore of its own under <db>/shards/<domain>: its own Chroma collection, manifest,
+    keyword index and, if exported, memory-mapped index.
+
+    Each shard keeps a handful of k-means centroids of its chunk vectors (routing.npy). A
+    question goes to the SHARD_ROUTE_MAX shards (default 2) whose nearest centroid is closest
+    to it, as long as they're within SHARD_ROUTE_MARGIN (default 0.05) of the best, plus the
+    shard the question's own keywords point at. Those shards are searched concurrently and
+    their chunks merged by similarity, so a Kubernetes question never scans the Photoshop
+    books, and a search costs what its shards cost rather than what the library does.
+
+    It stands in for a VectorStore wherever the app uses one (retrieve, version, reopen,
+    query_cache), so the reloader and the graph nodes work with it unchanged.
+    """
+
+    def __init__(self, name: str, db_path: str, documents_directory: str):
+        self.name = name
+        self.db_path = db_path
+        self.directory = documents_directory
+        self.shard_root = os.path.join(db_path, SHARDS_DIRNAME)
+        self.shards: dict[str, VectorStore] = {}
+        self.centroids: dict[str, np.ndarray] = {}
+        self.embeddings: Embeddings | None = None
+        self.query_cache: QueryEmbeddingCache | None = None
+        self.backend: str | None = None
+        self._reload = False
+        self.max_shards = int(os.getenv("SHARD_ROUTE_MAX", "2"))
+        self.margin = float(os.getenv("SHARD_ROUTE_MARGIN", "0.05"))
+
+    def initialise_vector_store(self, embeddings: Embeddings | None = None, reload: bool = False, backend: str | None = None) -> None:
+        """
+        Opens every shard that has been ingested. All of them share one embeddings model, and so
+        one query embedding cache. Takes the same arguments as VectorStore.initialise_vector_store.
+        """
+        self.backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")).lower()
+        self.embeddings = embeddings
+        self._reload = reload
+        self.shards, self.centroids = {}, {}
+        for shard in self.shard_names():
+            routing_path = os.path.join(self._shard_path(shard), ROUTING_FILENAME)
+            if not os.path.exists(routing_path):
+                continue  # Never ingested, or emptied
+            if self.backend == "mmap" and read_index_meta(os.path.join(self._shard_path(shard), "mmap_index")) is None:
+                print(f"Shard {shard} has no memory-mapped index yet, leaving it out")
+                continue
+            self._open(shard)
+            self.centroids[shard] = np.load(routing_path)
+        print(f"Opened {len(self.shards)} shards: {', '.join(sorted(self.shards)) or 'none'}")
+
+    def shard_names(self) -> list[str]:
+        """Every shard with a directory on disk."""
+        if not os.path.isdir(self.shard_root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.shard_root) if entry.is_dir())
+
+    def _shard_path(self, shard: str) -> str:
+        return os.path.join(self.shard_root, shard)
+
+    def _open(self, shard: str, backend: str | None = None) -> VectorStore:
+        store = VectorStore(f"{self.name}_{shard}", self._shard_path(shard), self.directory)
+        # Every shard exports its own index, whatever MMAP_INDEX_PATH says
+        store.mmap_index_path = os.path.join(store.db_path, "mmap_index")
+        store.initialise_vector_store(embeddings=self.embeddings, reload=self._reload, backend=backend or self.backend)
+        # The first shard builds (and wraps) the model, the rest reuse it
+        self.embeddings, self.query_cache = store.embeddings, store.query_cache
+        self.shards[shard] = store
+        return store
+
+    def upsert_documents(
+        self,
+        batch_size: int = 5000,
+        incremental: bool = True,
+        resume: bool = False,
+        on_pipeline: Callable[[IngestionPipeline], None] | None = None,
+    ) -> dict[str, IngestionStats]:
+        """
+        Sorts the books into shards and ingests each shard with VectorStore.upsert_documents,
+        then refreshes its routing centroids. A shard whose books are all gone is emptied and
+        no longer searched.
+
+        Args:
+            batch_size: Chunks per write.
+            incremental: Set to False to re-ingest every book, even unchanged ones.
+            resume: Continue an interrupted run from its checkpoint.
+            on_pipeline: Called with each shard's pipeline as it starts, e.g. to track progress.
+        Returns:
+            The stats for each shard.
+        """
+        shard_map = ShardMap.load(self.shard_root)
+        by_shard = shard_map.assign(DocumentLoader(self.directory).list_files(), self.directory)
+        shard_map.save()
+
+        stats = {}
+        for shard in sorted(set(by_shard) | set(self.shard_names())):
+            books = by_shard.get(shard, [])
+            print(f"--- Shard {shard}: {len(books)} books ---")
+            store = self.shards.get(shard)
+            if store is None or store.vector_store is None:
+                store = self._open(shard, backend="chroma")
+            stats[shard] = store.upsert_documents(batch_size=batch_size, incremental=incremental, resume=resume, on_pipeline=on_pipeline, files=books)
+            self._write_routing(shard, store)
+        return stats
+
+    def _write_routing(self, shard: str, store: VectorStore, sample_size: int = 4096, page_size: int = 512) -> None:
+        """Saves k-means centroids of a sample of the shard's vectors, or removes them if it's empty."""
+        routing_path = os.path.join(store.db_path, ROUTING_FILENAME)
+        collection = store.chroma_collection()
+        count = collection.count()
+        if not count:
+            if os.path.exists(routing_path):
+                os.remove(routing_path)
+            self.centroids.pop(shard, None)
+            return
+        # Evenly spaced pages, so a big shard isn't read end to end
+        pages = min(count, sample_size) // page_size + 1
+        offsets = sorted({int(offset) for offset in np.linspace(0, max(count - page_size, 0), pages)})
+        vectors = np.concatenate([
+            np.asarray(collection.get(include=["embeddings"], limit=page_size, offset=offset)["embeddings"], dtype=np.float32)
+            for offset in offsets
+        ])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = spherical_kmeans(vectors / norms, min(int(os.getenv("SHARD_ROUTING_CENTROIDS", "16")), len(vectors)))
+        tmp_path = f"{routing_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, centroids.astype(np.float32))
+        os.replace(tmp_path, routing_path)
+        self.centroids[shard] = centroids
+
+    def export_mmap_index(self, dtype: str = "float32", nlist: int | None = None, dimensions: int | None = None) -> dict[str, dict]:
+        """Exports every shard's memory-mapped index, for the mmap backend."""
+        return {shard: store.export_mmap_index(dtype=dtype, nlist=nlist, dimensions=dimensions) for shard, store in self.shards.items()}
+
+    def route(self, embedding: list[float], question: str = "") -> list[str]:
+        """
+        Picks the shards to search for a question.
+
+        Args:
+            embedding: The question's embedding.
+            question: The question itself, for its keywords.
+        Returns:
+            Shard names, most likely first.
+        """
+        if not self.centroids:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        scores = {shard: float(np.max(centroids @ query)) for shard, centroids in self.centroids.items()}
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        routed = [shard for shard in ranked[:self.max_shards] if scores[shard] >= scores[ranked[0]] - self.margin]
+        # "How do I harden sshd" can sit closer to the Linux books than the security ones
+        hint = classify(question)
+        if hint in scores and hint not in routed:
+            routed.append(hint)
+        return routed
+
+    def retrieve(self, query: str, k: int = 6, timings: dict[str, float] | None = None) -> tuple[list[Document], bool]:
+        """
+        VectorStore.retrieve over the shards a question is routed to, side by side.
+
+        Each shard brings back its own best k (from its own retrieval cache, if it has them),
+        and the best k of those by similarity to the question are returned, with the shard
+        they came from in metadata["shard"].
+
+        Args:
+            query: What to look for.
+            k: How many chunks to return.
+            timings: Filled in with embed_ms, route_ms, <shard>_ms for each shard searched and
+                total_ms, if given.
+        Returns:
+            The chunks, and whether every shard answered from its retrieval cache.
+        """
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        if not self.shards:
+            return [], False
+        # Embedded once here; the shards get it back from the shared query cache
+        embedding = self.embeddings.embed_query(query)
+        timings["embed_ms"] = (time.perf_counter() - started) * 1000
+        route_started = time.perf_counter()
+        routed = self.route(embedding, query)
+        timings["route_ms"] = (time.perf_counter() - route_started) * 1000
+
+        shard_timings = {shard: {} for shard in routed}
+        futures = {shard: _SHARD_POOL.submit(self.shards[shard].retrieve, query, k, shard_timings[shard]) for shard in routed}
+        documents, cache_hits = [], []
+        for shard, future in futures.items():
+            shard_documents, cache_hit = future.result()
+            cache_hits.append(cache_hit)
+            timings[f"{shard}_ms"] = shard_timings[shard].get("total_ms", 0.0)
+            documents.extend(
+                Document(page_content=document.page_content, metadata={**document.metadata, "shard": shard}, id=document.id)
+                for document in shard_documents
+            )
+        documents.sort(key=lambda document: document.metadata.get("relevance_score", 0.0), reverse=True)
+        timings["total_ms"] = (time.perf_counter() - started) * 1000
+        return documents[:k], bool(cache_hits) and all(cache_hits)
+
+    def query_vector_store(self, query: str, k: int = 6, timings: dict[str, float] | None = None):
+        """retrieve(), without saying where the chunks came from."""
+        return self.retrieve(query, k, timings)[0]
+
+    def version(self):
+        """Changes whenever any shard does, or a shard's routing is rewritten, added or dropped."""
+        stamps = []
+        for shard in self.shard_names():
+            try:
+                st = os.stat(os.path.join(self._shard_path(shard), ROUTING_FILENAME))
+                routing = (st.st_ino, st.st_mtime_ns)
+            except FileNotFoundError:
+                routing = None
+            store = self.shards.get(shard)
+            stamps.append((shard, routing, store.version() if store is not None else None))
+        return tuple(stamps)
+
+    def reopen(self) -> "ShardedVectorStore":
+        """A new handle on the shards as they are now. See VectorStore.reopen."""
+        fresh = ShardedVectorStore(self.name, self.db_path, self.directory)
+        fresh.initialise_vector_store(embeddings=self.embeddings, reload=True, backend=self.backend)
+        return fresh
+
+    def close(self) -> None:
+        """Closes every shard's handle. See VectorStore.close."""
+        for store in self.shards.values():
+            store.close()
+
+
+def open_vector_store(embeddings: Embeddings | None = None, backend: str | None = None) -> VectorStore | ShardedVectorStore:
+    """The app's vector store as configured: sharded by domain if VECTOR_STORE_SHARDING=domain."""
+    kwargs = dict(
+        name=os.getenv("VECTOR_STORE_NAME", "rag_database"),
+        db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
+        documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
+    )
+    if os.getenv("VECTOR_STORE_SHARDING", "none").lower() == "domain":
+        store = ShardedVectorStore(**kwargs)
+    else:
+        store = VectorStore(**kwargs)
+    store.initialise_vector_store(embeddings=embeddings, backend=backend)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show which shard every book goes in, or export the shards for the mmap backend.")
+    parser.add_argument("--directory", default=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"))
+    parser.add_argument("--export-mmap", action="store_true", help="Export every shard's memory-mapped index instead")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default=os.getenv("MMAP_INDEX_DTYPE", "float32"))
+    parser.add_argument("--dimensions", type=int, default=None, help="Search only the first this many dimensions, then rescore")
+    args = parser.parse_args()
+
+    db_path = os.getenv("VECTOR_STORE_DB_PATH", "db")
+    if args.export_mmap:
+        store = ShardedVectorStore(os.getenv("VECTOR_STORE_NAME", "rag_database"), db_path, args.directory)
+        store.initialise_vector_store(backend="chroma")
+        store.export_mmap_index(dtype=args.dtype, dimensions=args.dimensions)
+        sys.exit(0)
+
+    # Books already placed keep their shard; new ones are classified but the map isn't saved
+    shard_map = ShardMap.load(os.path.join(db_path, SHARDS_DIRNAME))
+    by_shard = shard_map.assign(DocumentLoader(args.directory).list_files(), args.directory)
+    for shard, books in sorted(by_shard.items()):
+        print(f"{shard}: {len(books)} books")
+        for book in books:
+            print(f"  {IngestionManifest.key(book, args.directory)}")
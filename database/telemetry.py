@@ -0,0 +1,310 @@
+import sys
+from pathlib import Path
+import json
+import os
+import queue
+import resource
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+@dataclass
+class StageStats:
+    """Time spent in one stage, and how much went through it."""
+    seconds: float = 0.0
+    items: int = 0
+    bytes: int = 0  # Characters of text for the text stages, close enough to bytes for most books
+
+
+@dataclass
+class QueueStats:
+    """How full a queue between two stages got, and who waited on it."""
+    capacity: int = 0
+    max_depth: int = 0
+    depth_total: int = 0
+    samples: int = 0
+    consumer_wait_seconds: float = 0.0  # The stage after it had nothing to do
+    producer_blocked_seconds: float = 0.0  # The stage before it was held back
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.samples if self.samples else 0.0
+
+
+class _Section:
+    def __init__(self, items: int, size: int):
+        self.items = items
+        self.bytes = size
+
+
+class IngestionTelemetry:
+    """
+    Per-stage timings, counts and sizes, queue depths and memory for one ingestion run.
+
+    Stage times are exclusive: time a stage spends pulling from the stage before it, or
+    waiting on a queue, is charged to that stage or queue instead, so the stage with the
+    most seconds (on its thread) really is where the time goes. Embedding is the exception,
+    its batches run concurrently, so its seconds can add up to more than the wall clock.
+
+    A background thread samples queue depths and memory, and hands a snapshot to the metrics
+    sink (if there is one) every sample_interval seconds.
+    """
+
+    def __init__(self, sink: "MetricsSink | None" = None, sample_interval: float = 1.0):
+        """
+        Args:
+            sink: Where snapshots go while the run is in progress.
+            sample_interval: Seconds between samples (and snapshots).
+        """
+        self.sink = sink
+        self.sample_interval = sample_interval
+        self.stages: dict[str, StageStats] = {}
+        self.queues: dict[str, QueueStats] = {}
+        self.peak_rss_bytes = 0
+        self._watched: dict[int, tuple[str, queue.Queue]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started: float | None = None
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    @contextmanager
+    def stage(self, name: str, items: int = 1, size: int = 0) -> Iterator[_Section]:
+        """Times a block of work as part of a stage.
+
+        Args:
+            name: The stage.
+            items: How many items the block handles. Can be set on the yielded section instead.
+            size: Their size. Can also be set on the section.
+        """
+        section = _Section(items, size)
+        started = self._enter()
+        try:
+            yield section
+        finally:
+            self.add(name, self._exit(started), section.items, section.bytes)
+
+    def timed(self, name: str, iterable: Iterable, size: Callable[[object], int] | None = None) -> Iterator:
+        """Yields from an iterable, charging the time spent producing each item to a stage."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as section:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    section.items = 0
+                    return
+                section.bytes = size(item) if size else 0
+            yield item
+
+    @contextmanager
+    def waiting(self, inbox: queue.Queue, side: str) -> Iterator[None]:
+        """Times a wait on a watched queue, as its "consumer" or "producer"."""
+        started = self._enter()
+        try:
+            yield
+        finally:
+            elapsed = self._exit(started)
+            watched = self._watched.get(id(inbox))
+            if watched:
+                with self._lock:
+                    stats = self.queues[watched[0]]
+                    if side == "consumer":
+                        stats.consumer_wait_seconds += elapsed
+                    else:
+                        stats.producer_blocked_seconds += elapsed
+
+    def add(self, name: str, seconds: float, items: int = 0, size: int = 0) -> None:
+        """Adds work done outside a stage() block (e.g. on an event loop) to a stage."""
+        with self._lock:
+            stats = self.stages.setdefault(name, StageStats())
+            stats.seconds += seconds
+            stats.items += items
+            stats.bytes += size
+
+    def watch_queue(self, name: str, inbox: queue.Queue) -> None:
+        self._watched[id(inbox)] = (name, inbox)
+        self.queues[name] = QueueStats(capacity=inbox.maxsize)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="ingest-telemetry", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self._sample()
+
+    def snapshot(self) -> dict:
+        """Everything measured so far, as plain JSON-friendly values."""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        with self._lock:
+            stages = {
+                name: {
+                    **asdict(stats),
+                    "items_per_second": stats.items / stats.seconds if stats.seconds else 0.0,
+                    "bytes_per_second": stats.bytes / stats.seconds if stats.seconds else 0.0,
+                }
+                for name, stats in self.stages.items()
+            }
+            queues = {name: {**asdict(stats), "mean_depth": stats.mean_depth} for name, stats in self.queues.items()}
+        for stats in queues.values():
+            del stats["depth_total"], stats["samples"]
+        return {
+            "elapsed_seconds": elapsed,
+            "stages": stages,
+            "queues": queues,
+            "memory": {
+                # Sampled during this run; the process peaks below cover everything it has ever done
+                "peak_rss_bytes": self.peak_rss_bytes,
+                "process_peak_rss_bytes": _max_rss(resource.RUSAGE_SELF),
+                # Parser processes, once they've exited
+                "children_peak_rss_bytes": _max_rss(resource.RUSAGE_CHILDREN),
+            },
+            "bottleneck": max(stages, key=lambda name: stages[name]["seconds"]) if stages else None,
+        }
+
+    def summary(self) -> str:
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1].seconds)
+        return ", ".join(f"{name} {stats.seconds:.1f}s ({stats.items} items)" for name, stats in stages)
+
+    def _enter(self) -> float:
+        # Each thread keeps a stack of open sections, holding the time spent in their children
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, started: float) -> float:
+        """Closes the innermost section and returns its time minus its children's."""
+        elapsed = time.perf_counter() - started
+        stack = self._local.stack
+        child_seconds = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        return elapsed - child_seconds
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+            if self.sink is not None:
+                try:
+                    self.sink.emit(self.snapshot())
+                except OSError:
+                    pass  # Metrics are best effort, never worth failing an ingest over
+
+    def _sample(self) -> None:
+        with self._lock:
+            for name, inbox in self._watched.values():
+                depth = inbox.qsize()
+                stats = self.queues[name]
+                stats.max_depth = max(stats.max_depth, depth)
+                stats.depth_total += depth
+                stats.samples += 1
+        self.peak_rss_bytes = max(self.peak_rss_bytes, _current_rss())
+
+
+def _max_rss(who: int) -> int:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return _max_rss(resource.RUSAGE_SELF)
+
+
+class MetricsSink(ABC):
+    """Somewhere to send telemetry snapshots while a run is in progress."""
+
+    @abstractmethod
+    def emit(self, snapshot: dict) -> None:
+        ...
+
+
+class JsonLinesSink(MetricsSink):
+    """Appends each snapshot to a JSON lines file, with a timestamp."""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def emit(self, snapshot: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), **snapshot}) + "\n")
+
+
+class StatsdSink(MetricsSink):
+    """Sends each snapshot to statsd as gauges, over UDP so a missing server never slows ingestion."""
+
+    def __init__(self, host: str = "localhost", port: int = 8125, prefix: str = "bookrag.ingest"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, snapshot: dict) -> None:
+        lines = [f"{self.prefix}.elapsed_seconds:{snapshot['elapsed_seconds']:.3f}|g"]
+        for group in ("stages", "queues"):
+            for name, values in snapshot[group].items():
+                lines += [f"{self.prefix}.{group}.{name}.{key}:{value}|g" for key, value in values.items()]
+        lines += [f"{self.prefix}.memory.{key}:{value}|g" for key, value in snapshot["memory"].items()]
+        # Stay well under a typical MTU per packet
+        packet = ""
+        for line in lines:
+            if packet and len(packet) + len(line) > 1400:
+                self._socket.sendto(packet.encode(), self.address)
+                packet = ""
+            packet += line + "\n"
+        if packet:
+            self._socket.sendto(packet.encode(), self.address)
+
+
+def open_metrics_sink(url: str | None) -> MetricsSink | None:
+    """Opens the sink a URL points at: statsd://host:port, or a path to a .jsonl file.
+
+    Args:
+        url: The URL, or None/empty for no sink.
+    Returns:
+        The sink, or None.
+    """
+    if not url:
+        return None
+    if url.startswith("statsd://"):
+        host, _, port = url[len("statsd://"):].partition(":")
+        return StatsdSink(host or "localhost", int(port or 8125))
+    return JsonLinesSink(url)
+
+
+def write_report(report: dict, directory: str) -> str:
+    """Writes a run's report as JSON, named by when it finished.
+
+    Returns:
+        The path of the report.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = os.path.join(directory, time.strftime("ingest-%Y%m%dT%H%M%SZ.json", time.gmtime()))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
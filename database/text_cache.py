@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+import gzip
+import json
+import os
+from typing import Iterator
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+
+
+class PageTextCache:
+    """
+    Keeps the raw text extracted from each PDF so it only has to be parsed once.
+
+    One gzip file per book, named after the file's SHA-256 and the extractor that produced
+    it, with one JSON line per page. Pages are written and read back one at a time, so
+    caching a huge book doesn't mean holding all of its text in memory. Re-chunking or
+    tweaking clean_text then never has to touch the PDF parser again.
+    """
+
+    def __init__(self, directory: str, extractor: str = "pypdf"):
+        """
+        Args:
+            directory: Where the cache files live.
+            extractor: Name of the text extractor. Part of the key, since different
+                extractors give different text for the same file.
+        """
+        self.directory = directory
+        self.extractor = extractor
+
+    def has(self, sha256: str) -> bool:
+        return self._path(sha256).exists()
+
+    def iter_pages(self, sha256: str, source: str) -> Iterator[Document]:
+        """Reads a book's pages back as documents, one at a time.
+
+        Args:
+            sha256: The hash of the PDF.
+            source: The path to report in each page's metadata.
+        Yields:
+            One document per page, with the same metadata as a fresh parse.
+        """
+        with gzip.open(self._path(sha256), "rt", encoding="utf-8") as f:
+            for line in f:
+                page = json.loads(line)
+                yield Document(
+                    page_content=page["text"],
+                    metadata={
+                        "source": source,
+                        "total_pages": page["total_pages"],
+                        "page": page["page"],
+                        "page_label": page["page_label"],
+                    },
+                )
+
+    def load(self, sha256: str, source: str) -> list[Document]:
+        """Reads a whole book back. See iter_pages."""
+        return list(self.iter_pages(sha256, source))
+
+    def writer(self, sha256: str) -> "PageTextCacheWriter":
+        """Starts writing a book's pages. Nothing is visible to readers until commit()."""
+        return PageTextCacheWriter(self._path(sha256))
+
+    def put(self, sha256: str, pages: list[Document]) -> None:
+        """Stores a book's freshly extracted pages.
+
+        Args:
+            sha256: The hash of the PDF.
+            pages: The raw (uncleaned) pages, in order.
+        """
+        writer = self.writer(sha256)
+        for page in pages:
+            writer.add(page)
+        writer.commit()
+
+    def _path(self, sha256: str) -> Path:
+        return Path(self.directory) / sha256[:2] / f"{sha256}.{self.extractor}.jsonl.gz"
+
+
+class PageTextCacheWriter:
+    """Appends pages to a temporary file that replaces the cache entry atomically on commit."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = None
+
+    def add(self, page: Document) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self._tmp_path, "wt", encoding="utf-8", compresslevel=6)
+        self._file.write(json.dumps({
+            "page": page.metadata.get("page", 0),
+            "page_label": page.metadata.get("page_label"),
+            "total_pages": page.metadata.get("total_pages"),
+            "text": page.page_content,
+        }) + "\n")
+
+    def commit(self) -> None:
+        if self._file is None:
+            # A book with no pages still gets an (empty) entry, so it isn't parsed again
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self._tmp_path, "wt", encoding="utf-8")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            os.remove(self._tmp_path)
@@ -0,0 +1,171 @@
+import sys
+from pathlib import Path
+import re
+from typing import Iterable
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+
+_NEWLINE_RUNS = re.compile(r"\n{3,}")
+# Only runs that actually change: two or more spaces/tabs, or a lone tab
+_SPACE_RUNS = re.compile(r"[ \t]{2,}|\t")
+
+
+def clean_text(text: str) -> str:
+    """Cleans common PDF artifacts such as multiple newlines and excessive whitespace.
+
+    Same result as the old encode/decode round-trip, NUL replace and two re.sub calls, but
+    each step first checks (with a C-speed substring search) whether there's anything to do,
+    so a typical page gets at most one regex pass instead of two full passes and two copies.
+
+    Args:
+        text: The text to clean.
+    Returns:
+        The cleaned text.
+    """
+    # Lone surrogates can't be encoded as UTF-8; pure ASCII pages can't contain any
+    if not text.isascii():
+        try:
+            text.encode("utf-8")
+        except UnicodeEncodeError:
+            text = text.encode("utf-8", "ignore").decode("utf-8")
+    # Dropping NULs first matters, since it can bring two runs of whitespace together
+    if "\x00" in text:
+        text = text.replace("\x00", "")
+    if "\n\n\n" in text:
+        text = _NEWLINE_RUNS.sub("\n\n", text)
+    if "  " in text or "\t" in text:
+        text = _SPACE_RUNS.sub(" ", text)
+    return text.strip()
+
+
+class OffsetTextSplitter:
+    """
+    Splits text exactly like RecursiveCharacterTextSplitter, but works on character offsets.
+
+    The recursive splitter slices the text into lists of strings for every separator it tries,
+    then joins them back together into chunks. This one only ever keeps (start, end) offsets
+    into the page text and uses str.find to look for separators, so a page is sliced once, when
+    the final chunks are cut out of it.
+
+    Matches the settings we use: separators kept at the start of each piece, literal (not regex)
+    separators, whitespace stripped from chunks and len() as the length function. Chunks and
+    their `start_index` come out identical to the langchain splitter.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, separators: list[str] | None = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or ["\n\n", "\n", " ", ""]
+
+    def split_offsets(self, text: str) -> list[tuple[int, int]]:
+        """Finds the chunks of a text.
+
+        Args:
+            text: The text to split.
+        Returns:
+            (start, end) offsets of each chunk, in order.
+        """
+        spans = []
+        self._split(text, 0, len(text), 0, spans)
+        return spans
+
+    def split_text(self, text: str) -> list[str]:
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_documents(self, documents: Iterable[Document]) -> list[Document]:
+        """Splits documents into chunks with a `start_index` in their metadata.
+
+        Args:
+            documents: The documents to split.
+        Returns:
+            The chunks, each with a copy of its document's metadata.
+        """
+        chunks = []
+        for document in documents:
+            text = document.page_content
+            index = previous_length = 0
+            for start, end in self.split_offsets(text):
+                chunk = text[start:end]
+                # The langchain splitter reports the first occurrence of the chunk after the end
+                # of the previous one minus the overlap, which is usually (but not always) `start`
+                lowest = max(0, index + previous_length - self.chunk_overlap)
+                index = text.find(chunk, lowest, end) if start >= lowest else text.find(chunk, lowest)
+                previous_length = end - start
+                chunks.append(Document(page_content=chunk, metadata={**document.metadata, "start_index": index}))
+        return chunks
+
+    def _split(self, text: str, start: int, end: int, first_separator: int, spans: list) -> None:
+        # Use the first separator that appears in this stretch of text
+        separators = self.separators
+        separator, remaining = separators[-1], len(separators)
+        for i in range(first_separator, len(separators)):
+            if not separators[i]:
+                separator = ""
+                break
+            if text.find(separators[i], start, end) != -1:
+                separator, remaining = separators[i], i + 1
+                break
+
+        # Merge the pieces into chunks, recursing into any that are still too long
+        pieces = []
+        for piece_start, piece_end in self._pieces(text, start, end, separator):
+            if piece_end - piece_start < self.chunk_size:
+                pieces.append((piece_start, piece_end))
+                continue
+            if pieces:
+                self._merge(text, pieces, spans)
+                pieces = []
+            if remaining == len(separators):
+                spans.append((piece_start, piece_end))
+            else:
+                self._split(text, piece_start, piece_end, remaining, spans)
+        if pieces:
+            self._merge(text, pieces, spans)
+
+    @staticmethod
+    def _pieces(text: str, start: int, end: int, separator: str) -> list[tuple[int, int]]:
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+        # Each piece starts with the separator that precedes it
+        pieces = []
+        previous = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            if position > previous:
+                pieces.append((previous, position))
+            previous = position
+            position = text.find(separator, position + len(separator), end)
+        if end > previous:
+            pieces.append((previous, end))
+        return pieces
+
+    def _merge(self, text: str, pieces: list[tuple[int, int]], spans: list) -> None:
+        # Pieces passed in here are contiguous, so a run of them is just (first start, last end)
+        first = total = 0
+        for i, (piece_start, piece_end) in enumerate(pieces):
+            length = piece_end - piece_start
+            if total + length > self.chunk_size and i > first:
+                self._emit(text, pieces[first][0], pieces[i - 1][1], spans)
+                # Drop pieces from the front until what's left fits in the overlap
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= pieces[first][1] - pieces[first][0]
+                    first += 1
+            total += length
+        if first < len(pieces):
+            self._emit(text, pieces[first][0], pieces[-1][1], spans)
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, spans: list) -> None:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
@@ -7,63 +7,725 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 logging.getLogger("pypdf").setLevel(logging.ERROR) 
+import chromadb
+from chromadb.api import ClientAPI
 from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from database.document_loader import DocumentLoader
+from database.chunk_filters import BoilerplateFilter, NearDuplicateFilter
+from database.embedding_cache import CachedEmbeddings
+from database.query_cache import QueryEmbeddingCache
+from database.retrieval_cache import SemanticRetrievalCache
+from database.mmr import cosine_similarity, maximal_marginal_relevance
+from database.mmap_index import MmapVectorIndex, export_index, index_stamp, read_index_meta
+from database.section_index import SECTION_INDEX_FILENAME, HierarchicalRetriever, SectionIndex, build_sections
+from database.text_cache import PageTextCache
+from database.embedding_scheduler import EmbeddingScheduler
+from database.ingestion import IngestionPipeline, IngestionStats
+from database.telemetry import IngestionTelemetry, open_metrics_sink, write_report
+from database.keyword_index import KEYWORD_INDEX_FILENAME, KeywordIndex
+from database.manifest import IngestionManifest, file_sha256, make_chunk_id, manifest_stamp
+from database.checkpoint import IngestionCheckpoint
 from langchain_openai import OpenAIEmbeddings
 import os
-import tqdm
+import functools
+import hashlib
+import importlib.metadata
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Runs the vector and keyword halves of hybrid searches side by side
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
+
+# The chromadb Collection inside LangChain's Chroma wrapper is only reached through a private
+# attribute, which is known to be there in these major versions
+_CHROMA_COLLECTION_VERSIONS = {"chromadb": 1, "langchain-chroma": 1}
+
+
+@functools.cache
+def _check_chroma_versions() -> None:
+    for package, major in _CHROMA_COLLECTION_VERSIONS.items():
+        version = importlib.metadata.version(package)
+        if int(version.split(".")[0]) != major:
+            raise RuntimeError(f"{package} {version} isn't supported, install {package}>={major},<{major + 1}")
+
+# Spellings of a persist directory ("db/.", "db/./.", ...) held by open reload handles
+_reload_spellings: set[tuple[str, int]] = set()
+_reload_spellings_lock = threading.Lock()
+
+
+def _claim_reload_spelling(db_path: str) -> int:
+    with _reload_spellings_lock:
+        depth = 1
+        while (db_path, depth) in _reload_spellings:
+            depth += 1
+        _reload_spellings.add((db_path, depth))
+        return depth
+
+
+def _release_reload_spelling(db_path: str, depth: int) -> None:
+    with _reload_spellings_lock:
+        _reload_spellings.discard((db_path, depth))
+
+
+class EmbeddingSearchRetriever(BaseRetriever):
+    """A LangChain retriever over a search that takes the query's embedding, for get_retriever() on the mmap backend."""
+
+    search: Callable[[list[float]], list[Document]]
+    embed_query: Callable[[str], list[float]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return self.search(self.embed_query(query))
+
 class VectorStore:
     def __init__(self, name: str, db_path: str, documents_directory: str):
         self.directory = documents_directory
         self.name = name
         self.db_path = db_path
+        self._file_hashes: dict[str, str] = {}
+        self._manifest: IngestionManifest | None = None
+        self._checkpoint: IngestionCheckpoint | None = None
+        self._checkpoint_lock = threading.Lock()
+        self._parse_failures: set[str] = set()
+        self.embedding_cache: CachedEmbeddings | None = None
+        self.embeddings: Embeddings | None = None
+        self.query_cache: QueryEmbeddingCache | None = None
+        self.retrieval_cache: SemanticRetrievalCache | None = None
+        self.keyword_index: KeywordIndex | None = None
+        self.section_index: SectionIndex | None = None
+        self.vector_store: Chroma | None = None
+        self._chroma_client: ClientAPI | None = None
+        self._reload_spelling: int | None = None
+        self.mmap_index: MmapVectorIndex | None = None
+        self.mmap_index_path = os.getenv("MMAP_INDEX_PATH", os.path.join(db_path, "mmap_index"))
     
-    def initialise_vector_store(self) -> None:
+    def initialise_vector_store(self, embeddings: Embeddings | None = None, reload: bool = False, backend: str | None = None) -> None:
         """
         Wakes up the vector store.
         If it's not there, Chroma will create it. If it is, we just load it.
         It's like opening the library doors.
+        
+        Document embeddings go through an on-disk cache (EMBEDDING_CACHE_PATH, defaults to a
+        SQLite file in the persist directory) so we never pay to embed the same text twice.
+        Set EMBEDDING_CACHE_ENABLED=false to turn it off.
+        
+        Query embeddings are kept in an in-memory LRU cache (QUERY_EMBEDDING_CACHE_SIZE entries
+        for QUERY_EMBEDDING_CACHE_TTL seconds, optionally shared through
+        QUERY_EMBEDDING_CACHE_REDIS_URL) so repeated questions skip the embedding call. Set
+        QUERY_EMBEDDING_CACHE_SIZE=0 to turn it off.
+        
+        retrieve() also reuses the results of recent questions for close paraphrases
+        (RETRIEVAL_CACHE_SIZE entries, RETRIEVAL_CACHE_THRESHOLD cosine similarity). Set
+        RETRIEVAL_CACHE_SIZE=0 to turn that off.
+        
+        Chunks are also indexed for keyword (BM25) search in the persist directory, for hybrid
+        retrieval. Set KEYWORD_INDEX_ENABLED=false to turn that off.
+        
+        Every book and every section of a book (outline chapters, or SECTION_PAGES-page
+        ranges) gets a summary vector, for hierarchical retrieval. Set
+        SECTION_INDEX_ENABLED=false to turn that off.
+        
+        With the "mmap" backend (VECTOR_STORE_BACKEND=mmap) no Chroma client is opened at all:
+        searches run on the memory-mapped export at MMAP_INDEX_PATH (see database/mmap_index.py),
+        which every worker on the host shares through the page cache. That handle is read-only.
+        
+        Args:
+            embeddings: Embeddings to use instead of OpenAI (handy for tests).
+            reload: Read the index from disk again instead of sharing the one already open in this process.
+            backend: "chroma" or "mmap". Defaults to VECTOR_STORE_BACKEND, or chroma.
         """
-        embeddings = OpenAIEmbeddings(
-            model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
-            api_key=os.getenv("OPENAI_API_KEY"),
-        )
-        self.vector_store = Chroma(
-            collection_name=self.name,
-            embedding_function=embeddings,
-            persist_directory=self.db_path,
-        )
+        if embeddings is None:
+            # Fewer dimensions (OPENAI_EMBEDDING_DIMENSIONS) need a fresh collection to ingest into
+            dimensions = os.getenv("OPENAI_EMBEDDING_DIMENSIONS")
+            embeddings = OpenAIEmbeddings(
+                model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
+                api_key=os.getenv("OPENAI_API_KEY"),
+                dimensions=int(dimensions) if dimensions else None,
+            )
+        # reopen() hands over the wrapped model, so the query cache outlives reloads
+        if not isinstance(embeddings, QueryEmbeddingCache) and int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")) > 0:
+            embeddings = QueryEmbeddingCache(
+                embeddings,
+                max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+                ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600")),
+                redis_url=os.getenv("QUERY_EMBEDDING_CACHE_REDIS_URL") or None,
+            )
+        self.query_cache = embeddings if isinstance(embeddings, QueryEmbeddingCache) else None
+        self.embeddings = embeddings
+        self.embedding_cache = None
+        if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true":
+            self.embedding_cache = CachedEmbeddings(
+                embeddings,
+                cache_path=os.getenv("EMBEDDING_CACHE_PATH", os.path.join(self.db_path, "embedding_cache.sqlite")),
+            )
+            embeddings = self.embedding_cache
+        self.retrieval_cache = None
+        if int(os.getenv("RETRIEVAL_CACHE_SIZE", "512")) > 0:
+            self.retrieval_cache = SemanticRetrievalCache(
+                max_size=int(os.getenv("RETRIEVAL_CACHE_SIZE", "512")),
+                threshold=float(os.getenv("RETRIEVAL_CACHE_THRESHOLD", "0.92")),
+            )
+        self.keyword_index = None
+        if os.getenv("KEYWORD_INDEX_ENABLED", "true").lower() == "true":
+            self.keyword_index = KeywordIndex(
+                os.path.join(self.db_path, KEYWORD_INDEX_FILENAME),
+                max_df=float(os.getenv("KEYWORD_MAX_DF", "0.2")),
+            )
+        self.section_index = None
+        if os.getenv("SECTION_INDEX_ENABLED", "true").lower() == "true":
+            self.section_index = SectionIndex(os.path.join(self.db_path, SECTION_INDEX_FILENAME))
+        self.backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")).lower()
+        self.vector_store, self.mmap_index = None, None
+        if self.backend == "mmap":
+            self.mmap_index = MmapVectorIndex(
+                self.mmap_index_path,
+                nprobe=int(os.getenv("MMAP_INDEX_NPROBE", "8")),
+                exact=os.getenv("MMAP_INDEX_SEARCH", "ivf").lower() == "exact",
+                rescore=int(os.getenv("MMAP_INDEX_RESCORE", "4")),
+            )
+        elif os.getenv("CHROMA_HOST"):
+            # A Chroma server, so several ingestion workers can write to one collection
+            self.vector_store = Chroma(
+                collection_name=self.name,
+                embedding_function=embeddings,
+                host=os.getenv("CHROMA_HOST"),
+                port=int(os.getenv("CHROMA_PORT", "8000")),
+                ssl=os.getenv("CHROMA_SSL", "false").lower() == "true",
+            )
+        elif reload:
+            # Chroma shares one System (HNSW index, SQLite) per persist_directory string, and its
+            # in-memory index never sees chunks written by other processes. Opening the directory
+            # under a spelling no other open handle uses ("db/./.") gets this handle a client and
+            # index of its own, which close() shuts down; handles on the old one keep working.
+            self._reload_spelling = _claim_reload_spelling(self.db_path)
+            self._chroma_client = chromadb.PersistentClient(
+                path=os.path.join(self.db_path, *["."] * self._reload_spelling)
+            )
+            self.vector_store = Chroma(
+                collection_name=self.name,
+                embedding_function=embeddings,
+                client=self._chroma_client,
+            )
+        else:
+            self.vector_store = Chroma(
+                collection_name=self.name,
+                embedding_function=embeddings,
+                persist_directory=self.db_path,
+            )
         print("Vector store initialised successfully.")
 
+    def close(self) -> None:
+        """
+        Frees what this handle holds open: the Chroma index it loaded for a reload, and its
+        SQLite connections. Only call it once nothing uses the handle any more, e.g. when the
+        reloader has swapped in a newer one and the last request on this one has finished.
+        """
+        if self._chroma_client is not None:
+            self._chroma_client.close()
+            self._chroma_client = None
+            _release_reload_spelling(self.db_path, self._reload_spelling)
+        for index in (self.embedding_cache, self.keyword_index, self.section_index):
+            if index is not None:
+                index.close()
+
+    def chroma_collection(self) -> chromadb.Collection:
+        """
+        The chromadb Collection behind the LangChain wrapper, for what LangChain doesn't expose:
+        upserting vectors that are already computed, and queries and reads that hand the vectors
+        back. Everything that needs it comes through here, so a langchain-chroma upgrade that
+        moves it fails with a clear error instead of an AttributeError somewhere in ingestion.
+        
+        Raises:
+            RuntimeError: If the installed chromadb or langchain-chroma isn't a version this was
+                written against, or this is a read-only memory-mapped store.
+        """
+        if self.vector_store is None:
+            raise RuntimeError("This vector store is a read-only memory-mapped index and has no Chroma collection")
+        _check_chroma_versions()
+        return self.vector_store._collection
+
 
-    def upsert_documents(self) -> None:
+    def upsert_documents(
+        self,
+        batch_size: int = 5000,
+        incremental: bool = True,
+        resume: bool = False,
+        on_pipeline: Callable[[IngestionPipeline], None] | None = None,
+        files: list[str] | None = None,
+    ) -> IngestionStats:
         """
         Stuffs the vector store with knowledge.
-        We process the docs, batch them up (because Chroma gets full), and shove them in.
+        Pages stream through load → clean → split, get batched up (because Chroma gets full),
+        and each batch is shoved in while the next one is still being parsed.
+        
+        The ingestion manifest keeps track of what's already in there, so only new or changed
+        books get embedded, and chunks from removed or changed books get deleted first.
+        
+        A checkpoint is written after every committed batch. If a run dies part way, calling
+        this again with resume=True picks up where it stopped: finished books aren't re-parsed
+        and chunks that made it into Chroma aren't re-embedded. Without resume, whatever the
+        interrupted run left behind is cleaned up first.
+        
+        Args:
+            batch_size: Chunks per write. Must stay under ChromaDB's limit of 5461.
+            incremental: Set to False to re-ingest every book, even unchanged ones.
+            resume: Continue an interrupted run from its checkpoint.
+            on_pipeline: Called with the pipeline just before it starts, e.g. to watch its progress().
+            files: The books that belong in this collection (one shard's, say). Any other book
+                under the documents directory is treated as absent, and its chunks deleted.
+                Defaults to every PDF in the documents directory.
+        Returns:
+            The stats for the run.
         """
-        loader = DocumentLoader(self.directory)
-        documents = loader.preprocess_documents()
+        if self.vector_store is None:
+            raise RuntimeError("This vector store is a read-only memory-mapped index; ingest with the chroma backend")
+        loader = self._document_loader()
+        self._parse_failures = loader.failed_files
+        self._backfill_keyword_index(batch_size)
+        manifest = IngestionManifest.load(self.db_path)
+        checkpoint = IngestionCheckpoint.load(self.db_path)
+        if checkpoint.files and not resume:
+            print(f"Discarding checkpoint of an interrupted run ({len(checkpoint.files)} books in progress)...")
+            self._discard_checkpoint(checkpoint, manifest, list(checkpoint.files), batch_size)
+        elif checkpoint.files:
+            print(f"Resuming interrupted run after {checkpoint.batches_committed} committed batches...")
+
+        diff = manifest.diff(loader.list_files() if files is None else files, self.directory)
+        to_ingest = self.plan_ingest(manifest, diff, incremental, batch_size)
+
+        # Progress on books that are gone or have changed since the checkpoint is no use
+        outdated = [source for source, entry in checkpoint.files.items() if diff.hashes.get(source) != entry["sha256"]]
+        self._discard_checkpoint(checkpoint, manifest, outdated, batch_size)
+
+        if not to_ingest:
+            checkpoint.clear()
+            print("Nothing new to ingest.")
+            if diff.removed or diff.changed:
+                self.refresh_section_index(batch_size)
+                self.refresh_mmap_index()
+            return IngestionStats()
+
+        self._manifest, self._checkpoint = manifest, checkpoint
+        self._file_hashes = {path: diff.hashes[path] for path in to_ingest}
+        for path in to_ingest:
+            checkpoint.start_file(path, diff.hashes[path])
+        checkpoint.save()
+
+        scheduler = self._embedding_scheduler()
+        pipeline = IngestionPipeline(
+            loader,
+            write_batch=self._write_batch,
+            batch_size=batch_size,
+            files=to_ingest,
+            file_hashes=self._file_hashes,
+            embed_scheduler=scheduler,
+            skip_chunk=self._is_committed,
+            on_file_split=self._file_split,
+            telemetry=self._telemetry(),
+            **self._chunk_filters(),
+        )
+
+        print(f"Streaming {len(to_ingest)} books from {self.directory} in batches of {batch_size}...")
+        cache_before = self.embedding_cache.stats() if self.embedding_cache else None
+        if on_pipeline:
+            on_pipeline(pipeline)
+        stats = pipeline.run()
+        if cache_before:
+            cache_after = self.embedding_cache.stats()
+            stats.embedding_cache_hits = cache_after["hits"] - cache_before["hits"]
+            stats.embedding_cache_misses = cache_after["misses"] - cache_before["misses"]
+
+        # Books that produced no chunks (e.g. scanned PDFs with no text) never reach _file_split
+        for path in list(checkpoint.files):
+            self._complete_file(path)
+        checkpoint.clear()
+        print(f"Successfully added {stats.chunks} documents to the vector store: {stats.summary()}")
+        if scheduler:
+            print(f"Embedding scheduler: {scheduler.stats.summary()}")
+        print(f"Stage timings: {pipeline.telemetry.summary()}")
+        report_path = write_report(
+            pipeline.report(), os.getenv("INGEST_REPORT_DIR", os.path.join(self.db_path, "ingest_reports"))
+        )
+        print(f"Ingestion report written to {report_path}")
+        self.refresh_section_index(batch_size)
+        self.refresh_mmap_index()
+        return stats
+
+    def export_mmap_index(self, dtype: str = "float32", nlist: int | None = None, dimensions: int | None = None) -> dict:
+        """Exports the collection to MMAP_INDEX_PATH for the mmap backend. See database/mmap_index.py."""
+        return export_index(self.chroma_collection(), self.mmap_index_path, dtype=dtype, nlist=nlist, dimensions=dimensions)
+
+    def refresh_mmap_index(self) -> None:
+        """Re-exports the memory-mapped index after an ingest, if there is one being served."""
+        meta = read_index_meta(self.mmap_index_path)
+        if meta is not None:
+            self.export_mmap_index(dtype=meta["dtype"], dimensions=meta.get("compact_dim"))
+
+    def refresh_section_index(self, batch_size: int = 5000) -> None:
+        """
+        Brings the book and section summary vectors in line with the manifest: books that are
+        new or changed since their sections were built get them (re)built from their stored
+        chunks, and books that are gone are dropped. The first run builds them for every book.
         
-        # ChromaDB has a max batch size limit, so we need to batch the documents
-        batch_size = 5000  # Safe batch size under ChromaDB's limit of 5461
-        total_docs = len(documents)
+        Args:
+            batch_size: How many chunks to read at a time.
+        """
+        if self.section_index is None:
+            return
+        manifest = IngestionManifest.load(self.db_path)
+        indexed = self.section_index.books()
+        for book in indexed.keys() - manifest.files.keys():
+            self.section_index.delete_book(book)
+        stale = [book for book, entry in manifest.files.items() if indexed.get(book) != entry["sha256"]]
+        if stale:
+            print(f"Building section summaries for {len(stale)} books...")
+        for book in stale:
+            ids, metadatas, vectors = [], [], []
+            chunk_ids = manifest.chunk_ids(book)
+            for i in range(0, len(chunk_ids), batch_size):
+                page = self._fetch(chunk_ids[i:i + batch_size], ["metadatas", "embeddings"])
+                ids.extend(page["ids"])
+                metadatas.extend(page["metadatas"])
+                vectors.extend(page["embeddings"])
+            vector, sections = build_sections(
+                os.path.join(self.directory, book), ids, metadatas, np.asarray(vectors),
+                pages_per_section=int(os.getenv("SECTION_PAGES", "20")),
+            )
+            self.section_index.replace_book(book, manifest.files[book]["sha256"], vector, sections)
+        self.section_index.load()
+
+    def version(self):
+        """A marker that changes whenever what this store serves does, e.g. for caches and reloads."""
+        if self.mmap_index is not None:
+            stamp = index_stamp(self.mmap_index_path)
+        else:
+            stamp = manifest_stamp(self.db_path)
+        # Sections are rebuilt after the last book is committed, so they count separately
+        if self.section_index is not None:
+            return stamp, self.section_index.stamp()
+        return stamp
+
+    def plan_ingest(self, manifest: IngestionManifest, diff, incremental: bool = True, batch_size: int = 5000) -> list[str]:
+        """
+        Works out which books to ingest and deletes the chunks of removed or changed ones,
+        so the books can be (re)written from scratch.
         
-        print(f"Adding {total_docs} documents in batches of {batch_size}...")
+        Args:
+            manifest: The ingestion manifest. Saved once the stale books are forgotten.
+            diff: The manifest's diff against the documents directory.
+            incremental: Set to False to re-ingest every book, even unchanged ones.
+            batch_size: Chunks per delete.
+        Returns:
+            The paths to ingest.
+        """
+        print(f"Ingestion manifest: {diff.summary()}")
+        to_ingest = diff.to_ingest if incremental else sorted(diff.to_ingest + diff.unchanged)
+        stale = diff.removed + [manifest.key(path, self.directory) for path in to_ingest]
+        still_referenced = manifest.referenced_ids(excluding=stale)
+        stale_ids = [
+            chunk_id for key in stale for chunk_id in manifest.chunk_ids(key)
+            if chunk_id not in still_referenced
+        ]
+        if stale_ids:
+            print(f"Deleting {len(stale_ids)} chunks from removed or changed books...")
+            self._delete_chunks(stale_ids, batch_size)
+        for key in stale:
+            manifest.forget(key)
+        manifest.save()
+        return to_ingest
+
+    def ingest_files(self, files: list[str], file_hashes: dict[str, str], batch_size: int = 5000) -> tuple[IngestionStats, dict[str, list[str]]]:
+        """
+        Runs the ingestion pipeline over some books without touching the manifest or checkpoint,
+        for workers that ingest books handed to them by someone else (who keeps the manifest,
+        and the keyword index, see index_keywords). Chunk IDs are stable, so ingesting a book
+        again just overwrites what's there.
         
-        for i in tqdm.tqdm(range(0, total_docs, batch_size), desc="Adding documents"):
-            batch = documents[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_docs + batch_size - 1) // batch_size
-            
-            print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} documents)...")
-            self.vector_store.add_documents(batch)
+        Args:
+            files: The books.
+            file_hashes: SHA-256 of each book, which chunk IDs are derived from.
+            batch_size: Chunks per write.
+        Returns:
+            The stats for the run, and the IDs of the chunks written for each book.
+        """
+        written: dict[str, list[str]] = {path: [] for path in files}
+        lock = threading.Lock()
+
+        def write_batch(batch: list, vectors: list[list[float]] | None = None) -> None:
+            ids_by_source = self._upsert_chunks(batch, vectors, index_keywords=False)
+            with lock:
+                for source, chunk_ids in ids_by_source.items():
+                    written[source].extend(chunk_ids)
+
+        self._file_hashes = dict(file_hashes)
+        pipeline = IngestionPipeline(
+            self._document_loader(),
+            write_batch=write_batch,
+            batch_size=batch_size,
+            files=files,
+            file_hashes=self._file_hashes,
+            embed_scheduler=self._embedding_scheduler(),
+            telemetry=self._telemetry(),
+            **self._chunk_filters(),
+        )
+        stats = pipeline.run()
+        return stats, written
+
+    def _document_loader(self) -> DocumentLoader:
+        loader = DocumentLoader(self.directory)
+        if os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true":
+            # Keyed by backend too, since each extractor gives slightly different text
+            loader.text_cache = PageTextCache(
+                os.getenv("TEXT_CACHE_DIR", os.path.join(self.db_path, "text_cache")), extractor=loader.backend.name
+            )
+        return loader
+
+    def _telemetry(self) -> IngestionTelemetry:
+        """Stage telemetry, streaming snapshots to INGEST_METRICS_SINK (statsd://host:port or a .jsonl path) if set."""
+        return IngestionTelemetry(sink=open_metrics_sink(os.getenv("INGEST_METRICS_SINK")))
+
+    def _chunk_filters(self) -> dict:
+        """Header/footer and near-duplicate filters for the ingestion pipeline, as configured."""
+        filters = {}
+        if os.getenv("INGEST_FILTER_BOILERPLATE", "true").lower() == "true":
+            filters["boilerplate_filter"] = BoilerplateFilter()
+        if os.getenv("INGEST_FILTER_NEAR_DUPLICATES", "true").lower() == "true":
+            filters["duplicate_filter"] = NearDuplicateFilter(
+                threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+            )
+        return filters
+
+    def _chunk_id(self, chunk) -> str:
+        return make_chunk_id(
+            self._file_hashes[chunk.metadata["source"]],
+            chunk.metadata.get("page", 0),
+            chunk.metadata.get("start_index", 0),
+        )
+
+    def _is_committed(self, chunk) -> bool:
+        """True if an earlier (interrupted) run already stored this chunk."""
+        with self._checkpoint_lock:
+            return self._checkpoint.is_committed(chunk.metadata["source"], self._chunk_id(chunk))
+
+    def _file_split(self, source: str, chunk_count: int) -> None:
+        with self._checkpoint_lock:
+            self._checkpoint.set_total(source, chunk_count)
+            if self._checkpoint.is_complete(source):
+                self._complete_file(source)
+            self._checkpoint.save()
+
+    def _complete_file(self, source: str) -> None:
+        """Moves a fully committed book from the checkpoint into the manifest.
+
+        A book with pages that couldn't be read is recorded as failed, so the next run tries it again.
+        """
+        failed = source in self._parse_failures
+        failed_attempts = self._manifest.record(
+            source, self.directory, self._file_hashes[source], self._checkpoint.chunk_ids(source), failed=failed
+        )
+        if failed_attempts:
+            retrying = failed_attempts < self._manifest.max_failed_attempts
+            print(
+                f"Some pages of {source} couldn't be read (attempt {failed_attempts} of "
+                f"{self._manifest.max_failed_attempts}); "
+                + ("it will be ingested again next run." if retrying else "keeping what could be read.")
+            )
+        self._manifest.save()
+        self._checkpoint.finish_file(source)
+
+    def _discard_checkpoint(self, checkpoint: IngestionCheckpoint, manifest: IngestionManifest, sources: list[str], batch_size: int) -> None:
+        """Deletes chunks an interrupted run wrote for these books and forgets them."""
+        if not sources:
+            return
+        still_referenced = manifest.referenced_ids(excluding=[])
+        orphans = [
+            chunk_id for source in sources for chunk_id in checkpoint.chunk_ids(source)
+            if chunk_id not in still_referenced
+        ]
+        self._delete_chunks(orphans, batch_size)
+        for source in sources:
+            checkpoint.finish_file(source)
+        checkpoint.save()
+
+    def _embedding_scheduler(self) -> EmbeddingScheduler | None:
+        """
+        Builds the async embedding scheduler from env settings.
+        Off by default (EMBEDDING_MAX_CONCURRENCY=1), which leaves each Chroma write to embed
+        its own batch; set it above 1 to embed several batches at once.
+        """
+        max_concurrency = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "1"))
+        if max_concurrency <= 1:
+            return None
+        return EmbeddingScheduler(
+            self.vector_store.embeddings,
+            max_concurrency=max_concurrency,
+            tokens_per_minute=int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000")),
+            request_size=int(os.getenv("EMBEDDING_REQUEST_SIZE", "500")),
+        )
+
+    def _write_batch(self, batch: list, vectors: list[list[float]] | None = None) -> None:
+        """
+        Upserts one batch of chunks, then checkpoints which books and chunks are now done.
+        IDs are derived from (file hash, page, chunk offset), so writing the same chunk twice
+        overwrites it instead of adding a duplicate.
+        
+        Args:
+            batch: The chunks.
+            vectors: Their embeddings, if the scheduler already did the work. Otherwise
+                Chroma embeds them as part of the write.
+        """
+        ids_by_source = self._upsert_chunks(batch, vectors)
+        with self._checkpoint_lock:
+            for source, chunk_ids in ids_by_source.items():
+                self._checkpoint.commit(source, chunk_ids)
+                if self._checkpoint.is_complete(source):
+                    self._complete_file(source)
+            self._checkpoint.batches_committed += 1
+            self._checkpoint.save()
+
+    def _upsert_chunks(self, batch: list, vectors: list[list[float]] | None = None, index_keywords: bool = True) -> dict[str, list[str]]:
+        """Upserts chunks under their stable IDs (into the keyword index too) and returns the IDs, grouped by book."""
+        ids, chunks, chunk_vectors = {}, [], []
+        ids_by_source: dict[str, list[str]] = {}
+        for i, chunk in enumerate(batch):
+            chunk_id = self._chunk_id(chunk)
+            ids_by_source.setdefault(chunk.metadata["source"], []).append(chunk_id)
+            # Identical copies of a book produce identical IDs; Chroma rejects repeats in one upsert
+            if chunk_id not in ids:
+                ids[chunk_id] = None
+                chunks.append(chunk)
+                if vectors is not None:
+                    chunk_vectors.append(vectors[i])
+
+        if vectors is None:
+            self.vector_store.add_documents(chunks, ids=list(ids))
+        else:
+            self.chroma_collection().upsert(
+                ids=list(ids),
+                embeddings=chunk_vectors,
+                documents=[chunk.page_content for chunk in chunks],
+                metadatas=[chunk.metadata for chunk in chunks],
+            )
+        if index_keywords and self.keyword_index is not None:
+            self.keyword_index.upsert(list(ids), chunks)
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.clear()
+        return ids_by_source
+
+    def _delete_chunks(self, ids: list[str], batch_size: int = 5000) -> None:
+        """Deletes chunks by ID, in batches that stay under ChromaDB's limit."""
+        for i in range(0, len(ids), batch_size):
+            self.vector_store.delete(ids=ids[i:i + batch_size])
+        if self.keyword_index is not None:
+            self.keyword_index.delete(ids)
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.clear()
+
+    def index_keywords(self, ids: list[str], batch_size: int = 5000) -> None:
+        """Copies chunks someone else wrote to the collection into this keyword index.
+
+        Args:
+            ids: The chunk IDs.
+            batch_size: How many chunks to read from Chroma at a time.
+        """
+        if self.keyword_index is None:
+            return
+        for i in range(0, len(ids), batch_size):
+            page = self.vector_store.get(ids=ids[i:i + batch_size], include=["metadatas", "documents"])
+            self.keyword_index.upsert(page["ids"], [
+                Document(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(page["documents"], page["metadatas"])
+            ])
+
+    def _backfill_keyword_index(self, batch_size: int = 5000) -> None:
+        """Builds the keyword index from the collection if it was made before the index existed."""
+        if self.keyword_index is None or self.keyword_index.count() or not self.chroma_collection().count():
+            return
+
+        def batches():
+            offset = 0
+            while True:
+                page = self.vector_store.get(include=["metadatas", "documents"], limit=batch_size, offset=offset)
+                if not page["ids"]:
+                    return
+                yield page["ids"], [
+                    Document(page_content=text or "", metadata=metadata or {})
+                    for text, metadata in zip(page["documents"], page["metadatas"])
+                ]
+                offset += len(page["ids"])
+
+        print("Building the keyword index from the existing collection...")
+        print(f"Indexed {self.keyword_index.rebuild(batches())} chunks for keyword search.")
+
+    def deduplicate(self, batch_size: int = 5000) -> int:
+        """
+        One-off cleanup for collections built before chunk IDs were deterministic, where every
+        re-run appended another copy of each chunk.
+        
+        Keeps one chunk per (source, page, text) and deletes the rest. Books that are still on
+        disk get their surviving chunks adopted into the ingestion manifest, so the next
+        incremental run doesn't embed them all over again.
         
-        print(f"Successfully added all {total_docs} documents to the vector store.")
+        Args:
+            batch_size: How many chunks to read and delete at a time.
+        Returns:
+            The number of chunks deleted.
+        """
+        seen = set()
+        duplicates = []
+        kept_by_source: dict[str, list[str]] = {}
+        offset = 0
+        while True:
+            page = self.vector_store.get(include=["metadatas", "documents"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            for chunk_id, metadata, text in zip(page["ids"], page["metadatas"], page["documents"]):
+                metadata = metadata or {}
+                key = (metadata.get("source"), metadata.get("page"), hashlib.sha1((text or "").encode("utf-8")).hexdigest())
+                if key in seen:
+                    duplicates.append(chunk_id)
+                else:
+                    seen.add(key)
+                    kept_by_source.setdefault(metadata.get("source"), []).append(chunk_id)
+            offset += len(page["ids"])
 
+        print(f"Found {len(duplicates)} duplicate chunks out of {offset}.")
+        self._delete_chunks(duplicates, batch_size)
+
+        manifest = IngestionManifest.load(self.db_path)
+        adopted = 0
+        for source, chunk_ids in kept_by_source.items():
+            if not source or not os.path.isfile(source):
+                continue
+            try:
+                key = manifest.key(source, self.directory)
+            except ValueError:
+                continue  # Not under the documents directory
+            if key not in manifest.files:
+                manifest.record(source, self.directory, file_sha256(source), chunk_ids)
+                adopted += 1
+        manifest.save()
+        print(f"Adopted {adopted} books into the ingestion manifest.")
+        return len(duplicates)
+
+
+    def reopen(self) -> "VectorStore":
+        """
+        A new handle on the same collection that also sees chunks ingested since this one was opened.
+        This handle is left alone, so requests still using it aren't disturbed.
+        """
+        fresh = VectorStore(self.name, self.db_path, self.directory)
+        fresh.initialise_vector_store(embeddings=self.embeddings, reload=True, backend=self.backend)
+        return fresh
 
     def get_retriever(self, search_type: str = "mmr", k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5):
         """
@@ -72,12 +734,28 @@ class VectorStore:
         MMR (Maximal Marginal Relevance) is the default because it tries to find distinct info
         rather than just giving you 5 versions of the same paragraph.
         
+        "hierarchical" searches books, then their sections, then only the chunks of the best
+        sections (see hierarchical_search).
+        
         Args:
             search_type: How to search (MMR is usually best).
             k: How many docs you want.
             fetch_k: How many to look at before picking the best ones (for MMR).
             lambda_mult: Diversity vs Relevance slider.
+        Raises:
+            ValueError: On the mmap backend, for a search type other than mmr, similarity or hierarchical.
         """
+        if search_type == "hierarchical":
+            return HierarchicalRetriever(search=self.hierarchical_search, k=k, lambda_mult=lambda_mult)
+        if self.vector_store is None:
+            # The mmap backend has no LangChain vector store to hand out a retriever, so search it directly
+            if search_type == "mmr":
+                search = functools.partial(self.mmr_search, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+            elif search_type == "similarity":
+                search = functools.partial(self._nearest_documents, n=k)
+            else:
+                raise ValueError(f"The mmap backend supports mmr, similarity and hierarchical retrievers, not {search_type!r}")
+            return EmbeddingSearchRetriever(search=search, embed_query=self.embeddings.embed_query)
         search_kwargs = {"k": k}
         if search_type == "mmr":
             search_kwargs.update({
@@ -90,17 +768,290 @@ class VectorStore:
             search_kwargs=search_kwargs
         )
 
-    def query_vector_store(self, query: str, k: int = 6):
+    def query_vector_store(self, query: str, k: int = 6, timings: dict[str, float] | None = None, embedding: list[float] | None = None):
         """
         Simple direct query. 
-        Uses MMR to keep things fresh and diverse.
+        Uses MMR to keep things fresh and diverse, hybrid keyword + vector search when
+        RETRIEVAL_MODE=hybrid (and there's a keyword index), or book -> section -> chunk
+        search when RETRIEVAL_MODE=hierarchical (and there are sections).
+        
+        Args:
+            query: What to look for.
+            k: How many chunks to return.
+            timings: Filled in with how long each stage took, in milliseconds, if given.
+            embedding: The query's embedding, if it's already been worked out.
         """
-        return self.vector_store.max_marginal_relevance_search(
-            query,
+        if self._retrieval_mode() == "hybrid":
+            return self.hybrid_search(query, k=k, timings=timings, embedding=embedding)
+        if self._retrieval_mode() == "hierarchical":
+            return self.hierarchical_search(query, k=k, timings=timings, embedding=embedding)
+        started = time.perf_counter()
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        documents = self.mmr_search(
+            embedding,
             k=k,
-            fetch_k=20,
-            lambda_mult=0.5
+            fetch_k=int(os.getenv("MMR_FETCH_K", "100")),
+            lambda_mult=0.5,
+            timings=timings,
         )
+        if timings is not None:
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
+        return documents
+
+    def mmr_search(
+        self,
+        embedding: list[float],
+        k: int = 6,
+        fetch_k: int = 100,
+        lambda_mult: float = 0.5,
+        timings: dict[str, float] | None = None,
+    ) -> list[Document]:
+        """
+        MMR over the fetch_k nearest chunks, reusing the vectors Chroma hands back with them.
+        
+        The candidates come back from one query, embeddings included, and the diversity
+        selection is plain NumPy (see database/mmr.py), so fetch_k can go into the hundreds
+        without it showing in the latency.
+        
+        Args:
+            embedding: The query's embedding.
+            k: How many chunks to return.
+            fetch_k: How many nearest chunks to choose from.
+            lambda_mult: Diversity vs Relevance slider.
+            timings: Filled in with vector_ms (the candidate fetch) and mmr_ms, if given.
+        Returns:
+            The chunks, in the order MMR picked them, with their cosine similarity to the
+            query in metadata["relevance_score"].
+        """
+        started = time.perf_counter()
+        results = self._nearest(embedding, fetch_k, ["documents", "metadatas", "embeddings"])
+        fetched = time.perf_counter()
+        ids = results["ids"]
+        picked, relevance = [], []
+        if ids:
+            vectors = np.asarray(results["embeddings"])
+            picked = maximal_marginal_relevance(np.asarray(embedding), vectors, k, lambda_mult)
+            relevance = cosine_similarity(np.asarray(embedding), vectors)
+        documents = [
+            Document(
+                page_content=results["documents"][i] or "",
+                metadata={**(results["metadatas"][i] or {}), "relevance_score": float(relevance[i])},
+                id=ids[i],
+            )
+            for i in picked
+        ]
+        if timings is not None:
+            timings["vector_ms"] = (fetched - started) * 1000
+            timings["mmr_ms"] = (time.perf_counter() - fetched) * 1000
+        return documents
+
+    def _nearest(self, embedding: list[float], n: int, include: list[str]) -> dict:
+        """The n chunks nearest an embedding, from whichever backend is open, as lists keyed like `include`."""
+        if self.mmap_index is not None:
+            return self.mmap_index.nearest(embedding, n, include)
+        results = self.chroma_collection().query(query_embeddings=[embedding], n_results=n, include=include)
+        return {key: results[key][0] for key in ["ids", *include]}
+
+    def _nearest_documents(self, embedding: list[float], n: int) -> list[Document]:
+        results = self._nearest(embedding, n, ["documents", "metadatas"])
+        return [
+            Document(page_content=text or "", metadata=metadata or {}, id=chunk_id)
+            for chunk_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+
+    def _fetch(self, ids: list[str], include: list[str]) -> dict:
+        """Chunks by ID, from whichever backend is open. Missing IDs are left out."""
+        if self.mmap_index is not None:
+            return self.mmap_index.get(ids, include)
+        return self.chroma_collection().get(ids=ids, include=include)
+
+    def retrieve(self, query: str, k: int = 6, timings: dict[str, float] | None = None) -> tuple[list[Document], bool]:
+        """
+        query_vector_store, but a question close enough to a recent one (a paraphrase, say)
+        gets that question's chunks back without searching again.
+        
+        Args:
+            query: What to look for.
+            k: How many chunks to return.
+            timings: Filled in with how long each stage took, in milliseconds, if given.
+        Returns:
+            The chunks, and whether they came from the retrieval cache.
+        """
+        if self.retrieval_cache is None:
+            return self.query_vector_store(query, k, timings=timings), False
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        embedding = self.embeddings.embed_query(query)
+        timings["embed_ms"] = (time.perf_counter() - started) * 1000
+        # Changes whenever books are committed (or the mmap index is re-exported), by any process
+        version = self.version()
+        mode = self._retrieval_mode()
+        scope = (mode, k)
+        if mode == "hybrid":
+            # The keyword half matches exact words, which a paraphrase needn't share
+            scope += (tuple(sorted(self.keyword_index.query_terms(query))),)
+
+        lookup_started = time.perf_counter()
+        ids = self.retrieval_cache.lookup(embedding, scope=scope, version=version)
+        if ids is not None:
+            page = self._fetch(ids, ["metadatas", "documents", "embeddings"])
+            scores = cosine_similarity(np.asarray(embedding), np.asarray(page["embeddings"])) if page["ids"] else []
+            found = {
+                chunk_id: Document(page_content=text or "", metadata={**(metadata or {}), "relevance_score": float(score)}, id=chunk_id)
+                for chunk_id, text, metadata, score in zip(page["ids"], page["documents"], page["metadatas"], scores)
+            }
+            timings["cache_ms"] = (time.perf_counter() - lookup_started) * 1000
+            # A chunk can only go missing if it was deleted without the manifest changing
+            if len(found) == len(ids):
+                timings["total_ms"] = (time.perf_counter() - started) * 1000
+                return [found[chunk_id] for chunk_id in ids], True
+        timings["cache_ms"] = (time.perf_counter() - lookup_started) * 1000
+
+        documents = self.query_vector_store(query, k, timings=timings, embedding=embedding)
+        self.retrieval_cache.store(embedding, [document.id for document in documents], scope=scope, version=version)
+        timings["total_ms"] = (time.perf_counter() - started) * 1000
+        return documents, False
+
+    def _retrieval_mode(self) -> str:
+        mode = os.getenv("RETRIEVAL_MODE", "mmr").lower()
+        if mode == "hybrid" and self.keyword_index is not None:
+            return "hybrid"
+        if mode == "hierarchical" and self.section_index is not None and self.section_index.count():
+            return "hierarchical"
+        return "mmr"
+
+    def hierarchical_search(
+        self,
+        query: str,
+        k: int = 6,
+        lambda_mult: float = 0.5,
+        timings: dict[str, float] | None = None,
+        embedding: list[float] | None = None,
+    ) -> list[Document]:
+        """
+        Two-stage search: the question is compared with every book's summary vector, then with
+        the sections of the SECTION_TOP_BOOKS best books (default 5), and MMR then runs over the
+        chunks of the SECTION_TOP_N best sections (default 8) only. However big the library
+        gets, a search scores a few books' sections and a few sections' chunks, and chunks
+        from books that are off topic as a whole can't crowd out the ones that aren't.
+        
+        Args:
+            query: What to look for.
+            k: How many chunks to return.
+            lambda_mult: Diversity vs Relevance slider (1.0 is plain similarity).
+            timings: Filled in with section_ms, vector_ms, mmr_ms and total_ms, if given.
+            embedding: The query's embedding, if it's already been worked out.
+        Returns:
+            The chunks, in the order MMR picked them, with their cosine similarity to the
+            query in metadata["relevance_score"] and their section's title in metadata["section"].
+        """
+        started = time.perf_counter()
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        sections = self.section_index.search(
+            embedding,
+            top_books=int(os.getenv("SECTION_TOP_BOOKS", "5")),
+            top_sections=int(os.getenv("SECTION_TOP_N", "8")),
+        )
+        section_of = {chunk_id: section["title"] for section, _ in sections for chunk_id in section["chunk_ids"]}
+        searched = time.perf_counter()
+
+        candidates = self._fetch(list(section_of), ["embeddings"])
+        fetched = time.perf_counter()
+        documents = []
+        if candidates["ids"]:
+            vectors = np.asarray(candidates["embeddings"])
+            picked = maximal_marginal_relevance(np.asarray(embedding), vectors, k, lambda_mult)
+            relevance = cosine_similarity(np.asarray(embedding), vectors)
+            # Text and metadata only for the chunks that made it
+            ids = [candidates["ids"][i] for i in picked]
+            page = self._fetch(ids, ["documents", "metadatas"])
+            found = dict(zip(page["ids"], zip(page["documents"], page["metadatas"])))
+            for i, chunk_id in zip(picked, ids):
+                text, metadata = found[chunk_id]
+                documents.append(Document(
+                    page_content=text or "",
+                    metadata={**(metadata or {}), "relevance_score": float(relevance[i]), "section": section_of[chunk_id]},
+                    id=chunk_id,
+                ))
+        if timings is not None:
+            timings["section_ms"] = (searched - started) * 1000
+            timings["vector_ms"] = (fetched - searched) * 1000
+            timings["mmr_ms"] = (time.perf_counter() - fetched) * 1000
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
+        return documents
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = 6,
+        fetch_k: int = 20,
+        rrf_k: int = 60,
+        timings: dict[str, float] | None = None,
+        embedding: list[float] | None = None,
+    ) -> list[Document]:
+        """
+        Vector and BM25 keyword search at the same time, merged with reciprocal rank fusion.
+        
+        The keyword side finds passages that hinge on an exact identifier ("systemctl mask",
+        `__slots__`, an error code) that embeddings tend to blur. Each chunk scores
+        sum(1 / (rrf_k + rank)) over the two rankings, so only ranks matter, not how either
+        side's scores are scaled.
+        
+        Args:
+            query: What to look for.
+            k: How many chunks to return.
+            fetch_k: How many chunks to take from each side before fusing.
+            rrf_k: Damping constant; larger values flatten the difference between top ranks.
+            timings: Filled in with vector_ms, keyword_ms, fusion_ms and total_ms, if given.
+            embedding: The query's embedding, if it's already been worked out.
+        Returns:
+            The chunks, best first, with their fused score in metadata["rrf_score"] and their
+            cosine similarity to the query in metadata["relevance_score"].
+        """
+        started = time.perf_counter()
+
+        def timed(search, *args):
+            search_started = time.perf_counter()
+            return search(*args), (time.perf_counter() - search_started) * 1000
+
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        vector_future = _SEARCH_POOL.submit(timed, self._nearest_documents, embedding, fetch_k)
+        keyword_future = _SEARCH_POOL.submit(timed, self.keyword_index.search, query, fetch_k)
+        vector_hits, vector_ms = vector_future.result()
+        keyword_hits, keyword_ms = keyword_future.result()
+
+        fusion_started = time.perf_counter()
+        scores: dict[str, float] = {}
+        documents: dict[str, Document] = {}
+        rankings = [[(document.id, document) for document in vector_hits], [(chunk_id, document) for chunk_id, document, _ in keyword_hits]]
+        for ranking in rankings:
+            for rank, (chunk_id, document) in enumerate(ranking, start=1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (rrf_k + rank)
+                documents.setdefault(chunk_id, document)
+        fused = sorted(scores, key=scores.get, reverse=True)[:k]
+        # Keyword-only hits have no vector score yet, so score every fused chunk the same way
+        relevance = {}
+        if fused:
+            page = self._fetch(fused, ["embeddings"])
+            if page["ids"]:
+                relevance = dict(zip(page["ids"], cosine_similarity(np.asarray(embedding), np.asarray(page["embeddings"]))))
+        results = []
+        for chunk_id in fused:
+            document = documents[chunk_id]
+            metadata = {**document.metadata, "rrf_score": scores[chunk_id], "relevance_score": float(relevance.get(chunk_id, 0.0))}
+            results.append(Document(page_content=document.page_content, metadata=metadata, id=chunk_id))
+
+        if timings is not None:
+            timings.update({
+                "vector_ms": vector_ms,
+                "keyword_ms": keyword_ms,
+                "fusion_ms": (time.perf_counter() - fusion_started) * 1000,
+                "total_ms": (time.perf_counter() - started) * 1000,
+            })
+        return results
 
 if __name__ == "__main__":
     vector_store = VectorStore(
@@ -108,6 +1059,6 @@ if __name__ == "__main__":
         db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
         documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
     )
-    vector_store.initialise_vector_store()
+    vector_store.initialise_vector_store(backend="chroma")
     vector_store.upsert_documents()
     print(vector_store.vector_store.get())
\ No newline at end of file
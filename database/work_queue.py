@@ -0,0 +1,400 @@
+import sys
+from pathlib import Path
+import collections
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+@dataclass
+class WorkItem:
+    """One book to ingest, as handed from the coordinator to a worker."""
+    key: str  # Path relative to the documents directory, which may be mounted elsewhere on each worker
+    sha256: str
+    attempts: int = 0
+    # Identifies one claim of the item, so a worker whose lease ran out can't release the next one's
+    receipt: str = field(default="", compare=False, repr=False)
+
+    def to_json(self) -> str:
+        return json.dumps({"key": self.key, "sha256": self.sha256, "attempts": self.attempts}, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "WorkItem":
+        return cls(**json.loads(data))
+
+
+class WorkQueue(ABC):
+    """
+    A queue of books with at-least-once delivery.
+
+    A claimed item is leased to its worker. If the worker doesn't complete it (or renew the
+    lease with heartbeat()) before the lease runs out, the item goes back on the queue for
+    someone else, so a crashed worker never loses a book. The flip side is that a book can be
+    ingested twice, which is fine because chunk IDs are stable and writes are upserts.
+
+    Every claim gets its own receipt. Heartbeats, completions and failures only count while
+    the lease they name is still the current one, so a worker that went quiet for too long
+    can't extend, finish or requeue the book on behalf of whoever has it now.
+    """
+
+    def __init__(self, lease_seconds: float = 300.0, max_attempts: int = 3):
+        """
+        Args:
+            lease_seconds: How long a worker can hold an item without a heartbeat.
+            max_attempts: How many times an item is tried before it's given up on.
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def put(self, item: WorkItem) -> None:
+        ...
+
+    @abstractmethod
+    def claim(self) -> WorkItem | None:
+        """Takes the next item (requeueing any whose lease ran out first), or None if there's nothing to do right now."""
+
+    @abstractmethod
+    def heartbeat(self, item: WorkItem) -> None:
+        """Extends the lease on a claimed item."""
+
+    @abstractmethod
+    def complete(self, item: WorkItem, result: dict) -> bool:
+        """Marks an item done and publishes the worker's result for the coordinator.
+
+        Returns:
+            False, having done nothing, if the lease was lost to another claim.
+        """
+
+    @abstractmethod
+    def fail(self, item: WorkItem, error: str) -> bool:
+        """Puts an item back for another try, or records it as failed once it's out of attempts.
+
+        Returns:
+            False, having done nothing, if the lease was lost to another claim.
+        """
+
+    @abstractmethod
+    def take_results(self) -> list[dict]:
+        """Removes and returns the results published so far. Failures come with an "error" key."""
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """How many items are pending and claimed."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forgets everything, ready for a new run."""
+
+    def _retry(self, item: WorkItem) -> WorkItem | None:
+        """The item to requeue after a failure, or None once it's out of attempts."""
+        if item.attempts + 1 < self.max_attempts:
+            return WorkItem(item.key, item.sha256, item.attempts + 1)
+        return None
+
+    @staticmethod
+    def _failure(item: WorkItem, error: str) -> dict:
+        return {"key": item.key, "sha256": item.sha256, "error": error}
+
+
+class InMemoryWorkQueue(WorkQueue):
+    """A queue for coordinator and workers running as threads of one process (and for tests)."""
+
+    def __init__(self, lease_seconds: float = 300.0, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def put(self, item: WorkItem) -> None:
+        with self._lock:
+            self._pending.append(item)
+
+    def claim(self) -> WorkItem | None:
+        with self._lock:
+            now = time.time()
+            for key, (item, deadline) in list(self._leases.items()):
+                if deadline <= now:
+                    del self._leases[key]
+                    self._pending.append(item)
+            if not self._pending:
+                return None
+            pending = self._pending.popleft()
+            # A copy, so the worker that held an expired lease keeps its own receipt
+            item = WorkItem(pending.key, pending.sha256, pending.attempts, receipt=uuid.uuid4().hex)
+            self._leases[item.key] = (item, now + self.lease_seconds)
+            return item
+
+    def heartbeat(self, item: WorkItem) -> None:
+        with self._lock:
+            if self._holds(item):
+                self._leases[item.key] = (item, time.time() + self.lease_seconds)
+
+    def complete(self, item: WorkItem, result: dict) -> bool:
+        with self._lock:
+            if not self._holds(item):
+                return False
+            del self._leases[item.key]
+            self._results.append(result)
+            return True
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        with self._lock:
+            if not self._holds(item):
+                return False
+            del self._leases[item.key]
+            retry = self._retry(item)
+            if retry:
+                self._pending.append(retry)
+            else:
+                self._results.append(self._failure(item, error))
+            return True
+
+    def take_results(self) -> list[dict]:
+        with self._lock:
+            results, self._results = self._results, []
+            return results
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), "claimed": len(self._leases)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending: collections.deque[WorkItem] = collections.deque()
+            self._leases: dict[str, tuple[WorkItem, float]] = {}
+            self._results: list[dict] = []
+
+    def _holds(self, item: WorkItem) -> bool:
+        lease = self._leases.get(item.key)
+        return lease is not None and lease[0].receipt == item.receipt
+
+
+class FileWorkQueue(WorkQueue):
+    """
+    A queue in a directory, for workers on one machine or sharing a network filesystem.
+
+    Each item is a file in pending/. Claiming renames it into claimed/ under a new name that
+    is the claim's receipt, which only one worker can win, and the claimed file's mtime is its
+    lease. An expired lease goes back to pending/ under the original name. Each result is a
+    file in results/, written aside and renamed in so the coordinator never reads half of one.
+    """
+
+    def __init__(self, directory: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self.directory = Path(directory)
+        self._pending = self.directory / "pending"
+        self._claimed = self.directory / "claimed"
+        self._results = self.directory / "results"
+        for directory in (self._pending, self._claimed, self._results):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def put(self, item: WorkItem) -> None:
+        self._write(self._pending, item.to_json())
+
+    def claim(self) -> WorkItem | None:
+        self._requeue_expired()
+        for path in sorted(self._pending.glob("*.json")):
+            claimed = self._claimed / f"{path.stem}.{uuid.uuid4().hex}.json"
+            try:
+                # Touch first: the rename keeps the mtime, which is the lease from then on
+                os.utime(path)
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # Another worker got there first
+            item = WorkItem.from_json(claimed.read_text(encoding="utf-8"))
+            item.receipt = claimed.name
+            return item
+        return None
+
+    def heartbeat(self, item: WorkItem) -> None:
+        try:
+            os.utime(self._claimed / item.receipt)
+        except FileNotFoundError:
+            pass  # Lease already ran out and someone else has it
+
+    def complete(self, item: WorkItem, result: dict) -> bool:
+        if not (self._claimed / item.receipt).exists():
+            return False
+        # Published before the lease is dropped, so a crash in between can't lose the book
+        self._put_result(result)
+        self._release(item)
+        return True
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        if not (self._claimed / item.receipt).exists():
+            return False
+        retry = self._retry(item)
+        if retry:
+            self.put(retry)
+        else:
+            self._put_result(self._failure(item, error))
+        self._release(item)
+        return True
+
+    def take_results(self) -> list[dict]:
+        results = []
+        for path in sorted(self._results.glob("*.json")):
+            results.append(json.loads(path.read_text(encoding="utf-8")))
+            path.unlink()
+        return results
+
+    def counts(self) -> dict[str, int]:
+        self._requeue_expired()
+        return {
+            "pending": sum(1 for _ in self._pending.glob("*.json")),
+            "claimed": sum(1 for _ in self._claimed.glob("*.json")),
+        }
+
+    def clear(self) -> None:
+        for directory in (self._pending, self._claimed, self._results):
+            for path in directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def _put_result(self, result: dict) -> None:
+        self._write(self._results, json.dumps(result))
+
+    def _write(self, directory: Path, data: str) -> None:
+        # Named by time so items are (roughly) handed out in the order they were queued
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.json"
+        tmp_path = self.directory / f"{name}.tmp"
+        tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, directory / name)
+
+    def _release(self, item: WorkItem) -> None:
+        (self._claimed / item.receipt).unlink(missing_ok=True)
+
+    def _requeue_expired(self) -> None:
+        cutoff = time.time() - self.lease_seconds
+        for path in self._claimed.glob("*.json"):
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    # Drop the receipt from the name
+                    os.rename(path, self._pending / f"{path.name.split('.')[0]}.json")
+            except FileNotFoundError:
+                continue
+
+
+# Lease members are the claim's receipt followed by the item's JSON
+_RECEIPT_LENGTH = 32
+
+# Claims atomically: requeue expired leases, pop the next item and lease it under a new receipt
+_REDIS_CLAIM = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, lease in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], lease)
+    redis.call('RPUSH', KEYS[1], string.sub(lease, %d))
+end
+local item = redis.call('LPOP', KEYS[1])
+if item then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3] .. item)
+    return ARGV[3] .. item
+end
+return false
+""" % (_RECEIPT_LENGTH + 1)
+
+# Releases a lease and pushes the result (or the retry) only if the lease was still held
+_REDIS_RELEASE = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    A queue in Redis, for workers spread over several machines.
+
+    Pending items are a list, leases a sorted set scored by deadline and results a list.
+    Taking the results reads and deletes the list in one transaction.
+    Claiming runs as one Lua script, so an item is never lost between being popped and leased,
+    and so does releasing a lease, so only the worker holding it can publish the outcome.
+    """
+
+    def __init__(self, url: str, name: str = "bookrag:ingest", lease_seconds: float = 300.0, max_attempts: int = 3):
+        """
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0.
+            name: Prefix for the keys this queue uses.
+        """
+        super().__init__(lease_seconds, max_attempts)
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self._pending = f"{name}:pending"
+        self._leases = f"{name}:leases"
+        self._results = f"{name}:results"
+        self._claim = self.redis.register_script(_REDIS_CLAIM)
+        self._release = self.redis.register_script(_REDIS_RELEASE)
+
+    def put(self, item: WorkItem) -> None:
+        self.redis.rpush(self._pending, item.to_json())
+
+    def claim(self) -> WorkItem | None:
+        now = time.time()
+        receipt = uuid.uuid4().hex
+        lease = self._claim(keys=[self._pending, self._leases], args=[now, now + self.lease_seconds, receipt])
+        if not lease:
+            return None
+        item = WorkItem.from_json(lease[_RECEIPT_LENGTH:])
+        item.receipt = receipt
+        return item
+
+    def heartbeat(self, item: WorkItem) -> None:
+        # XX: only extend a lease we still hold
+        self.redis.zadd(self._leases, {self._lease(item): time.time() + self.lease_seconds}, xx=True)
+
+    def complete(self, item: WorkItem, result: dict) -> bool:
+        return bool(self._release(keys=[self._leases, self._results], args=[self._lease(item), json.dumps(result)]))
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        retry = self._retry(item)
+        if retry:
+            keys, data = [self._leases, self._pending], retry.to_json()
+        else:
+            keys, data = [self._leases, self._results], json.dumps(self._failure(item, error))
+        return bool(self._release(keys=keys, args=[self._lease(item), data]))
+
+    def take_results(self) -> list[dict]:
+        with self.redis.pipeline() as pipe:
+            pipe.lrange(self._results, 0, -1)
+            pipe.delete(self._results)
+            results, _ = pipe.execute()
+        return [json.loads(data) for data in results]
+
+    def counts(self) -> dict[str, int]:
+        return {"pending": self.redis.llen(self._pending), "claimed": self.redis.zcard(self._leases)}
+
+    def clear(self) -> None:
+        self.redis.delete(self._pending, self._leases, self._results)
+
+    @staticmethod
+    def _lease(item: WorkItem) -> str:
+        return item.receipt + item.to_json()
+
+
+def open_work_queue(url: str, lease_seconds: float = 300.0) -> WorkQueue:
+    """Opens the queue a URL points at: redis://..., a directory path, or memory://.
+
+    Raises:
+        ValueError: If the URL isn't one of those.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue(url, lease_seconds=lease_seconds)
+    if url == "memory://":
+        return InMemoryWorkQueue(lease_seconds=lease_seconds)
+    if url.startswith("file://"):
+        return FileWorkQueue(url[len("file://"):], lease_seconds=lease_seconds)
+    if "://" in url:
+        raise ValueError(f"Unsupported work queue URL: {url}")
+    return FileWorkQueue(url, lease_seconds=lease_seconds)
@@ -0,0 +1,93 @@
+"""
+Fits the score-gated grading thresholds (GRADING_REJECT_SCORE / GRADING_ACCEPT_SCORE)
+against the LLM's own grades.
+
+Retrieves chunks for every evaluation question, has the LLM grade each one as the
+grade_documents node does, and saves (score, verdict) pairs to a CSV. Then picks the widest
+accept and reject bands in which the similarity score agrees with the LLM at least
+--precision of the time, and reports how many grading calls the gate would have saved.
+Later runs reuse the saved grades unless --regrade is given.
+
+Usage:
+    uv run python -m evaluation.calibrate_grading
+    uv run python -m evaluation.calibrate_grading --precision 0.9 --regrade
+"""
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import os
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from rag.grading import fit_thresholds
+
+load_dotenv()
+
+
+async def collect_grades(questions: list[str], k: int) -> pd.DataFrame:
+    """Retrieves k chunks per question and has the LLM grade each of them."""
+    from database.sharding import open_vector_store
+    from rag.chains import grade_documents_chain_async
+
+    vector_store = open_vector_store()
+
+    rows = []
+    for index, question in enumerate(questions, start=1):
+        print(f"Grading chunks for question {index}/{len(questions)}...")
+        docs = vector_store.query_vector_store(question, k)
+        grades = await asyncio.gather(*(grade_documents_chain_async(question, [doc.page_content]) for doc in docs))
+        for doc, grade in zip(docs, grades):
+            rows.append({
+                "question": question,
+                "chunk_id": doc.id,
+                "score": doc.metadata.get("relevance_score", 0.0),
+                "relevant": grade.relevant,
+                "overall_score": grade.review.overall_score,
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the score-gated grading thresholds to LLM grades.")
+    parser.add_argument("--questions", default="evaluation/data/ragas_data.csv", help="CSV with a Prompt column")
+    parser.add_argument("--grades", default="evaluation/results/grading_labels.csv", help="Where the LLM grades are kept")
+    parser.add_argument("--k", type=int, default=10, help="Chunks per question, as in retrieve_documents")
+    parser.add_argument("--precision", type=float, default=0.95, help="How often the gate must agree with the LLM")
+    parser.add_argument("--regrade", action="store_true", help="Ask the LLM again even if grades are saved")
+    args = parser.parse_args()
+
+    if os.path.exists(args.grades) and not args.regrade:
+        grades = pd.read_csv(args.grades)
+        print(f"Using {len(grades)} saved grades from {args.grades}")
+    else:
+        questions = [q for q in pd.read_csv(args.questions)["Prompt"].dropna()]
+        grades = asyncio.run(collect_grades(questions, args.k))
+        Path(args.grades).parent.mkdir(parents=True, exist_ok=True)
+        grades.to_csv(args.grades, index=False)
+        print(f"Saved {len(grades)} grades to {args.grades}")
+
+    gate = fit_thresholds(grades["score"].tolist(), grades["relevant"].astype(bool).tolist(), args.precision)
+    accepted = grades["score"] >= gate.accept
+    rejected = (grades["score"] < gate.reject) & ~accepted
+    agree = (grades.loc[accepted, "relevant"].sum() + (~grades.loc[rejected, "relevant"].astype(bool)).sum())
+    decided = int(accepted.sum() + rejected.sum())
+
+    print(f"{len(grades)} graded chunks, {grades['relevant'].mean():.0%} relevant")
+    print(f"Accepted without the LLM: {int(accepted.sum())}, dropped without the LLM: {int(rejected.sum())}")
+    print(f"LLM grading calls saved: {decided / len(grades):.0%}, agreement with the LLM on those: "
+          f"{agree / decided if decided else 1.0:.1%}")
+    print("Set these to use the gate:")
+    print("GRADING_MODE=score")
+    print(f"GRADING_REJECT_SCORE={gate.reject:.4f}")
+    print(f"GRADING_ACCEPT_SCORE={gate.accept:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -71,6 +71,11 @@ def create_app():
     
     app.register_blueprint(app_routes)
     
+    # Pick up books ingested by other processes without a restart
+    from rag.nodes import vector_store_reloader
+    if vector_store_reloader.interval > 0:
+        vector_store_reloader.start()
+    
     # If React frontend exists, serve it for non-API routes
     if use_react_frontend:
         @app.route('/')
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+import os
+from dataclasses import dataclass
+
+# Add project root to Python path when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from schema.models import RetrievedDocument
+
+
+@dataclass
+class ScoreGate:
+    """
+    Decides which retrieved chunks are worth an LLM grading call, by their similarity score.
+
+    Chunks scoring at least `accept` are kept without asking the LLM, chunks below `reject`
+    are dropped, and only the ones in between get graded. Fit the two thresholds to your
+    collection and embedding model with `python -m evaluation.calibrate_grading`.
+    """
+    reject: float = 0.2
+    accept: float = 0.6
+
+    @classmethod
+    def from_env(cls) -> "ScoreGate":
+        """Thresholds from GRADING_REJECT_SCORE and GRADING_ACCEPT_SCORE."""
+        return cls(
+            reject=float(os.getenv("GRADING_REJECT_SCORE", str(cls.reject))),
+            accept=float(os.getenv("GRADING_ACCEPT_SCORE", str(cls.accept))),
+        )
+
+    def partition(self, docs: list[RetrievedDocument]) -> tuple[list[RetrievedDocument], list[RetrievedDocument], list[RetrievedDocument]]:
+        """Splits chunks into (accepted, uncertain, rejected), keeping their order."""
+        accepted = [doc for doc in docs if doc.score >= self.accept]
+        rejected = [doc for doc in docs if doc.score < self.reject and doc.score < self.accept]
+        uncertain = [doc for doc in docs if self.reject <= doc.score < self.accept]
+        return accepted, uncertain, rejected
+
+
+def rank_kept(accepted: list[RetrievedDocument], graded: list[RetrievedDocument]) -> list[RetrievedDocument]:
+    """Orders the chunks kept after grading, best first.
+
+    Similarity scores and the LLM's overall scores aren't on the same scale, so they're never
+    compared: chunks the gate accepted outright come first, by similarity, then the ones the
+    LLM graded relevant, by overall score.
+    """
+    return (
+        sorted(accepted, key=lambda doc: doc.score, reverse=True)
+        + sorted(graded, key=lambda doc: doc.retrieval_grade.review.overall_score, reverse=True)
+    )
+
+
+def fit_thresholds(scores: list[float], relevant: list[bool], precision: float = 0.95) -> ScoreGate:
+    """Fits a ScoreGate to chunks the LLM has already graded.
+
+    `accept` is the lowest score above which at least `precision` of the chunks were graded
+    relevant, and `reject` the highest score below which at least `precision` were graded
+    irrelevant, so the gate agrees with the LLM that often on the chunks it decides alone.
+
+    Args:
+        scores: Similarity score of each graded chunk.
+        relevant: The LLM's verdict on each chunk.
+        precision: How often the gate must agree with the LLM on the chunks it skips.
+    Returns:
+        The fitted gate. With no usable band on either side, that side never fires.
+    """
+    pairs = sorted(zip(scores, relevant))
+    accept = float("inf")
+    kept = relevant_kept = 0
+    # Walk in from each end; the widest band that's still precise enough wins. Cuts only go
+    # between distinct scores, so tied chunks always land on the same side.
+    descending = pairs[::-1]
+    for i, (score, is_relevant) in enumerate(descending):
+        kept += 1
+        relevant_kept += is_relevant
+        next_score = descending[i + 1][0] if i + 1 < len(descending) else float("-inf")
+        if relevant_kept / kept >= precision and next_score < score:
+            accept = score
+    reject = float("-inf")
+    dropped = irrelevant_dropped = 0
+    for i, (score, is_relevant) in enumerate(pairs):
+        dropped += 1
+        irrelevant_dropped += not is_relevant
+        next_score = pairs[i + 1][0] if i + 1 < len(pairs) else float("inf")
+        if irrelevant_dropped / dropped >= precision and next_score > score:
+            reject = next_score
+    return ScoreGate(reject=min(reject, accept), accept=accept)
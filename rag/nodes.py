@@ -9,7 +9,9 @@ if str(project_root) not in sys.path:
 import asyncio
 from schema.models import RAGState, RetrievedDocument
 from rag.chains import retrieval_required_chain, grade_documents_chain_async, generate_answer_chain
-from database.vector_store import VectorStore
+from database.sharding import open_vector_store
+from database.reloader import VectorStoreReloader
+from rag.grading import ScoreGate, rank_kept
 import os
 from datetime import datetime
 from dotenv import load_dotenv
@@ -18,12 +20,16 @@ from langchain_core.runnables import RunnableConfig
 
 load_dotenv()
 logging = Logging()
-vector_store = VectorStore(
-        name=os.getenv("VECTOR_STORE_NAME", "rag_database"),
-        db_path=os.getenv("VECTOR_STORE_DB_PATH", "db"),
-        documents_directory=os.getenv("VECTOR_STORE_DOCUMENTS_DIRECTORY", "documents"),
-    )
-vector_store.initialise_vector_store()
+# One collection, or one per domain with VECTOR_STORE_SHARDING=domain
+vector_store = open_vector_store()
+# Picks up books ingested by other processes without a restart (0 turns it off). The app
+# factory starts it, so scripts and tests that import this module don't get a watcher thread.
+vector_store_reloader = VectorStoreReloader(
+    vector_store,
+    interval=float(os.getenv("VECTOR_STORE_RELOAD_INTERVAL", "5")),
+    settle=float(os.getenv("VECTOR_STORE_RELOAD_SETTLE", "30")),
+    max_delay=float(os.getenv("VECTOR_STORE_RELOAD_MAX_DELAY", "300")),
+)
 
 def _get_doc_content(doc):
     """
@@ -81,18 +87,36 @@ def retrieve_documents(state: RAGState) -> RAGState:
         query_text = retrieval_req.improved_question
         logging.log_info(f"Using improved question for retrieval: {query_text}")
         
-    raw_docs = vector_store.query_vector_store(query_text, 10)
+    timings = {}
+    with vector_store_reloader.acquire() as current_store:
+        raw_docs, cache_hit = current_store.retrieve(query_text, 10, timings=timings)
+        query_cache = current_store.query_cache
+    if cache_hit:
+        logging.log_info("Reusing the chunks retrieved for a similar recent question.")
+    logging.log_info("Retrieval timings: " + ", ".join(f"{stage}={ms:.1f}ms" for stage, ms in timings.items()))
+    if query_cache is not None:
+        cache_stats = query_cache.stats()
+        logging.log_info(
+            f"Query embedding cache: {cache_stats['hit_rate']:.0%} hit rate "
+            f"({cache_stats['hits']} hits, {cache_stats['misses']} misses), ~{cache_stats['saved_ms']:.0f}ms saved"
+        )
     retrieved_docs = [
         RetrievedDocument(
             content=doc.page_content,
             source_name=doc.metadata.get("source_file", "unknown"),
             source_page=doc.metadata.get("page", 0),
-            score=0.0,
+            score=doc.metadata.get("relevance_score", 0.0),
             retrieved_at=datetime.now()
         ) for doc in raw_docs
     ]
     logging.log_info(f"Documents retrieved successfully. Count: {len(retrieved_docs)}")
-    return {"retrieved_documents": retrieved_docs, "search_queries": [query_text]}
+    return {
+        "retrieved_documents": retrieved_docs,
+        "search_queries": [query_text],
+        "retrieval_time": timings.get("total_ms", 0.0) / 1000,
+        "retrieval_timings": timings,
+        "retrieval_cache_hit": cache_hit,
+    }
 
 async def _grade_single_document(question: str, doc: RetrievedDocument) -> RetrievedDocument:
     """
@@ -110,13 +134,22 @@ def grade_documents(state: RAGState) -> RAGState:
     Are these documents actually useful, or did we just find some random noise?
     Filters out irrelevant documents and sorts the rest by quality score.
     
-    Uses parallel async grading for better performance.
+    Uses parallel async grading for better performance. With GRADING_MODE=score, only chunks
+    whose similarity score is in the uncertain band go to the LLM (see rag/grading.py);
+    clear hits are kept and clear misses dropped without a call.
     """
     logging.log_info("--- NODE: Grade Documents ---")
     logging.log_info("Grading documents in parallel...")
     
     retrieved_docs = state["retrieved_documents"]
     question = state["question"]
+    accepted_docs = []
+    if os.getenv("GRADING_MODE", "llm").lower() == "score":
+        accepted_docs, retrieved_docs, rejected_docs = ScoreGate.from_env().partition(retrieved_docs)
+        logging.log_info(
+            f"Score gate: {len(accepted_docs)} accepted, {len(rejected_docs)} dropped, "
+            f"{len(retrieved_docs)} sent to the LLM"
+        )
     
     # Grade all documents in parallel using asyncio
     async def grade_all_documents():
@@ -154,16 +187,14 @@ def grade_documents(state: RAGState) -> RAGState:
     
     logging.log_info(f"Filtered: {len(relevant_docs)}/{len(graded_docs)} documents are relevant")
     
-    # Sort by overall score (highest first)
-    relevant_docs.sort(
-        key=lambda d: d.retrieval_grade.review.overall_score if d.retrieval_grade else 0,
-        reverse=True
-    )
+    # Sort by overall score (highest first), after any chunks the score gate accepted
+    relevant_docs = rank_kept(accepted_docs, relevant_docs)
     
     if relevant_docs:
+        top = relevant_docs[0]
         logging.log_info(
             f"Documents sorted by quality. "
-            f"Top score: {relevant_docs[0].retrieval_grade.review.overall_score:.2f}"
+            f"Top score: {top.retrieval_grade.review.overall_score if top.retrieval_grade else top.score:.2f}"
         )
     else:
         logging.log_info("No relevant documents found after filtering")
@@ -40,5 +40,7 @@ class RAGState(TypedDict, total=False):
     answer: str
     search_queries: list[str]
     retrieval_time: float
+    retrieval_timings: dict[str, float]  # Milliseconds per retrieval stage
+    retrieval_cache_hit: bool  # Chunks reused from a similar recent question
     retrieval_required: RetrievalRequired
 
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.vector_store import VectorStore
+
+
+def write_pdf(path, pages: list[str]) -> None:
+    """Writes a minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # pages tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+@pytest.fixture
+def pdf_directory(tmp_path):
+    """A folder with two small books: one short, one long enough to be split into page ranges."""
+    write_pdf(tmp_path / "short_book.pdf", ["Short book page one", "Short book page two"])
+    write_pdf(tmp_path / "long_book.pdf", [f"Long book page {i}" for i in range(7)])
+    return tmp_path
+
+
+@pytest.fixture
+def make_vector_store(pdf_directory, tmp_path_factory):
+    """Opens handles on one test collection over pdf_directory, with fake 16-dimensional embeddings."""
+    db_path = str(tmp_path_factory.mktemp("db"))
+
+    def make():
+        store = VectorStore(name="test_collection", db_path=db_path, documents_directory=str(pdf_directory))
+        store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16))
+        return store
+    return make
+
+
+@pytest.fixture
+def vector_store(make_vector_store):
+    """An empty, initialised test collection over pdf_directory."""
+    return make_vector_store()
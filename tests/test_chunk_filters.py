@@ -0,0 +1,65 @@
+"""Tests for the header/footer and near-duplicate filters."""
+import sys
+import random
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+
+from database.chunk_filters import BoilerplateFilter, NearDuplicateFilter
+
+
+def words(rng, count):
+    return " ".join(rng.choice(["kernel", "socket", "thread", "buffer", "mutex", "signal", "inode", "page"]) + str(rng.randint(0, 99)) for _ in range(count))
+
+
+def test_boilerplate_filter_strips_running_headers_and_page_numbers():
+    rng = random.Random(0)
+    pages = [
+        Document(
+            page_content=f"Linux Kernel Development\nChapter {i // 5 + 1}\n{words(rng, 20)}\n{words(rng, 20)}\n{i + 1}",
+            metadata={"source": "book.pdf", "page": i},
+        )
+        for i in range(30)
+    ]
+    bodies = [page.page_content.split("\n")[2:4] for page in pages]
+    boilerplate = BoilerplateFilter()
+
+    filtered = list(boilerplate.filter(pages))
+
+    assert [page.metadata["page"] for page in filtered] == list(range(30))
+    for page, body in zip(filtered, bodies):
+        assert "Linux Kernel Development" not in page.page_content
+        assert body[0] in page.page_content and body[1] in page.page_content
+        assert not page.page_content.split("\n")[-1].isdigit()
+    assert boilerplate.lines_dropped >= 60
+    assert boilerplate.bytes_dropped > 0
+
+
+def test_boilerplate_filter_leaves_unrepeated_lines_alone():
+    rng = random.Random(1)
+    pages = [Document(page_content="\n".join(words(rng, 8) for _ in range(6)), metadata={"source": "a.pdf"}) for _ in range(10)]
+    originals = [page.page_content for page in pages]
+
+    filtered = list(BoilerplateFilter().filter(pages))
+
+    assert [page.page_content for page in filtered] == originals
+
+
+def test_near_duplicate_filter_drops_near_copies_only():
+    rng = random.Random(2)
+    text = words(rng, 150)
+    near_copy = text.replace(text.split()[75], "changed", 1)
+    unrelated = words(rng, 150)
+    duplicates = NearDuplicateFilter()
+
+    assert not duplicates.is_duplicate(Document(page_content=text))
+    assert duplicates.is_duplicate(Document(page_content=near_copy))
+    assert duplicates.is_duplicate(Document(page_content=text))
+    assert not duplicates.is_duplicate(Document(page_content=unrelated))
+    assert duplicates.chunks_dropped == 2
+    assert duplicates.bytes_dropped == len(near_copy) + len(text)
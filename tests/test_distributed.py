@@ -0,0 +1,102 @@
+"""Tests for work-queue ingestion with a coordinator and several workers."""
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.distributed import IngestionCoordinator, IngestionWorker
+from database.manifest import IngestionManifest
+from database.sharding import ShardedVectorStore
+from database.work_queue import FileWorkQueue, InMemoryWorkQueue, WorkItem
+
+
+@pytest.mark.parametrize("queue_type", ["memory", "file"])
+def test_workers_ingest_everything_the_coordinator_queues(make_vector_store, tmp_path, queue_type):
+    queue = InMemoryWorkQueue() if queue_type == "memory" else FileWorkQueue(str(tmp_path / "queue"))
+    coordinator_store = make_vector_store()
+    workers = [IngestionWorker(make_vector_store(), queue, worker_id=f"w{i}") for i in range(2)]
+    threads = [threading.Thread(target=worker.run, kwargs={"idle_timeout": 2, "poll_interval": 0.05}) for worker in workers]
+    for thread in threads:
+        thread.start()
+
+    stats = IngestionCoordinator(coordinator_store, queue, poll_interval=0.05).run()
+    for thread in threads:
+        thread.join()
+
+    assert stats.books == 2 and stats.books_failed == 0
+    assert stats.pages == 9 and stats.chunks_written == 9
+    assert sum(worker.books for worker in workers) == 2
+    assert len(coordinator_store.vector_store.get()["ids"]) == 9
+    manifest = IngestionManifest.load(coordinator_store.db_path)
+    assert sorted(manifest.files) == ["long_book.pdf", "short_book.pdf"]
+    assert len(manifest.referenced_ids(excluding=[])) == 9
+
+    # Nothing changed, so nothing is queued the second time
+    assert IngestionCoordinator(coordinator_store, queue, poll_interval=0.05).run().books == 0
+
+
+def test_coordinator_gives_up_when_no_worker_takes_the_books(vector_store):
+    stats = IngestionCoordinator(vector_store, InMemoryWorkQueue(), poll_interval=0.01, stall_timeout=0.05).run()
+
+    assert stats.books == 0
+    assert stats.unfinished == ["long_book.pdf", "short_book.pdf"]
+    # Left out of the manifest, so the next run queues them again
+    assert IngestionManifest.load(vector_store.db_path).files == {}
+
+
+def test_expired_leases_are_handed_out_again():
+    queue = InMemoryWorkQueue(lease_seconds=0)
+    queue.put(WorkItem("book.pdf", "abc"))
+
+    first = queue.claim()
+    second = queue.claim()  # The first worker went quiet
+
+    assert first == second == WorkItem("book.pdf", "abc")
+    queue.complete(second, {"key": "book.pdf"})
+    assert queue.claim() is None
+    assert queue.take_results() == [{"key": "book.pdf"}]
+
+
+@pytest.mark.parametrize("queue_type", ["memory", "file"])
+def test_an_expired_lease_cannot_release_the_next_one(tmp_path, queue_type):
+    queue = InMemoryWorkQueue(lease_seconds=0) if queue_type == "memory" else FileWorkQueue(str(tmp_path), lease_seconds=0)
+    queue.put(WorkItem("book.pdf", "abc"))
+    stale = queue.claim()
+    current = queue.claim()  # The first worker went quiet for too long
+    queue.lease_seconds = 300
+
+    assert current.receipt != stale.receipt
+    assert not queue.complete(stale, {"key": "book.pdf", "worker": "stale"})
+    assert not queue.fail(stale, "too late")
+    assert queue.counts() == {"pending": 0, "claimed": 1}
+
+    assert queue.complete(current, {"key": "book.pdf", "worker": "current"})
+    assert queue.counts() == {"pending": 0, "claimed": 0}
+    assert queue.take_results() == [{"key": "book.pdf", "worker": "current"}]
+
+
+def test_failed_items_are_retried_then_reported(tmp_path):
+    queue = FileWorkQueue(str(tmp_path), max_attempts=2)
+    queue.put(WorkItem("book.pdf", "abc"))
+
+    queue.fail(queue.claim(), "boom")
+    retry = queue.claim()
+    assert retry.attempts == 1
+    queue.fail(retry, "boom again")
+
+    assert queue.claim() is None
+    assert queue.counts() == {"pending": 0, "claimed": 0}
+    assert queue.take_results() == [{"key": "book.pdf", "sha256": "abc", "error": "boom again"}]
+
+
+def test_sharded_stores_are_rejected(pdf_directory, tmp_path):
+    store = ShardedVectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(pdf_directory))
+    with pytest.raises(ValueError, match="VECTOR_STORE_SHARDING"):
+        IngestionCoordinator(store, InMemoryWorkQueue())
+    with pytest.raises(ValueError, match="VECTOR_STORE_SHARDING"):
+        IngestionWorker(store, InMemoryWorkQueue())
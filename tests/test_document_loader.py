@@ -7,6 +7,8 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+import pytest
+
 from database.document_loader import DocumentLoader
 
 def test_clean_text_removes_excessive_newlines():
@@ -33,4 +35,65 @@ def test_clean_text_handles_unicode():
 def test_clean_text_strips_leading_trailing():
     loader = DocumentLoader("test_docs")
     result = loader.clean_text("  Hello World  ")
-    assert result == "Hello World"
\ No newline at end of file
+    assert result == "Hello World"
+
+def test_parallel_load_matches_sequential_load(pdf_directory):
+    sequential = DocumentLoader(str(pdf_directory), max_workers=1).load_documents()
+    parallel = DocumentLoader(str(pdf_directory), max_workers=2, pages_per_task=3).load_documents()
+
+    assert len(parallel) == 9
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in sequential]
+    assert [(doc.metadata["source"], doc.metadata["page"]) for doc in parallel] == [
+        (doc.metadata["source"], doc.metadata["page"]) for doc in sequential
+    ]
+
+def test_text_cache_skips_parsing_on_second_load(pdf_directory, tmp_path, monkeypatch):
+    from database import document_loader
+    from database.text_cache import PageTextCache
+
+    cache = PageTextCache(str(tmp_path / "text_cache"))
+    first = list(DocumentLoader(str(pdf_directory), text_cache=cache).iter_documents())
+
+    def fail(*args):
+        raise AssertionError("PDF was parsed again")
+
+    monkeypatch.setattr(document_loader, "_load_page_range", fail)
+    second = list(DocumentLoader(str(pdf_directory), text_cache=cache).iter_documents())
+
+    assert len(second) == 9
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+    assert [doc.metadata for doc in second] == [doc.metadata for doc in first]
+
+@pytest.mark.parametrize("backend,module", [("pypdf", "pypdf"), ("pdfium", "pypdfium2"), ("pymupdf", "pymupdf")])
+def test_backends_produce_the_same_pages(pdf_directory, backend, module):
+    pytest.importorskip(module)
+    expected = DocumentLoader(str(pdf_directory), max_workers=1).load_documents()
+    documents = DocumentLoader(str(pdf_directory), backend=backend).load_documents()
+
+    assert [doc.page_content for doc in documents] == [doc.page_content for doc in expected]
+    assert [(doc.metadata["source"], doc.metadata["page"]) for doc in documents] == [
+        (doc.metadata["source"], doc.metadata["page"]) for doc in expected
+    ]
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        DocumentLoader("test_docs", backend="nope")
+
+def test_streaming_yields_pages_as_they_are_extracted(pdf_directory):
+    from database.pdf_backends import PypdfBackend
+
+    extracted = []
+
+    class RecordingBackend(PypdfBackend):
+        def iter_pages(self, path, start=0, end=sys.maxsize):
+            for page in super().iter_pages(path, start, end):
+                extracted.append(page.metadata["page"])
+                yield page
+
+    loader = DocumentLoader(str(pdf_directory), max_workers=4, backend=RecordingBackend(), stream_pages=True)
+    pages = loader.iter_documents()
+    first = next(pages)
+
+    assert first.metadata["page"] == 0
+    assert extracted == [0]
+    assert len([first, *pages]) == 9
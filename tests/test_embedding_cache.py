@@ -0,0 +1,42 @@
+"""Tests for the persistent embedding cache."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+
+def test_cache_survives_reopening(tmp_path):
+    inner = CountingEmbeddings(size=8)
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    first = CachedEmbeddings(inner, cache_path, model="fake").embed_documents(["a", "b", "a"])
+    reopened = CachedEmbeddings(inner, cache_path, model="fake")
+    second = reopened.embed_documents(["b", "a"])
+
+    assert inner.calls == 2
+    assert second == [first[1], first[0]]
+    assert reopened.stats()["hits"] == 2
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    inner = CountingEmbeddings(size=8)
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    CachedEmbeddings(inner, cache_path, model="small").embed_documents(["a"])
+    CachedEmbeddings(inner, cache_path, model="large").embed_documents(["a"])
+
+    assert inner.calls == 2
@@ -0,0 +1,133 @@
+"""Tests for the concurrent embedding scheduler, run against a fake rate-limited endpoint."""
+import asyncio
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from database.embedding_scheduler import EmbeddingScheduler
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeEmbeddingsEndpoint(Embeddings):
+    """Stands in for the embeddings API: fixed latency, and a 429 when too many requests overlap."""
+
+    def __init__(self, latency: float = 0.02, max_concurrent: int = 4, fail_with: Exception | None = None):
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.fail_with = fail_with
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rejected = 0
+
+    async def aembed_documents(self, texts):
+        if self.fail_with:
+            raise self.fail_with
+        if self.in_flight >= self.max_concurrent:
+            self.rejected += 1
+            raise FakeRateLimitError("Too many requests")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return [[float(len(text)), 1.0] for text in texts]
+        finally:
+            self.in_flight -= 1
+
+    def embed_documents(self, texts):
+        return asyncio.run(self.aembed_documents(texts))
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _batches(count: int, size: int) -> list[list[Document]]:
+    return [[Document(page_content="x" * (b * size + i)) for i in range(size)] for b in range(count)]
+
+
+def test_every_batch_is_written_with_matching_vectors():
+    written = []
+    scheduler = EmbeddingScheduler(FakeEmbeddingsEndpoint(), max_concurrency=4, request_size=5, backoff_seconds=0.01)
+
+    stats = scheduler.run(_batches(6, 20), write=lambda batch, vectors: written.append((batch, vectors)))
+
+    assert len(written) == 6
+    for batch, vectors in written:
+        assert [v[0] for v in vectors] == [float(len(doc.page_content)) for doc in batch]
+    assert stats.requests == 24
+
+
+def test_requests_overlap():
+    endpoint = FakeEmbeddingsEndpoint(latency=0.05, max_concurrent=100)
+    scheduler = EmbeddingScheduler(endpoint, max_concurrency=8, initial_concurrency=8, request_size=1)
+
+    started = time.perf_counter()
+    scheduler.run(_batches(1, 16), write=lambda batch, vectors: None)
+
+    assert endpoint.peak_in_flight > 1
+    assert time.perf_counter() - started < 16 * 0.05
+
+
+def test_backs_off_when_rate_limited():
+    endpoint = FakeEmbeddingsEndpoint(max_concurrent=2)
+    written = []
+    scheduler = EmbeddingScheduler(
+        endpoint, max_concurrency=16, initial_concurrency=16, request_size=2, backoff_seconds=0.01
+    )
+
+    stats = scheduler.run(_batches(4, 20), write=lambda batch, vectors: written.append(batch))
+
+    assert len(written) == 4
+    assert endpoint.rejected > 0
+    assert stats.rate_limited == endpoint.rejected
+    assert stats.final_concurrency < 16
+
+
+def test_token_budget_throttles_requests():
+    scheduler = EmbeddingScheduler(
+        FakeEmbeddingsEndpoint(latency=0), max_concurrency=4, tokens_per_minute=6000, request_size=1
+    )
+    # Each request costs ~51 tokens; the bucket refills at 100 tokens/second
+    batch = [[Document(page_content="y" * 200) for _ in range(120)]]
+
+    started = time.perf_counter()
+    scheduler.run(batch, write=lambda batch, vectors: None)
+
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_writes_happen_off_the_calling_thread():
+    threads = set()
+    scheduler = EmbeddingScheduler(FakeEmbeddingsEndpoint(), request_size=10)
+
+    scheduler.run(_batches(3, 10), write=lambda batch, vectors: threads.add(threading.current_thread().name))
+
+    assert threads == {"embed-writer"}
+
+
+def test_non_rate_limit_errors_propagate():
+    scheduler = EmbeddingScheduler(FakeEmbeddingsEndpoint(fail_with=ValueError("bad input")))
+
+    with pytest.raises(ValueError, match="bad input"):
+        scheduler.run(_batches(2, 5), write=lambda batch, vectors: None)
+
+
+def test_writer_errors_propagate():
+    def failing_writer(batch, vectors):
+        raise RuntimeError("chroma is down")
+
+    scheduler = EmbeddingScheduler(FakeEmbeddingsEndpoint())
+
+    with pytest.raises(RuntimeError, match="chroma is down"):
+        scheduler.run(_batches(5, 5), write=failing_writer)
@@ -0,0 +1,64 @@
+"""Tests for similarity scores and score-gated grading."""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from rag.grading import ScoreGate, fit_thresholds, rank_kept
+from schema.models import RetrievalGrade, RetrievedDocument, Review
+
+
+def _doc(score: float) -> RetrievedDocument:
+    return RetrievedDocument(content=str(score), source_name="book.pdf", source_page=1, score=score, retrieved_at=datetime.now())
+
+
+def test_gate_only_sends_the_uncertain_band_to_the_llm():
+    docs = [_doc(score) for score in (0.9, 0.1, 0.4, 0.6, 0.2)]
+
+    accepted, uncertain, rejected = ScoreGate(reject=0.2, accept=0.6).partition(docs)
+
+    assert [d.score for d in accepted] == [0.9, 0.6]
+    assert [d.score for d in uncertain] == [0.4, 0.2]
+    assert [d.score for d in rejected] == [0.1]
+
+
+def test_accepted_chunks_rank_ahead_of_llm_graded_ones():
+    accepted = [_doc(0.7), _doc(0.9)]
+    graded = [_doc(0.5), _doc(0.4)]
+    for doc, overall in zip(graded, (0.8, 0.95)):
+        scores = dict.fromkeys(["relevance", "usefulness", "accuracy", "completeness", "clarity", "overall_score"], overall)
+        doc.retrieval_grade = RetrievalGrade(review=Review(**scores), relevant=True)
+
+    # 0.95 and 0.8 are LLM scores, not similarities, so they don't jump the queue
+    assert [doc.score for doc in rank_kept(accepted, graded)] == [0.9, 0.7, 0.4, 0.5]
+
+
+def test_thresholds_fit_the_llm_grades():
+    scores = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+    relevant = [False, False, False, True, False, True, True, True]
+
+    gate = fit_thresholds(scores, relevant, precision=1.0)
+
+    assert (gate.reject, gate.accept) == (0.4, 0.6)
+
+
+def test_thresholds_never_split_ties():
+    gate = fit_thresholds([0.5, 0.5, 0.9], [True, False, True], precision=1.0)
+
+    assert gate.accept == 0.9 and gate.reject == float("-inf")
+
+
+def test_retrieved_chunks_carry_similarity_scores(vector_store):
+    vector_store.upsert_documents()
+
+    docs = vector_store.query_vector_store("Long book page 3", k=4)
+    hybrid = vector_store.hybrid_search("Long book page 3", k=4)
+    vector_store.retrieve("Long book page 3", k=4)
+    cached, hit = vector_store.retrieve("Long book page 3", k=4)
+
+    assert hit
+    assert all(-1.0 <= doc.metadata["relevance_score"] <= 1.0 for doc in docs + hybrid + cached)
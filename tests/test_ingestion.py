@@ -0,0 +1,54 @@
+"""Tests for the streaming ingestion pipeline."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.document_loader import DocumentLoader
+from database.ingestion import IngestionPipeline
+
+
+def test_pipeline_streams_same_chunks_as_preprocess(pdf_directory):
+    batches = []
+    pipeline = IngestionPipeline(DocumentLoader(str(pdf_directory)), write_batch=batches.append, batch_size=4)
+    stats = pipeline.run()
+
+    expected = DocumentLoader(str(pdf_directory)).preprocess_documents()
+    streamed = [chunk for batch in batches for chunk in batch]
+    assert [c.page_content for c in streamed] == [c.page_content for c in expected]
+    assert all(len(batch) <= 4 for batch in batches)
+    assert stats.pages == 9
+    assert stats.chunks == len(expected)
+    assert stats.batches == len(batches)
+
+
+def test_pipeline_surfaces_writer_errors(pdf_directory):
+    def failing_writer(batch):
+        raise RuntimeError("chroma is down")
+
+    pipeline = IngestionPipeline(DocumentLoader(str(pdf_directory)), write_batch=failing_writer, batch_size=2)
+    with pytest.raises(RuntimeError, match="chroma is down"):
+        pipeline.run()
+
+
+def test_near_duplicates_are_only_dropped_within_a_book(tmp_path):
+    from database.chunk_filters import NearDuplicateFilter
+    from tests.conftest import write_pdf
+
+    notice = "All rights reserved. No part of this publication may be reproduced without permission."
+    write_pdf(tmp_path / "a.pdf", [notice, "Book A body"])
+    write_pdf(tmp_path / "b.pdf", [notice, "Book B body", notice])
+    batches = []
+    pipeline = IngestionPipeline(
+        DocumentLoader(str(tmp_path)), write_batch=batches.append, duplicate_filter=NearDuplicateFilter()
+    )
+    stats = pipeline.run()
+
+    # b.pdf keeps its own copy of the notice, so removing a.pdf can't take it away
+    sources = [Path(chunk.metadata["source"]).name for batch in batches for chunk in batch if chunk.page_content == notice]
+    assert sources == ["a.pdf", "b.pdf"]
+    assert stats.duplicate_chunks_dropped == 1
@@ -0,0 +1,88 @@
+"""Tests for background ingestion jobs and their progress reports."""
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.ingestion_jobs import IngestionJobRunner, JobAlreadyRunning
+from database.sharding import ShardedVectorStore
+
+
+def _wait(job, timeout=30):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.finished
+
+
+def test_job_runs_in_background_and_reports_progress(make_vector_store):
+    runner = IngestionJobRunner(make_vector_store)
+
+    job = runner.start()
+    _wait(job)
+
+    report = job.to_dict()
+    assert report["status"] == "completed"
+    assert report["result"]["chunks"] == 9
+    progress = report["progress"]
+    assert progress["files_total"] == progress["files_parsed"] == 2
+    assert progress["pages_parsed"] == 9
+    assert progress["chunks_embedded"] == progress["chunks_written"] == 9
+    assert progress["eta_seconds"] == 0
+    assert runner.get(job.id) is job
+
+
+def test_job_ingests_into_the_shards_of_a_sharded_store(pdf_directory, tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("db"))
+
+    def factory():
+        store = ShardedVectorStore(name="test_collection", db_path=db_path, documents_directory=str(pdf_directory))
+        store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16), backend="chroma")
+        return store
+
+    job = IngestionJobRunner(factory).start(dedupe=True)
+    _wait(job)
+
+    report = job.to_dict()
+    assert report["status"] == "completed"
+    assert report["result"]["chunks"] == 9
+    assert report["progress"] is not None
+    assert sum(shard.chroma_collection().count() for shard in factory().shards.values()) == 9
+
+
+def test_only_one_job_runs_at_a_time(make_vector_store):
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait(10)
+        return make_vector_store()
+
+    runner = IngestionJobRunner(slow_factory)
+    first = runner.start()
+    with pytest.raises(JobAlreadyRunning):
+        runner.start()
+    release.set()
+    _wait(first)
+
+    second = runner.start()
+    _wait(second)
+    assert [job.id for job in runner.jobs()] == [second.id, first.id]
+
+
+def test_failed_job_records_the_error():
+    def broken_factory():
+        raise RuntimeError("no vector store here")
+
+    job = IngestionJobRunner(broken_factory).start()
+    _wait(job)
+
+    assert job.status == "failed"
+    assert job.error == "no vector store here"
+    assert job.to_dict()["progress"] is None
@@ -0,0 +1,72 @@
+"""Tests for the BM25 keyword index and hybrid retrieval."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from database.keyword_index import KeywordIndex
+from tests.conftest import write_pdf
+
+
+def test_identifiers_are_matched_whole(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.sqlite"))
+    index.upsert(
+        ["a", "b"],
+        [Document(page_content="Declaring __slots__ saves memory"), Document(page_content="Slots in a schedule")],
+    )
+
+    hits = index.search("what does __slots__ do?")
+
+    assert [chunk_id for chunk_id, _, _ in hits] == ["a"]
+    assert hits[0][1].page_content == "Declaring __slots__ saves memory"
+
+
+def test_stopwords_and_common_words_are_left_out_of_searches(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.sqlite"), max_df=0.5)
+    texts = [f"Linux chapter {i}" for i in range(5)] + ["Linux grep patterns"]
+    index.upsert([str(i) for i in range(6)], [Document(page_content=text) for text in texts])
+
+    assert index.query_terms("How do I use grep on Linux?") == ["use", "grep", "linux"]
+    # "linux" is in every chunk, so only "grep" decides the ranking
+    assert [chunk_id for chunk_id, _, _ in index.search("linux grep")] == ["5"]
+    # Unless it's all there is to go on
+    assert len(index.search("what is linux")) == 6
+    assert index.search("what is it") == []
+
+
+def test_index_follows_upserts_and_deletions(vector_store, pdf_directory):
+    vector_store.upsert_documents()
+    assert vector_store.keyword_index.count() == 9
+
+    (pdf_directory / "short_book.pdf").unlink()
+    write_pdf(pdf_directory / "long_book.pdf", ["Rewritten long book"])
+    vector_store.upsert_documents()
+
+    assert vector_store.keyword_index.count() == 1
+    assert vector_store.keyword_index.search("short") == []
+    assert vector_store.keyword_index.search("rewritten")[0][1].page_content == "Rewritten long book"
+
+
+def test_hybrid_search_finds_keyword_only_matches(vector_store, pdf_directory):
+    write_pdf(pdf_directory / "c_book.pdf", ["Return EXIT_FAILURE on error"])
+    vector_store.upsert_documents()
+
+    timings = {}
+    docs = vector_store.hybrid_search("EXIT_FAILURE", k=3, timings=timings)
+
+    assert docs[0].page_content == "Return EXIT_FAILURE on error"
+    assert docs[0].metadata["rrf_score"] > 0
+    assert set(timings) == {"vector_ms", "keyword_ms", "fusion_ms", "total_ms"}
+
+
+def test_existing_collection_is_backfilled(vector_store, tmp_path):
+    vector_store.upsert_documents()
+    vector_store.keyword_index.rebuild([])
+
+    vector_store.upsert_documents()
+
+    assert vector_store.keyword_index.count() == 9
@@ -0,0 +1,125 @@
+"""Tests for the memory-mapped vector index backend."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.mmap_index import MmapVectorIndex, export_index
+from database.reloader import VectorStoreReloader
+from database.vector_store import VectorStore
+from tests.conftest import write_pdf
+
+
+@pytest.fixture
+def random_collection(tmp_path):
+    store = VectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(tmp_path))
+    store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16))
+    vectors = np.random.default_rng(0).standard_normal((3000, 16)).astype(np.float32)
+    store.chroma_collection().add(
+        ids=[f"chunk-{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"text {i}" for i in range(len(vectors))],
+        metadatas=[{"n": i} for i in range(len(vectors))],
+    )
+    return store.chroma_collection(), vectors
+
+
+def test_exact_and_ivf_search_find_the_nearest_chunks(random_collection, tmp_path):
+    collection, vectors = random_collection
+    export_index(collection, str(tmp_path / "index"), nlist=30)
+    index = MmapVectorIndex(str(tmp_path / "index"), nprobe=30)
+    query = np.random.default_rng(1).standard_normal(16)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [f"chunk-{i}" for i in np.argsort(-(unit @ query))[:10]]
+    exact, _ = index.search(query, 10, exact=True)
+    ivf = index.nearest(query, 10, ["metadatas"])  # every cluster probed, so IVF is exact too
+
+    assert index._rows(exact.tolist(), [])["ids"] == expected == ivf["ids"]
+    assert ivf["metadatas"][0] == {"n": int(expected[0].split("-")[1])}
+    assert index.get(["chunk-7", "missing"], ["documents"]) == {"ids": ["chunk-7"], "documents": ["text 7"]}
+
+
+def test_float16_export_keeps_the_top_results(random_collection, tmp_path):
+    collection, _ = random_collection
+    export_index(collection, str(tmp_path / "f32"), nlist=1)
+    export_index(collection, str(tmp_path / "f16"), dtype="float16", nlist=1)
+    query = np.random.default_rng(2).standard_normal(16)
+
+    full = MmapVectorIndex(str(tmp_path / "f32")).nearest(query, 10, [])["ids"]
+    half = MmapVectorIndex(str(tmp_path / "f16")).nearest(query, 10, [])["ids"]
+
+    assert MmapVectorIndex(str(tmp_path / "f16")).vectors.dtype == np.float16
+    assert len(set(full) & set(half)) >= 9
+
+
+def test_mmap_backend_serves_without_chroma_and_follows_ingests(pdf_directory, tmp_path):
+    writer = VectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(pdf_directory))
+    writer.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16))
+    writer.upsert_documents()
+    writer.export_mmap_index()
+
+    reader = VectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(pdf_directory))
+    reader.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16), backend="mmap")
+    reloader = VectorStoreReloader(reader, interval=0, settle=0)
+
+    assert reader.vector_store is None and len(reader.mmap_index) == 9
+    assert len(reader.query_vector_store("Long book page 3", k=4)) == 4
+    with pytest.raises(RuntimeError):
+        reader.upsert_documents()
+
+    assert len(reader.get_retriever(k=2).invoke("Long book page 3")) == 2
+    assert reader.get_retriever(search_type="similarity", k=3).invoke("Short book page one")[0].page_content == "Short book page one"
+    with pytest.raises(ValueError, match="mmap backend"):
+        reader.get_retriever(search_type="similarity_score_threshold")
+
+    write_pdf(pdf_directory / "new_book.pdf", ["New book page one"])
+    writer.upsert_documents()  # re-exports, since an index is being served
+
+    assert reloader.check()
+    assert len(reloader.current.mmap_index) == 10 and reloader.current.backend == "mmap"
+
+
+def test_compact_exports_rescore_at_full_precision(random_collection, tmp_path):
+    collection, vectors = random_collection
+    export_index(collection, str(tmp_path / "f32"), nlist=1)
+    export_index(collection, str(tmp_path / "int8"), dtype="int8", nlist=1)
+    export_index(collection, str(tmp_path / "short"), dtype="int8", nlist=1, dimensions=8)
+    query = np.random.default_rng(3).standard_normal(16)
+
+    full = MmapVectorIndex(str(tmp_path / "f32"))
+    int8 = MmapVectorIndex(str(tmp_path / "int8"))
+    short = MmapVectorIndex(str(tmp_path / "short"), rescore=10)
+    expected = full.nearest(query, 10, [])["ids"]
+
+    assert int8.vectors.dtype == np.int8 and short.vectors.shape == (3000, 8)
+    assert int8.nearest(query, 10, [])["ids"] == expected
+    rows, scores = short.search(query, 10)
+    result = short._rows(rows.tolist(), ["metadatas", "embeddings"])
+    assert len(set(result["ids"]) & set(expected)) >= 8
+    # Rescored, so the scores are exact cosines and the vectors handed back are full size
+    originals = vectors[[metadata["n"] for metadata in result["metadatas"]]]
+    exact = originals @ query / np.linalg.norm(originals, axis=1) / np.linalg.norm(query)
+    assert np.allclose(scores, exact, atol=1e-5)
+    assert result["embeddings"].shape == (10, 16)
+
+
+def test_lookups_that_match_nothing_return_empty_results(random_collection, tmp_path):
+    collection, _ = random_collection
+    export_index(collection, str(tmp_path / "index"))
+    index = MmapVectorIndex(str(tmp_path / "index"))
+    for result in [index.get(["unknown-id"], ["embeddings", "documents"]), index.get([], ["embeddings"])]:
+        assert result["ids"] == []
+        assert result["embeddings"].shape == (0, 16)
+
+    empty = VectorStore(name="empty_collection", db_path=str(tmp_path / "empty_db"), documents_directory=str(tmp_path))
+    empty.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16), backend="chroma")
+    export_index(empty.chroma_collection(), str(tmp_path / "empty_index"))
+    result = MmapVectorIndex(str(tmp_path / "empty_index")).nearest([0.1] * 16, 5, ["embeddings", "metadatas"])
+    assert result["ids"] == [] and len(result["embeddings"]) == 0
@@ -0,0 +1,42 @@
+"""Tests for the NumPy MMR stage."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_chroma.vectorstores import maximal_marginal_relevance as langchain_mmr
+from database.mmr import maximal_marginal_relevance
+
+
+def test_picks_match_langchain():
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(32)
+    candidates = rng.standard_normal((200, 32))
+
+    for lambda_mult in (0.0, 0.5, 1.0):
+        ours = maximal_marginal_relevance(query, candidates, k=10, lambda_mult=lambda_mult)
+        assert sorted(ours) == sorted(langchain_mmr(query, candidates, k=10, lambda_mult=lambda_mult))
+
+
+def test_near_duplicates_are_skipped():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[1.0, 0.1], [1.0, 0.11], [0.6, -0.8]])
+
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, candidates[:0], k=2) == []
+
+
+def test_query_vector_store_uses_stored_vectors(vector_store):
+    vector_store.upsert_documents()
+
+    timings = {}
+    docs = vector_store.query_vector_store("Long book page 3", k=4, timings=timings)
+
+    assert len(docs) == 4 and len({doc.id for doc in docs}) == 4
+    assert all(doc.metadata.get("source_file") for doc in docs)
+    assert {"vector_ms", "mmr_ms", "total_ms"} <= set(timings)
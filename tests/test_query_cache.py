@@ -0,0 +1,75 @@
+"""Tests for the query embedding cache."""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.query_cache import QueryEmbeddingCache
+from database.vector_store import VectorStore
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_repeated_queries_are_embedded_once():
+    inner = CountingEmbeddings(size=8)
+    cache = QueryEmbeddingCache(inner, model="fake")
+
+    first = cache.embed_query("What is a  closure?")
+    second = cache.embed_query(" What is a closure? ")
+
+    assert inner.calls == 1
+    assert first == second
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_cache_keys_include_the_embedding_size():
+    full = QueryEmbeddingCache(CountingEmbeddings(size=8), model="fake")
+    shortened = QueryEmbeddingCache(CountingEmbeddings(size=8), model="fake", dimensions=4)
+
+    assert full.dimensions is None and shortened.dimensions == 4
+    assert full._key("What is a closure?") != shortened._key("What is a closure?")
+    assert shortened._key("What is a closure?") == QueryEmbeddingCache(CountingEmbeddings(size=8), model="fake", dimensions=4)._key("What is a  closure?")
+
+
+def test_entries_expire_and_least_recently_used_go_first():
+    inner = CountingEmbeddings(size=8)
+    cache = QueryEmbeddingCache(inner, max_size=2, ttl_seconds=0.05, model="fake")
+
+    cache.embed_query("a")
+    cache.embed_query("b")
+    cache.embed_query("a")
+    cache.embed_query("c")  # evicts "b"
+    cache.embed_query("a")
+    assert inner.calls == 3
+
+    cache.embed_query("b")
+    assert inner.calls == 4
+
+    time.sleep(0.06)
+    cache.embed_query("a")
+    assert inner.calls == 5
+
+
+def test_cache_survives_vector_store_reloads(tmp_path):
+    inner = CountingEmbeddings(size=16)
+    store = VectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(tmp_path))
+    store.initialise_vector_store(embeddings=inner)
+    store.query_vector_store("where is the index?", k=1)
+
+    reopened = store.reopen()
+    reopened.query_vector_store("where is the index?", k=1)
+
+    assert reopened.query_cache is store.query_cache
+    assert inner.calls == 1
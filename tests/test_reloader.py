@@ -0,0 +1,107 @@
+"""Tests for picking up books ingested by another process."""
+import pytest
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from database.reloader import VectorStoreReloader
+from database.vector_store import VectorStore
+
+INGEST_SCRIPT = textwrap.dedent("""
+    import sys
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from database.vector_store import VectorStore
+    store = VectorStore(name="test_collection", db_path=sys.argv[1], documents_directory=sys.argv[2])
+    store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16))
+    store.upsert_documents()
+""")
+
+
+@pytest.fixture
+def serving_store(tmp_path_factory):
+    store = VectorStore(name="test_collection", db_path=str(tmp_path_factory.mktemp("db")), documents_directory="unused")
+    store.initialise_vector_store(embeddings=DeterministicFakeEmbedding(size=16))
+    return store
+
+
+def test_reload_picks_up_books_ingested_elsewhere(serving_store, pdf_directory):
+    reloader = VectorStoreReloader(serving_store, settle=0)
+    reloaded = []
+    reloader.add_listener(reloaded.append)
+    assert not reloader.check()
+
+    with reloader.acquire() as in_flight:
+        subprocess.run(
+            [sys.executable, "-c", INGEST_SCRIPT, serving_store.db_path, str(pdf_directory)],
+            cwd=project_root, check=True, capture_output=True,
+        )
+
+        assert reloader.check()
+        assert reloaded == [reloader.current]
+        assert reloader.current is not serving_store
+        results = reloader.current.vector_store.similarity_search("Short book page one", k=1)
+        assert results[0].page_content == "Short book page one"
+        # The old handle still answers, for requests that were already using it
+        in_flight.vector_store.similarity_search("Short book page one", k=1)
+    assert not reloader.check()
+
+
+def test_superseded_handles_are_closed_once_nothing_uses_them(serving_store, pdf_directory):
+    reloader = VectorStoreReloader(serving_store, settle=0)
+    subprocess.run(
+        [sys.executable, "-c", INGEST_SCRIPT, serving_store.db_path, str(pdf_directory)],
+        cwd=project_root, check=True, capture_output=True,
+    )
+    assert reloader.check()
+    first_reload = reloader.current
+    assert first_reload._chroma_client is not None
+
+    with reloader.acquire() as in_flight:
+        (pdf_directory / "short_book.pdf").unlink()
+        subprocess.run(
+            [sys.executable, "-c", INGEST_SCRIPT, serving_store.db_path, str(pdf_directory)],
+            cwd=project_root, check=True, capture_output=True,
+        )
+        assert reloader.check()
+        assert in_flight is first_reload and first_reload._chroma_client is not None
+    assert first_reload._chroma_client is None
+    assert len(reloader.current.vector_store.similarity_search("Long book page 1", k=20)) == 7
+
+
+def test_reloads_wait_for_an_ingest_to_settle(serving_store, monkeypatch):
+    clock, version = [0.0], [0]
+    monkeypatch.setattr("database.reloader.time.monotonic", lambda: clock[0])
+    monkeypatch.setattr(serving_store, "version", lambda: version[0])
+    monkeypatch.setattr(serving_store, "reopen", lambda: serving_store)
+    reloader = VectorStoreReloader(serving_store, settle=30, max_delay=100)
+
+    # An ingest committing a book every 10 seconds is only picked up after max_delay
+    for second in range(10, 110, 10):
+        clock[0], version[0] = second, version[0] + 1
+        assert not reloader.check()
+    clock[0] = 110
+    assert reloader.check()
+
+    # A single change is picked up once it has been quiet for settle seconds
+    version[0] += 1
+    clock[0] = 120
+    assert not reloader.check()
+    clock[0] = 150
+    assert reloader.check()
+    assert not reloader.check()
+
+
+def test_manifest_is_only_saved_when_it_changes(vector_store):
+    vector_store.upsert_documents()
+    before = vector_store.version()
+
+    vector_store.upsert_documents()
+
+    assert vector_store.version() == before
@@ -0,0 +1,66 @@
+"""Tests for the semantic retrieval cache."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.retrieval_cache import SemanticRetrievalCache
+from tests.conftest import write_pdf
+
+
+def test_close_queries_share_results():
+    cache = SemanticRetrievalCache(threshold=0.9)
+    cache.store([1.0, 0.0, 0.0], ["a", "b"], scope="mmr")
+
+    assert cache.lookup([0.95, 0.1, 0.0], scope="mmr") == ["a", "b"]
+    assert cache.lookup([0.5, 0.5, 0.0], scope="mmr") is None
+    assert cache.lookup([1.0, 0.0, 0.0], scope="hybrid") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_version_change_and_eviction():
+    cache = SemanticRetrievalCache(max_size=2, threshold=0.99)
+    cache.store([1.0, 0.0], ["a"], version=1)
+    cache.store([0.0, 1.0], ["b"], version=1)
+    cache.lookup([1.0, 0.0], version=1)
+    cache.store([-1.0, 0.0], ["c"], version=1)  # overwrites the least recently used, "b"
+
+    assert cache.lookup([0.0, 1.0], version=1) is None
+    assert cache.lookup([1.0, 0.0], version=1) == ["a"]
+    assert cache.lookup([1.0, 0.0], version=2) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_retrieve_reuses_results_until_books_are_ingested(vector_store, pdf_directory):
+    vector_store.upsert_documents()
+
+    first, first_hit = vector_store.retrieve("long book", k=3)
+    timings = {}
+    second, second_hit = vector_store.retrieve("long  book", k=3, timings=timings)
+
+    assert (first_hit, second_hit) == (False, True)
+    assert [doc.id for doc in second] == [doc.id for doc in first]
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+    assert "cache_ms" in timings and "vector_ms" not in timings
+
+    write_pdf(pdf_directory / "new_book.pdf", ["New book page one"])
+    vector_store.upsert_documents()
+    _, hit = vector_store.retrieve("long book", k=3)
+    assert not hit
+
+
+def test_hybrid_queries_only_share_results_when_they_share_keywords(vector_store, monkeypatch):
+    vector_store.upsert_documents()
+    vector_store.retrieval_cache.threshold = -1.0  # Every query is "similar" to every other
+    monkeypatch.setenv("RETRIEVAL_MODE", "hybrid")
+
+    assert not vector_store.retrieve("long book", k=3)[1]
+    assert not vector_store.retrieve("short book", k=3)[1]
+    assert vector_store.retrieve("Book, long?", k=3)[1]
+
+    monkeypatch.setenv("RETRIEVAL_MODE", "mmr")
+    assert not vector_store.retrieve("long book", k=3)[1]
+    assert vector_store.retrieve("short book", k=3)[1]
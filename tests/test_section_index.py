@@ -0,0 +1,95 @@
+"""Tests for the book/section summary index and hierarchical retrieval."""
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from database.section_index import outline_starts, section_ranges
+from database.vector_store import VectorStore
+from tests.conftest import write_pdf
+
+
+class BagOfWordsEmbedding(Embeddings):
+    """Hashes words into buckets, so texts sharing words really are similar."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 64
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % 64] += 1.0
+        return vector
+
+
+def write_pdf_with_outline(path, pages: list[str], chapters: list[tuple[str, int]]) -> None:
+    write_pdf(path, pages)
+    writer = PdfWriter(clone_from=PdfReader(path))
+    for title, page in chapters:
+        writer.add_outline_item(title, page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_sections_follow_the_outline_or_fall_back_to_page_ranges(tmp_path):
+    book = tmp_path / "book.pdf"
+    write_pdf_with_outline(book, [f"page {i}" for i in range(6)], [("Intro", 1), ("Deep dive", 3)])
+
+    assert outline_starts(str(book)) == [(1, "Intro"), (3, "Deep dive")]
+    assert section_ranges(outline_starts(str(book)), 6) == [("Front matter", 0, 1), ("Intro", 1, 3), ("Deep dive", 3, 6)]
+    assert section_ranges([(0, "Only chapter")], 5, pages_per_section=2) == [("Pages 1-2", 0, 2), ("Pages 3-4", 2, 4), ("Pages 5-5", 4, 5)]
+
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("SECTION_TOP_BOOKS", "1")
+    monkeypatch.setenv("SECTION_TOP_N", "1")
+    books = tmp_path / "books"
+    books.mkdir()
+    write_pdf_with_outline(
+        books / "garden.pdf",
+        ["roses need sun", "roses need water", "tomato soil compost", "tomato seedlings compost"],
+        [("Roses", 0), ("Tomatoes", 2)],
+    )
+    write_pdf(books / "engines.pdf", ["piston engine oil", "turbine engine blades"])
+    store = VectorStore(name="test_collection", db_path=str(tmp_path / "db"), documents_directory=str(books))
+    store.initialise_vector_store(embeddings=BagOfWordsEmbedding(), backend="chroma")
+    store.upsert_documents()
+    return store
+
+
+def test_hierarchical_search_only_scores_chunks_of_the_best_section(vector_store):
+    assert vector_store.section_index.count() == 3
+    assert sorted(vector_store.section_index.books()) == ["engines.pdf", "garden.pdf"]
+
+    timings = {}
+    docs = vector_store.hierarchical_search("tomato compost", k=4, timings=timings)
+    assert sorted(doc.page_content for doc in docs) == ["tomato seedlings compost", "tomato soil compost"]
+    assert {doc.metadata["section"] for doc in docs} == {"Tomatoes"}
+    assert all(doc.metadata["relevance_score"] > 0 for doc in docs)
+    assert {"section_ms", "vector_ms", "total_ms"} <= timings.keys()
+
+    retriever = vector_store.get_retriever(search_type="hierarchical", k=1)
+    assert retriever.invoke("turbine engine")[0].page_content == "turbine engine blades"
+
+
+def test_sections_follow_books_in_and_out(vector_store, monkeypatch):
+    before = vector_store.version()
+    (Path(vector_store.directory) / "engines.pdf").unlink()
+    vector_store.upsert_documents()
+
+    assert sorted(vector_store.section_index.books()) == ["garden.pdf"]
+    assert vector_store.section_index.count() == 2
+    assert vector_store.version() != before
+
+    monkeypatch.setenv("RETRIEVAL_MODE", "hierarchical")
+    docs = vector_store.query_vector_store("roses sun", k=1)
+    assert docs[0].metadata["section"] == "Roses"
@@ -0,0 +1,100 @@
+"""Tests for domain-sharded collections and query routing."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from database.sharding import DEFAULT_SHARD, DOMAIN_KEYWORDS, ROUTING_FILENAME, ShardMap, ShardedVectorStore, classify, domain_scores
+from tests.conftest import write_pdf
+
+
+class DomainEmbedding(Embeddings):
+    """Embeds text as its keyword count per domain, so similar topics really are near each other."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        scores = domain_scores(text)
+        return [float(scores[domain]) for domain in DOMAIN_KEYWORDS] + [0.1]
+
+
+@pytest.fixture
+def library(tmp_path):
+    books = tmp_path / "books"
+    books.mkdir()
+    write_pdf(books / "kubernetes_in_action.pdf", ["Kubernetes pods on linux", "Docker and systemd on ubuntu"])
+    write_pdf(books / "kali_pentest.pdf", ["Penetration testing with kali", "Nmap and metasploit exploit basics"])
+    write_pdf(books / "cooking.pdf", ["Bread and butter recipes"])
+    return books
+
+
+def test_questions_and_books_are_classified_by_keywords(library, tmp_path):
+    (library / "security").mkdir()
+    write_pdf(library / "security" / "hardening.pdf", ["Hardening the linux kernel"])
+    assert classify("How do I schedule pods on Kubernetes?") == "linux"
+    assert classify("Write a decorator in Python") == "programming"
+    assert classify("What's for dinner?") is None
+
+    shard_map = ShardMap.load(str(tmp_path / "db"))
+    files = sorted(str(path) for path in library.glob("**/*.pdf"))
+    by_shard = shard_map.assign(files, str(library))
+    assert {shard: sorted(Path(path).name for path in books) for shard, books in by_shard.items()} == {
+        "linux": ["kubernetes_in_action.pdf"],
+        "security": ["hardening.pdf", "kali_pentest.pdf"],  # The folder wins over the text
+        DEFAULT_SHARD: ["cooking.pdf"],
+    }
+
+    # A book stays where it was first put, and books that are gone are forgotten
+    shard_map.books["cooking.pdf"] = "linux"
+    shard_map.save()
+    reloaded = ShardMap.load(str(tmp_path / "db"))
+    assert str(library / "cooking.pdf") in reloaded.assign(files, str(library))["linux"]
+    reloaded.assign(files[1:], str(library))
+    assert Path(files[0]).relative_to(library).as_posix() not in reloaded.books
+
+
+def test_questions_only_search_the_shards_they_are_routed_to(library, tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "chroma")
+    store = ShardedVectorStore("test_collection", str(tmp_path / "db"), str(library))
+    store.initialise_vector_store(embeddings=DomainEmbedding())
+    stats = store.upsert_documents()
+
+    assert sorted(stats) == [DEFAULT_SHARD, "linux", "security"]
+    assert stats["security"].chunks == 2
+    assert store.shards["linux"].chroma_collection().count() == 2
+
+    timings = {}
+    docs, cache_hit = store.retrieve("How do I schedule pods on kubernetes with docker?", k=3, timings=timings)
+    assert store.route(DomainEmbedding().embed_query("kubernetes docker"), "kubernetes docker") == ["linux"]
+    assert {doc.metadata["shard"] for doc in docs} == {"linux"}
+    assert not cache_hit
+    assert "linux_ms" in timings and "security_ms" not in timings
+
+    # A fresh handle (as the reloader makes) finds the same shards on disk
+    fresh = store.reopen()
+    assert sorted(fresh.shards) == [DEFAULT_SHARD, "linux", "security"]
+    assert fresh.version() == store.version()
+
+
+def test_a_shard_whose_books_are_gone_is_no_longer_searched(library, tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "chroma")
+    store = ShardedVectorStore("test_collection", str(tmp_path / "db"), str(library))
+    store.initialise_vector_store(embeddings=DomainEmbedding())
+    store.upsert_documents()
+    before = store.version()
+
+    (library / "cooking.pdf").unlink()
+    store.upsert_documents()
+
+    assert store.shards[DEFAULT_SHARD].chroma_collection().count() == 0
+    assert not os.path.exists(os.path.join(store.shards[DEFAULT_SHARD].db_path, ROUTING_FILENAME))
+    assert store.version() != before
+    assert DEFAULT_SHARD not in store.reopen().shards
@@ -0,0 +1,51 @@
+"""Tests for per-stage ingestion telemetry."""
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.document_loader import DocumentLoader
+from database.ingestion import IngestionPipeline
+from database.telemetry import IngestionTelemetry, JsonLinesSink, write_report
+
+
+def test_nested_stages_are_timed_exclusively():
+    telemetry = IngestionTelemetry()
+    with telemetry.stage("outer"):
+        time.sleep(0.05)
+        with telemetry.stage("inner", items=3, size=10):
+            time.sleep(0.1)
+
+    assert 0.04 < telemetry.stages["outer"].seconds < 0.09
+    assert telemetry.stages["inner"].seconds >= 0.1
+    assert telemetry.stages["inner"].items == 3 and telemetry.stages["inner"].bytes == 10
+    assert telemetry.snapshot()["bottleneck"] == "inner"
+
+
+def test_pipeline_reports_every_stage(pdf_directory, tmp_path):
+    sink_path = tmp_path / "metrics.jsonl"
+    telemetry = IngestionTelemetry(sink=JsonLinesSink(str(sink_path)), sample_interval=0.01)
+
+    def slow_writer(batch):
+        time.sleep(0.05)
+
+    pipeline = IngestionPipeline(DocumentLoader(str(pdf_directory)), write_batch=slow_writer, batch_size=2, telemetry=telemetry)
+    stats = pipeline.run()
+    report = json.loads(Path(write_report(pipeline.report(), str(tmp_path / "reports"))).read_text())
+
+    assert report["stats"]["pages"] == 9
+    stages = report["stages"]
+    assert stages["parse"]["items"] == stages["clean"]["items"] == 9
+    assert stages["split"]["items"] == stats.chunks
+    assert stages["write"]["items"] == stats.chunks_written
+    assert report["bottleneck"] == "write"
+    assert report["queues"]["batches"]["capacity"] == 2
+    assert report["queues"]["pages"]["consumer_wait_seconds"] >= 0
+    assert report["memory"]["peak_rss_bytes"] > 0
+    snapshots = [json.loads(line) for line in sink_path.read_text().splitlines()]
+    assert snapshots and "stages" in snapshots[-1]
@@ -0,0 +1,64 @@
+"""Tests for the offset-based splitter and single-pass cleaner."""
+import sys
+import random
+import re
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from database.text_processing import OffsetTextSplitter, clean_text
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def legacy_clean_text(text):
+    text = text.encode('utf-8', 'ignore').decode('utf-8')
+    text = text.replace('\x00', '')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    return text.strip()
+
+
+def random_text(rng, pieces):
+    vocabulary = ["word", "the ", ". ", " ", "  ", "\t", "\n", "\n\n", "\n\n\n", "x" * rng.randint(1, 400)]
+    return "".join(rng.choice(vocabulary) for _ in range(rng.randint(0, pieces)))
+
+
+def test_clean_text_matches_legacy_cleaner():
+    rng = random.Random(0)
+    alphabet = ["a", " ", "\t", "\n", "\x00", "\ud800", "é", "\r"]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_splitter_matches_recursive_character_splitter():
+    rng = random.Random(0)
+    for _ in range(200):
+        chunk_size = rng.choice([10, 50, 200, 1000])
+        chunk_overlap = rng.randint(0, chunk_size // 2)
+        document = Document(page_content=random_text(rng, 600), metadata={"page": 3})
+
+        expected = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=SEPARATORS,
+            add_start_index=True,
+        ).split_documents([document])
+        chunks = OffsetTextSplitter(chunk_size, chunk_overlap, SEPARATORS).split_documents([document])
+
+        assert [(c.page_content, c.metadata) for c in chunks] == [(c.page_content, c.metadata) for c in expected]
+
+
+def test_offsets_point_into_the_text():
+    text = "First paragraph.\n\n" + "Second one goes on. " * 100
+    splitter = OffsetTextSplitter(1000, 200, SEPARATORS)
+    for start, end in splitter.split_offsets(text):
+        assert 0 <= start < end <= len(text)
+    assert splitter.split_text(text) == [text[start:end] for start, end in splitter.split_offsets(text)]
@@ -0,0 +1,172 @@
+"""Tests for vector store ingestion."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from database.manifest import IngestionManifest
+from database.vector_store import VectorStore, _check_chroma_versions
+from tests.conftest import write_pdf
+
+
+def _collection_size(store: VectorStore) -> int:
+    return len(store.vector_store.get()["ids"])
+
+
+def test_rerun_skips_unchanged_books(vector_store):
+    first = vector_store.upsert_documents()
+    assert first.chunks == 9
+    assert _collection_size(vector_store) == 9
+
+    second = vector_store.upsert_documents()
+    assert second.chunks == 0
+    assert _collection_size(vector_store) == 9
+
+
+def test_only_new_books_are_embedded(vector_store, pdf_directory):
+    vector_store.upsert_documents()
+    write_pdf(pdf_directory / "new_book.pdf", ["New book page one"])
+
+    stats = vector_store.upsert_documents()
+
+    assert stats.pages == 1
+    assert _collection_size(vector_store) == 10
+
+
+def test_removed_and_changed_books_lose_their_chunks(vector_store, pdf_directory):
+    vector_store.upsert_documents()
+    (pdf_directory / "short_book.pdf").unlink()
+    write_pdf(pdf_directory / "long_book.pdf", ["Rewritten long book"])
+
+    stats = vector_store.upsert_documents()
+
+    assert stats.pages == 1
+    assert vector_store.vector_store.get()["documents"] == ["Rewritten long book"]
+
+
+def test_chunk_ids_are_stable_across_rebuilds(vector_store):
+    vector_store.upsert_documents()
+    first_ids = sorted(vector_store.vector_store.get()["ids"])
+
+    vector_store.upsert_documents(incremental=False)
+
+    assert sorted(vector_store.vector_store.get()["ids"]) == first_ids
+
+
+def test_deduplicate_removes_legacy_copies(vector_store):
+    from database.document_loader import DocumentLoader
+
+    # Simulate two runs of the old add-without-IDs ingestion
+    chunks = DocumentLoader(vector_store.directory).preprocess_documents()
+    vector_store.vector_store.add_documents(chunks)
+    vector_store.vector_store.add_documents(chunks)
+    assert _collection_size(vector_store) == 18
+
+    assert vector_store.deduplicate() == 9
+    assert _collection_size(vector_store) == 9
+
+    # The survivors are adopted into the manifest, so nothing gets re-embedded
+    assert vector_store.upsert_documents().chunks == 0
+
+
+def test_rebuild_reuses_cached_embeddings(vector_store):
+    first = vector_store.upsert_documents()
+    assert first.embedding_cache_misses == 9
+
+    rebuild = vector_store.upsert_documents(incremental=False)
+
+    assert rebuild.embedding_cache_hits == 9
+    assert rebuild.embedding_cache_misses == 0
+
+
+def _crash_on_second_batch(store, monkeypatch):
+    original = store._write_batch
+    calls = []
+
+    def flaky_write(batch, vectors=None):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise RuntimeError("container restarted")
+        original(batch, vectors)
+
+    monkeypatch.setattr(store, "_write_batch", flaky_write)
+
+
+def test_resume_continues_after_last_committed_batch(vector_store, monkeypatch):
+    _crash_on_second_batch(vector_store, monkeypatch)
+    # Write batches strictly in order so we know which one made it
+    monkeypatch.setenv("EMBEDDING_MAX_CONCURRENCY", "1")
+    with pytest.raises(RuntimeError):
+        vector_store.upsert_documents(batch_size=3)
+    monkeypatch.delattr(vector_store, "_write_batch")
+    assert _collection_size(vector_store) == 3
+
+    stats = vector_store.upsert_documents(batch_size=3, resume=True)
+
+    assert stats.chunks_skipped == 3
+    assert stats.embedding_cache_misses == 6
+    assert _collection_size(vector_store) == 9
+    assert vector_store.upsert_documents().chunks == 0
+
+
+def test_concurrent_embedding_writes_the_precomputed_vectors(vector_store, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_MAX_CONCURRENCY", "4")
+
+    stats = vector_store.upsert_documents(batch_size=3)
+
+    assert stats.chunks == 9 and _collection_size(vector_store) == 9
+    assert len(vector_store.chroma_collection().get(include=["embeddings"])["embeddings"]) == 9
+
+
+def test_unsupported_chroma_versions_are_refused(vector_store, monkeypatch):
+    monkeypatch.setattr("database.vector_store.importlib.metadata.version", lambda package: "2.0.0")
+    _check_chroma_versions.cache_clear()
+
+    with pytest.raises(RuntimeError, match="isn't supported"):
+        vector_store.chroma_collection()
+
+
+def test_fresh_run_after_crash_starts_over(vector_store, monkeypatch):
+    _crash_on_second_batch(vector_store, monkeypatch)
+    with pytest.raises(RuntimeError):
+        vector_store.upsert_documents(batch_size=3)
+    monkeypatch.undo()
+
+    stats = vector_store.upsert_documents(batch_size=3)
+
+    assert stats.chunks_skipped == 0
+    assert stats.chunks == 9
+    assert _collection_size(vector_store) == 9
+
+
+def test_unreadable_books_are_retried_on_the_next_run(vector_store, pdf_directory):
+    (pdf_directory / "broken.pdf").write_bytes(b"%PDF-1.4 this is not really a pdf")
+    first = vector_store.upsert_documents()
+    assert first.files_failed == 1
+    assert IngestionManifest.load(vector_store.db_path).files["broken.pdf"]["failed_attempts"] == 1
+
+    # Unchanged on disk, but tried again rather than counted as ingested
+    second = vector_store.upsert_documents()
+    assert second.files_failed == 1
+
+    write_pdf(pdf_directory / "broken.pdf", ["Repaired book"])
+    third = vector_store.upsert_documents()
+    assert third.files_failed == 0 and third.pages == 1
+    assert "failed_attempts" not in IngestionManifest.load(vector_store.db_path).files["broken.pdf"]
+
+
+def test_unreadable_books_are_given_up_on_after_a_few_attempts(vector_store, pdf_directory, monkeypatch, caplog):
+    monkeypatch.setenv("INGEST_MAX_FAILED_ATTEMPTS", "2")
+    (pdf_directory / "broken.pdf").write_bytes(b"%PDF-1.4 this is not really a pdf")
+    assert vector_store.upsert_documents().files_failed == 1
+    assert vector_store.upsert_documents().files_failed == 1
+
+    third = vector_store.upsert_documents()
+
+    assert third.files_failed == 0 and third.pages == 0
+    assert IngestionManifest.load(vector_store.db_path).files["broken.pdf"]["failed_attempts"] == 2
+    assert "Giving up on the unreadable pages of broken.pdf" in caplog.text